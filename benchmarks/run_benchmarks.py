@@ -0,0 +1,305 @@
+'''
+Render benchmarks over synthetic reports.
+
+Every case runs in a fresh process so that its peak RSS is its own, and records the best wall time over --repeat runs,
+the peak RSS and the size of what it produced. Results are compared against a stored baseline, and regressions beyond
+--tolerance make the exit status non-zero.
+
+    # NOTE: Make sure you're in the root of the pyreporting project (where requirements.txt lives)
+    $ python -m benchmarks.run_benchmarks --save-baseline   # record a baseline on this machine
+    $ python -m benchmarks.run_benchmarks                   # compare against it
+    $ python -m benchmarks.run_benchmarks --suite full --filter bokeh_render
+'''
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from itertools import count
+from multiprocessing import get_context
+from pathlib import Path
+
+from benchmarks.synthetic import make_report, make_data_frame, EMAIL_KINDS
+
+DEFAULT_BASELINE = Path(__file__).parent / 'baseline.json'
+
+METRICS = ('wall_time', 'peak_rss', 'output_bytes', 'import_time', 'modules')
+
+
+def directory_size(directory):
+    return sum(entry.stat().st_size for entry in Path(directory).rglob('*') if entry.is_file())
+
+
+def bench_keyed_items(work_dir, items):
+    ''' Report.get_uniquely_keyed_items() when every item has the same name. '''
+    report = make_report(items=items, rows=1, columns=1, mix={'text': 1}, distinct_names=False)
+
+    def run():
+        report.get_uniquely_keyed_items()
+        return 0
+    return run
+
+
+def bench_stacked_bar_figure(work_dir, rows, columns):
+    ''' plotutils.generate_stacked_bar_plot_figure(), rasterized to PNG. '''
+    from pyreporting.reports.plotutils import generate_stacked_bar_plot_figure
+
+    df = make_data_frame(rows, columns)
+
+    def run():
+        fig = generate_stacked_bar_plot_figure(df, title='Benchmark', y_label='Value')
+        buffer = BytesIO()
+        fig.savefig(buffer, format='png')
+        return buffer.tell()
+    return run
+
+
+def bench_widget_payloads(work_dir, rows, columns, columnar=False):
+    ''' Construction of the four React widgets, measured by the size of their serialized properties. '''
+    from pyreporting.reports import BokehReportRenderer
+    from pyreporting.reports import ReportHeatmapItem, ReportInteractiveTableItem, ReportInteractivePlotItem, \
+        ReportTableExplorerItem
+
+    df = make_data_frame(rows, columns)
+    renderer = BokehReportRenderer(columnar=columnar)
+
+    def run():
+        widgets = [
+            renderer.make_heatmap_item(ReportHeatmapItem(df, 'heatmap', ''), 'heatmap'),
+            renderer.make_interactive_table_item(ReportInteractiveTableItem(df, 'table', ''), 'table'),
+            renderer.make_interactive_plot_item(ReportInteractivePlotItem(df, 'plot', ''), 'plot'),
+            renderer.make_table_explorer_item(ReportTableExplorerItem(df, 'explorer', ''), 'explorer'),
+        ]
+        return sum(len(json.dumps(widget.properties_with_values(include_defaults=False), default=str))
+                   for widget in widgets)
+    return run
+
+
+def bench_bokeh_render(work_dir, items, rows, columns, mix=None, **renderer_kwargs):
+    ''' BokehReportRenderer.render() of a whole report; the output size is that of everything it wrote. '''
+    from pyreporting.reports import BokehReportRenderer
+
+    report = make_report(items=items, rows=rows, columns=columns, mix=mix)
+    runs = count()
+
+    def run():
+        output_dir = Path(work_dir) / f'bokeh_{next(runs)}'
+        BokehReportRenderer(open_browser=False, **renderer_kwargs).render(report, output_dir=output_dir)
+        return directory_size(output_dir)
+    return run
+
+
+def bench_email_render(work_dir, items, rows, columns):
+    ''' EmailReportRenderer.render() with a send_email that only measures the message. '''
+    from pyreporting.reports import EmailReportRenderer
+
+    report = make_report(items=items, rows=rows, columns=columns, mix={kind: 1 for kind in EMAIL_KINDS})
+    runs = count()
+    sent = {}
+
+    def send_email(html_content, recipients, email_subject, images, files):
+        sent['bytes'] = len(html_content.encode())
+
+    def run():
+        output_dir = Path(work_dir) / f'email_{next(runs)}'
+        EmailReportRenderer(send_email=send_email).render(report, ['benchmark@localhost'], 'Benchmark',
+                                                           output_dir=output_dir)
+        return sent['bytes'] + directory_size(output_dir)
+    return run
+
+
+# What a job imports; the statements run in a fresh interpreter
+IMPORT_STATEMENTS = {
+    'package': 'import pyreporting.reports',
+    'email_tables': 'from pyreporting.reports import Report, ReportTableItem, ReportTextItem, EmailReportRenderer',
+    'bokeh': 'from pyreporting.reports import Report, BokehReportRenderer',
+}
+
+# What importing the packages did before their names were imported lazily: every module, and matplotlib, which the email
+# renderer imported at module level
+EAGER_IMPORTS = '''
+import pyreporting.reports, pyreporting.widgets, pyreporting.reports.plotutils
+for module in (pyreporting.reports, pyreporting.widgets):
+    for name in module.__all__:
+        getattr(module, name)
+'''
+
+IMPORT_SCRIPT = '''
+import sys, time
+start = time.perf_counter()
+{statement}
+{eager}
+print(time.perf_counter() - start, len(sys.modules))
+'''
+
+
+def bench_import_time(work_dir, imports, eager=False):
+    '''
+    A fresh interpreter that runs IMPORT_STATEMENTS[imports]. wall_time includes the interpreter's start-up; import_time
+    is the time of the imports alone, and modules the number of modules loaded after them.
+
+    :param eager: Also import everything the packages imported eagerly before they were made lazy, for comparison
+    '''
+    script = IMPORT_SCRIPT.format(statement=IMPORT_STATEMENTS[imports], eager=EAGER_IMPORTS if eager else '')
+    root = Path(__file__).resolve().parent.parent
+
+    def run():
+        completed = subprocess.run([sys.executable, '-c', script], cwd=root, check=True, capture_output=True,
+                                   text=True)
+        import_time, modules = completed.stdout.split()[-2:]
+        return {'output_bytes': 0, 'import_time': float(import_time), 'modules': int(modules)}
+    return run
+
+
+BENCHMARKS = {
+    'import_time': bench_import_time,
+    'keyed_items': bench_keyed_items,
+    'stacked_bar_figure': bench_stacked_bar_figure,
+    'widget_payloads': bench_widget_payloads,
+    'bokeh_render': bench_bokeh_render,
+    'email_render': bench_email_render,
+}
+
+SUITES = {
+    'quick': [
+        ('import_time', dict(imports='package')),
+        ('import_time', dict(imports='package', eager=True)),
+        ('import_time', dict(imports='email_tables')),
+        ('import_time', dict(imports='email_tables', eager=True)),
+        ('keyed_items', dict(items=1000)),
+        ('stacked_bar_figure', dict(rows=200, columns=10)),
+        ('widget_payloads', dict(rows=10000, columns=10)),
+        ('widget_payloads', dict(rows=10000, columns=10, columnar=True)),
+        ('bokeh_render', dict(items=18, rows=1000, columns=5)),
+        ('email_render', dict(items=10, rows=1000, columns=5)),
+    ],
+    'full': [
+        ('import_time', dict(imports='package')),
+        ('import_time', dict(imports='package', eager=True)),
+        ('import_time', dict(imports='email_tables')),
+        ('import_time', dict(imports='email_tables', eager=True)),
+        ('import_time', dict(imports='bokeh')),
+        ('keyed_items', dict(items=1000)),
+        ('keyed_items', dict(items=10000)),
+        ('stacked_bar_figure', dict(rows=200, columns=10)),
+        ('stacked_bar_figure', dict(rows=2000, columns=50)),
+        ('widget_payloads', dict(rows=10000, columns=10)),
+        ('widget_payloads', dict(rows=100000, columns=20)),
+        ('widget_payloads', dict(rows=100000, columns=20, columnar=True)),
+        ('bokeh_render', dict(items=18, rows=1000, columns=5)),
+        ('bokeh_render', dict(items=90, rows=10000, columns=10)),
+        ('bokeh_render', dict(items=90, rows=10000, columns=10, columnar=True, max_workers=4)),
+        ('bokeh_render', dict(items=200, rows=100, columns=3, mix={'line': 1, 'table': 1, 'text': 2})),
+        ('email_render', dict(items=10, rows=1000, columns=5)),
+        ('email_render', dict(items=50, rows=10000, columns=10)),
+    ],
+}
+
+
+def case_id(name, params):
+    arguments = ','.join(f'{key}={value}' for key, value in sorted(params.items()))
+    return f'{name}[{arguments}]'
+
+
+def peak_rss_bytes():
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS.
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak_rss if sys.platform == 'darwin' else peak_rss * 1024
+
+
+def run_case(name, params, repeat):
+    '''
+    Run one case; called in a fresh process. A benchmark's run() returns the size of its output, or a dict of metrics
+    for benchmarks that measure more; those of the fastest run are recorded.
+    '''
+    with tempfile.TemporaryDirectory(prefix='pyreporting-bench-') as work_dir:
+        run = BENCHMARKS[name](work_dir, **params)
+        fastest = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            output = run()
+            wall_time = time.perf_counter() - start
+            if fastest is None or wall_time < fastest['wall_time']:
+                fastest = dict(output) if isinstance(output, dict) else {'output_bytes': output}
+                fastest['wall_time'] = wall_time
+    fastest['peak_rss'] = peak_rss_bytes()
+    return fastest
+
+
+def run_suite(cases, repeat):
+    results = {}
+    for name, params in cases:
+        # spawn, so that no memory is inherited from this process or from earlier cases
+        with ProcessPoolExecutor(max_workers=1, mp_context=get_context('spawn')) as executor:
+            results[case_id(name, params)] = executor.submit(run_case, name, params, repeat).result()
+        print(format_result(case_id(name, params), results[case_id(name, params)]), flush=True)
+    return results
+
+
+def compare(results, baseline, tolerance):
+    '''
+    :return: list of (case id, metric, baseline value, new value) for every metric that grew by more than tolerance
+    '''
+    regressions = []
+    for case, result in results.items():
+        baseline_result = baseline.get(case)
+        if baseline_result is None:
+            continue
+        for metric in METRICS:
+            baseline_value = baseline_result.get(metric)
+            if baseline_value and result.get(metric, 0) > baseline_value * (1 + tolerance):
+                regressions.append((case, metric, baseline_value, result[metric]))
+    return regressions
+
+
+def format_result(case, result):
+    line = f'{case:<80} {result["wall_time"]:>9.3f} s {result["peak_rss"] / 1024 ** 2:>9.1f} MiB '
+    if 'modules' in result:
+        return line + f'{result["import_time"]:>9.3f} s import {result["modules"]:>6} modules'
+    return line + f'{result["output_bytes"] / 1024:>11.1f} KiB'
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--suite', choices=sorted(SUITES), default='quick')
+    parser.add_argument('--filter', default='', help='Only run the cases whose id contains this text')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per case; the fastest one is recorded')
+    parser.add_argument('--baseline', type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument('--save-baseline', action='store_true', help='Store the results as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='Relative growth of a metric over the baseline that counts as a regression')
+    parser.add_argument('--output', type=Path, help='Also write the results to this JSON file')
+    args = parser.parse_args(argv)
+
+    cases = [(name, params) for name, params in SUITES[args.suite] if args.filter in case_id(name, params)]
+    results = run_suite(cases, args.repeat)
+
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2, sort_keys=True))
+
+    if args.save_baseline:
+        # Keep the cases of other suites and filters
+        baseline = json.loads(args.baseline.read_text()) if args.baseline.exists() else {}
+        baseline.update(results)
+        args.baseline.write_text(json.dumps(baseline, indent=2, sort_keys=True))
+        print(f'Saved baseline to {args.baseline}')
+        return 0
+
+    if not args.baseline.exists():
+        print(f'No baseline at {args.baseline}; run with --save-baseline to record one')
+        return 0
+
+    regressions = compare(results, json.loads(args.baseline.read_text()), args.tolerance)
+    for case, metric, baseline_value, value in regressions:
+        print(f'REGRESSION {case} {metric}: {baseline_value:.6g} -> {value:.6g} ({value / baseline_value - 1:+.0%})')
+    if not regressions:
+        print(f'No regressions beyond {args.tolerance:.0%} of the baseline')
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
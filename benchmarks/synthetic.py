@@ -0,0 +1,68 @@
+'''
+Synthetic reports of a controlled shape, for benchmarking. Everything is generated in memory from a seeded random state,
+so runs are reproducible and need no sample data.
+'''
+from io import StringIO
+from itertools import cycle
+
+import numpy as np
+import pandas as pd
+
+from pyreporting.reports import Report, ReportLineGraphItem, ReportTableItem, ReportFileItem, ReportTextItem, \
+    ReportGraphItem, ReportHeatmapItem, ReportInteractivePlotItem, ReportInteractiveTableItem, ReportTableExplorerItem
+
+# Item kinds that can be used in a mix, and how to build each from a DataFrame
+ITEM_BUILDERS = {
+    'line': lambda df, name: ReportLineGraphItem(df, name, 'Synthetic line graph'),
+    'table': lambda df, name: ReportTableItem(df, name, 'Synthetic table'),
+    'stacked': lambda df, name: ReportGraphItem(df, name, 'Synthetic stacked bars',
+                                                output_type=ReportGraphItem.STACKED),
+    'heatmap': lambda df, name: ReportHeatmapItem(df, name, 'Synthetic heatmap'),
+    'interactive_table': lambda df, name: ReportInteractiveTableItem(df, name, 'Synthetic interactive table'),
+    'interactive_plot': lambda df, name: ReportInteractivePlotItem(df, name, 'Synthetic interactive plot'),
+    'table_explorer': lambda df, name: ReportTableExplorerItem(df, name, 'Synthetic table explorer'),
+    'text': lambda df, name: ReportTextItem(name, f'Synthetic text over {len(df)} rows'),
+    'file': lambda df, name: ReportFileItem(name, 'Synthetic file', StringIO(df.to_csv()), extension='.csv'),
+}
+
+# Kinds that the email renderer supports
+EMAIL_KINDS = ('line', 'table', 'stacked', 'text', 'file')
+
+DEFAULT_MIX = {kind: 1 for kind in ITEM_BUILDERS}
+
+
+def make_data_frame(rows, columns, seed=0) -> pd.DataFrame:
+    ''' A daily time series of random walks, one per column. '''
+    random_state = np.random.RandomState(seed)
+    index = pd.date_range('2000-01-01', periods=rows, freq='D', name='date')
+    values = random_state.randn(rows, columns).cumsum(axis=0)
+    return pd.DataFrame(values, index=index, columns=[f'series_{i}' for i in range(columns)])
+
+
+def expand_mix(mix):
+    '''
+    The sequence of item kinds for a mix, repeated as needed.
+
+    :param mix: dict of kind -> weight, e.g. {'line': 3, 'table': 1} for three line graphs per table
+    '''
+    unknown = set(mix) - set(ITEM_BUILDERS)
+    if unknown:
+        raise ValueError(f'Unknown item kinds: {sorted(unknown)}. Expected some of {sorted(ITEM_BUILDERS)}')
+    return cycle([kind for kind, weight in mix.items() for _ in range(weight)])
+
+
+def make_report(items=10, rows=1000, columns=5, mix=None, seed=0, distinct_names=True) -> Report:
+    '''
+    :param items: Number of items in the report
+    :param rows: Rows of every item's DataFrame
+    :param columns: Columns of every item's DataFrame
+    :param mix: dict of item kind -> weight (see ITEM_BUILDERS). All kinds equally by default.
+    :param seed: Seed of the random data
+    :param distinct_names: If False, all items of a kind share a name, which is the worst case for unique keys.
+    '''
+    report = Report(f'Synthetic {items}x{rows}x{columns}')
+    df = make_data_frame(rows, columns, seed=seed)
+    for position, kind in zip(range(items), expand_mix(mix or DEFAULT_MIX)):
+        name = f'{kind}_{position}' if distinct_names else kind
+        report.add_item(ITEM_BUILDERS[kind](df, name))
+    return report
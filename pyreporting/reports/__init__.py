@@ -1,17 +1,67 @@
-from .report_item import ReportItem
-from .report import Report
-from .report_line_graph_item import ReportLineGraphItem
-from .report_graph_item import ReportGraphItem
-from .report_table_item import ReportTableItem
-from .report_heatmap_item import ReportHeatmapItem
-from .report_interactive_table_item import ReportInteractiveTableItem
-from .report_interactive_plot_item import ReportInteractivePlotItem
-from .report_text_item import ReportTextItem
-
-from .report_file_item import ReportFileItem
-from .report_image_item import ReportImageItem  # Depends on FileItem
-
-from .report_table_explorer_item import ReportTableExplorerItem
-
-from .bokeh_report_renderer import BokehReportRenderer
-from .email_renderer import EmailReportRenderer
+'''
+Report items and renderers.
+
+Names are imported on first use (PEP 562), so that building a Report does not import Bokeh, matplotlib or the widgets,
+and a job that only uses EmailReportRenderer with tables and text never imports Bokeh or matplotlib either.
+'''
+from importlib import import_module
+from typing import TYPE_CHECKING
+
+# Public name -> module that defines it
+_LAZY_IMPORTS = {
+    'ReportItem': 'report_item',
+    'Report': 'report',
+    'ReportDataItem': 'report_data_item',
+    'ReportLineGraphItem': 'report_line_graph_item',
+    'ReportGraphItem': 'report_graph_item',
+    'ReportTableItem': 'report_table_item',
+    'ReportHeatmapItem': 'report_heatmap_item',
+    'ReportInteractiveTableItem': 'report_interactive_table_item',
+    'ReportInteractivePlotItem': 'report_interactive_plot_item',
+    'ReportTextItem': 'report_text_item',
+
+    'ReportFileItem': 'report_file_item',
+    'ReportImageItem': 'report_image_item',
+
+    'ReportTableExplorerItem': 'report_table_explorer_item',
+
+    'BokehReportRenderer': 'bokeh_report_renderer',
+    'EmailReportRenderer': 'email_renderer',
+    'render_batch': 'batch',
+    'BatchResult': 'batch',
+}
+
+__all__ = list(_LAZY_IMPORTS)
+
+
+def __getattr__(name):
+    module_name = _LAZY_IMPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    value = getattr(import_module(f'.{module_name}', __name__), name)
+    # Later lookups find the name without calling __getattr__
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
+
+
+if TYPE_CHECKING:
+    from .report_item import ReportItem
+    from .report import Report
+    from .report_data_item import ReportDataItem
+    from .report_line_graph_item import ReportLineGraphItem
+    from .report_graph_item import ReportGraphItem
+    from .report_table_item import ReportTableItem
+    from .report_heatmap_item import ReportHeatmapItem
+    from .report_interactive_table_item import ReportInteractiveTableItem
+    from .report_interactive_plot_item import ReportInteractivePlotItem
+    from .report_text_item import ReportTextItem
+    from .report_file_item import ReportFileItem
+    from .report_image_item import ReportImageItem
+    from .report_table_explorer_item import ReportTableExplorerItem
+    from .bokeh_report_renderer import BokehReportRenderer
+    from .email_renderer import EmailReportRenderer
+    from .batch import render_batch, BatchResult
@@ -0,0 +1,112 @@
+'''
+Render many reports in a pool of worker processes.
+
+Workers are started once for the whole batch and import Bokeh, matplotlib and pandas up front, so every report after a
+worker's first one reuses the warmed-up modules and Bokeh's compiled custom models.
+
+    results = render_batch([make_sales_report, make_risk_report], output_dir='/data/reports', max_workers=8)
+    failed = [result for result in results if not result.succeeded]
+
+Reports are sent to the workers by pickling. A report with file items made from open file objects cannot be pickled
+(file items made from paths can), so pass a function that builds the report instead; it is called in the worker.
+Functions must be defined at module level (or be a functools.partial of one) so that they can be pickled too.
+'''
+import os
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import partial
+from logging import getLogger
+
+from . import Report
+from .bokeh_report_renderer import BokehReportRenderer
+
+logger = getLogger(__name__)
+
+# Headless Bokeh renders by default
+DEFAULT_RENDERER_FACTORY = partial(BokehReportRenderer, open_browser=False)
+
+
+class BatchResult:
+    def __init__(self, position, report_name=None, output_path=None, seconds=None, error=None, worker_pid=None):
+        '''
+        :param position: Position of the report in the batch
+        :param report_name: Name of the report, if it could be built
+        :param output_path: What the renderer's render() returned, e.g. the path of report.html
+        :param seconds: Time spent building and rendering the report in the worker
+        :param error: Formatted traceback if the report failed, otherwise None
+        :param worker_pid: Process id of the worker that rendered the report
+        '''
+        self.position = position
+        self.report_name = report_name
+        self.output_path = output_path
+        self.seconds = seconds
+        self.error = error
+        self.worker_pid = worker_pid
+
+    @property
+    def succeeded(self):
+        return self.error is None
+
+    def __repr__(self):
+        status = 'ok' if self.succeeded else 'failed'
+        return f'BatchResult({self.position}, {self.report_name!r}, {status}, {self.seconds})'
+
+
+def warm_up():
+    ''' Import the heavy modules once per worker, so that only the first report of each worker pays for them. '''
+    from . import plotutils  # noqa: F401
+    import bokeh.plotting  # noqa: F401
+    import pandas  # noqa: F401
+    from . import email_renderer  # noqa: F401
+
+
+def render_one(position, report_or_factory, renderer_factory, output_dir):
+    ''' Build and render one report; runs in a worker. Errors are returned rather than raised. '''
+    start = time.perf_counter()
+    report_name = None
+    try:
+        report = report_or_factory if isinstance(report_or_factory, Report) else report_or_factory()
+        report_name = report.get_name()
+        output_path = renderer_factory().render(report, output_dir=output_dir)
+        return BatchResult(position, report_name, output_path, time.perf_counter() - start, worker_pid=os.getpid())
+    except Exception:
+        return BatchResult(position, report_name, seconds=time.perf_counter() - start, error=traceback.format_exc(),
+                           worker_pid=os.getpid())
+
+
+def render_batch(reports, output_dir='./report', renderer_factory=DEFAULT_RENDERER_FACTORY, max_workers=None):
+    '''
+    Render reports in a process pool. One failing report does not stop the others.
+
+    :param reports: Reports, or functions without arguments that return a Report
+    :param output_dir: Passed to every render()
+    :param renderer_factory: Called without arguments in the worker to create the renderer of each report. The default
+        is a BokehReportRenderer that does not open a browser.
+    :param max_workers: Number of worker processes; the number of CPUs if None
+    :return: A BatchResult per report, in the order of reports
+    '''
+    reports = list(reports)
+    results = [None] * len(reports)
+    with ProcessPoolExecutor(max_workers, initializer=warm_up) as executor:
+        futures = {
+            executor.submit(render_one, position, report, renderer_factory, output_dir): position
+            for position, report in enumerate(reports)
+        }
+        for future in as_completed(futures):
+            position = futures[future]
+            try:
+                result = future.result()
+            except Exception:
+                # The worker died or the report could not be pickled
+                result = BatchResult(position, error=traceback.format_exc())
+            results[position] = result
+
+            if result.succeeded:
+                logger.info(f'Rendered {result.report_name} in {result.seconds:.1f}s: {result.output_path}')
+            else:
+                logger.error(f'Failed to render report {position} ({result.report_name}):\n{result.error}')
+
+    failures = sum(not result.succeeded for result in results)
+    logger.info(f'Rendered {len(results) - failures} of {len(results)} reports; {failures} failed')
+    return results
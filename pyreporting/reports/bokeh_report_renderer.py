@@ -1,6 +1,9 @@
+import os
 from os import path
 from pathlib import Path
 from logging import getLogger
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from threading import Lock
 import time
 import pandas as pd
 
@@ -8,73 +11,307 @@ from bokeh.layouts import column
 from bokeh.models import ColumnDataSource
 from bokeh.models.widgets import DataTable, TableColumn, Div
 from bokeh.palettes import Spectral6
-from bokeh.plotting import figure, show, output_file
+from bokeh.plotting import figure, show, save, output_file
+from bokeh.core.properties import value
+from bokeh.util.browser import view
 
 from pyreporting.widgets import HeatmapWidget, InteractiveTableWidget, InteractivePlotWidget, TableExplorerWidget
+from pyreporting.widgets.columnar import encode_data_frame, encode_traces
+from pyreporting.widgets.bundle import BundleResources, build_widget_bundle, referenced_widget_bundle
 from . import Report
-from .plotutils import generate_stacked_bar_plot_figure
+from .plotutils import save_stacked_bar_plot_figure
+from .image_pipeline import ImageOptions, ImageDeduplicator, figure_key
+from .dispatch import HandlerRegistry
+from .paging import first_page, pages_path, write_pages
+from .heatmap_tiles import DEFAULT_COLORS, embedded_levels, encode_heatmap, tiles_path, write_levels
+from .table_summary import summarize_table
+from .downsampling import downsample_item, downsample_selections
+from .render_cache import RenderCache, hash_item_data
+from .incremental import IncrementalRun
+from .fileutils import make_run_directory, share_file
+from .instrumentation import Instrumentation, DATA_LOAD, TRANSFORM, FIGURE_BUILD, RASTERIZE, FILE_COPY, SERIALIZE, \
+    file_size
 
 import numpy as np
 
 from . import ReportTableItem, ReportImageItem, ReportLineGraphItem, ReportFileItem, ReportGraphItem,\
-    ReportHeatmapItem, ReportInteractiveTableItem, ReportInteractivePlotItem, ReportTableExplorerItem
+    ReportHeatmapItem, ReportInteractiveTableItem, ReportInteractivePlotItem, ReportTableExplorerItem, ReportDataItem
 
 
 logger = getLogger(__name__)
 
+# Directory under output_dir for files shared by all reports rendered there
+ASSETS_DIR_NAME = '_assets'
+
 
 class BokehReportRenderer:
 
-    def render(self, report: Report, output_dir='./report'):
+    # Item type -> handler(renderer, item, unique_id, report_path, files_path) returning the Bokeh model of the item, or
+    # None. Set below the class; see `pyreporting.reports.dispatch`.
+    handlers: HandlerRegistry = None
+
+    def __init__(self, max_workers=None, columnar=False, cache: RenderCache = None, hooks=(), open_browser=True,
+                 incremental=False, image_options: ImageOptions = None, prebuilt_widgets=False, widget_cache_dir=None):
+        '''
+        :param max_workers: If set, render in parallel: matplotlib figures are rasterized in a process pool and files
+            are copied in a thread pool, each using up to this many workers. Items keep their order in the layout.
+        :param columnar: Ship the data of the React widgets as per-column typed arrays (see
+            `pyreporting.widgets.columnar`) instead of one JSON value per cell. Much smaller for large frames.
+            Interactive plots always are.
+        :param cache: If set, reuse PNGs and widget payloads of items whose data and options did not change.
+        :param hooks: RenderHooks notified of every item and phase of the render (see
+            `pyreporting.reports.instrumentation`)
+        :param open_browser: Open the rendered report in a browser. Set to False on headless machines to only write
+            the file.
+        :param incremental: Reuse the PNGs, attachments, table pages and heatmap tiles of items that did not change
+            since the previous run of the same report, and write a manifest of what was reused (see
+            `pyreporting.reports.incremental`).
+        :param image_options: DPI, size and format of the matplotlib charts, and whether identical charts and files are
+            written once (see `pyreporting.reports.image_pipeline`). Full size PNGs if None.
+        :param prebuilt_widgets: Load the widgets from a prebuilt bundle, shared by all reports in output_dir/_assets,
+            instead of compiling them with Node.js in every process and inlining them into every report (see
+            `pyreporting.widgets.bundle`).
+        :param widget_cache_dir: Where prebuilt bundles are cached; see `pyreporting.widgets.bundle.DEFAULT_CACHE_DIR`
+        '''
+        self.max_workers = max_workers
+        self.columnar = columnar
+        self.cache = cache
+        self.instrumentation = Instrumentation(hooks)
+        self.open_browser = open_browser
+        self.incremental = incremental
+        self.image_options = image_options or ImageOptions()
+        self.prebuilt_widgets = prebuilt_widgets
+        self.widget_cache_dir = widget_cache_dir
+
+        # Handlers registered on this renderer do not change other renderers
+        self.handlers = type(self).handlers.copy()
+
+        # unique_id -> Future for work submitted ahead of building the layout (parallel mode only)
+        self._pending = {}
+
+        # (unique_id, options) -> render cache key, for the current render
+        self._cache_keys = {}
+
+        # Previous run and new manifest of the current render (incremental mode only)
+        self._incremental_run = None
+
+        # First file of every chart and file content in the current render
+        self._images = ImageDeduplicator.for_options(self.image_options)
 
+    def render(self, report: Report, output_dir='./report'):
+        '''
+        :return: Path of the rendered report.html
+        '''
+        with self.instrumentation.report(report, 'bokeh') as context:
+            html_path = self.render_report(report, output_dir)
+            context['output_path'] = html_path.parent
+        return html_path
+
+    def render_report(self, report: Report, output_dir):
         # Get a unique name for this report
         report_name = report.get_name()
 
         run_string = time.strftime('%Y%m%d_%H%M%S')
 
         # Create a sequence of sub-paths to make unique reports by name and time run.
-        path = Path('.') / output_dir / report_name / run_string
+        path = make_run_directory(Path('.') / output_dir / report_name, run_string)
 
         files_path = path / 'Files'
 
-        if not path.exists():
-            path.mkdir(parents=True)
-        assert path.exists(), f"Couldn't create directory {path}"
-
         files_path.mkdir(parents=True)
 
         assert files_path.exists(), f"Couldn't create directory {path}"
 
+        keyed_items = report.get_uniquely_keyed_items()
+        self._cache_keys = {}
+        self._incremental_run = None
+        if self.incremental:
+            self._incremental_run = IncrementalRun(path, report, 'bokeh', self.image_options.cache_options())
+        self._images = ImageDeduplicator.for_options(self.image_options)
+        if self.max_workers:
+            with ProcessPoolExecutor(self.max_workers) as process_pool, \
+                    ThreadPoolExecutor(self.max_workers) as thread_pool:
+                try:
+                    self._pending = self.submit_offloaded_work(keyed_items, path, files_path, process_pool, thread_pool)
+                    plots = self.make_plots(keyed_items, path, files_path)
+                finally:
+                    self._pending = {}
+        else:
+            plots = self.make_plots(keyed_items, path, files_path)
+
+        if self._incremental_run is not None:
+            self._incremental_run.save()
+            self._incremental_run = None
+
+        html_path = path / "report.html"
+        with self.instrumentation.phase(SERIALIZE) as phase:
+            title = f'{report.get_name()} (Local Report Render)'
+            if self.prebuilt_widgets:
+                self.save_with_widget_bundle(column(*plots), html_path, title, output_dir)
+            else:
+                output_file(html_path, title=title)
+                if self.open_browser:
+                    show(column(*plots))  # open a browser
+                else:
+                    save(column(*plots))
+            phase.bytes_written = file_size(html_path)
+        return html_path
+
+    def save_with_widget_bundle(self, layout, html_path: Path, title, output_dir):
+        ''' Save layout to html_path, loading the widgets from the bundle in output_dir/_assets. '''
+        bundle_path = build_widget_bundle(self.widget_cache_dir)
+        asset_path = Path(output_dir) / ASSETS_DIR_NAME / bundle_path.name
+        asset_path.parent.mkdir(parents=True, exist_ok=True)
+        share_file(bundle_path, asset_path)
+
+        # Relative, so that output_dir can be moved or served as a whole
+        bundle_url = Path(os.path.relpath(asset_path, html_path.parent)).as_posix()
+        with referenced_widget_bundle():
+            save(layout, filename=html_path, resources=BundleResources([bundle_url], mode='cdn'), title=title)
+        if self.open_browser:
+            view(str(html_path))
+
+    def make_plots(self, keyed_items, report_path, files_path):
+        ''' Build the list of Bokeh models for the layout, in item order. '''
         plots = []
-        for unique_id, item in report.get_uniquely_keyed_items():
-
-            plots.append(self.make_div(f'<h2>{item.name}</h2><br>'))
-
-            if isinstance(item, ReportLineGraphItem):
-                plots.append(self.make_plot_from_line_graph_item(item))
-            elif isinstance(item, ReportTableExplorerItem):
-                plots.append(self.make_table_explorer_item(item))
-            elif isinstance(item, ReportHeatmapItem):
-                plots.append(self.make_heatmap_item(item))
-            elif isinstance(item, ReportInteractiveTableItem):
-                plots.append(self.make_interactive_table_item(item))
-            elif isinstance(item, ReportInteractivePlotItem):
-                plots.append(self.make_interactive_plot_item(item))
-            elif isinstance(item, ReportTableItem):
-                plots.append(self.make_table_item(item))
-            elif isinstance(item, ReportImageItem):
-                plots.append(self.make_image_item(item, unique_id, files_path))
-            elif isinstance(item, ReportFileItem):
-                plots.append(self.make_file_item(item, unique_id, files_path))  # TODO: Not the best unique ID
-            elif isinstance(item, ReportGraphItem):
-                plots.append(self.make_plot_from_graph_item(item, unique_id, path))
-
-            # Add a description for every item.
-            if item.description and len(item.description) > 0:
-                plots.append(self.make_div(f'Description:<br>{item.description}<hr width=100%>'))
-
-        output_file(path / "report.html", title=f'{report.get_name()} (Local Report Render)')
-        show(column(*plots))  # open a browser
+        for unique_id, item in keyed_items:
+            with self.instrumentation.item(unique_id, item):
+                self.make_item_plots(plots, unique_id, item, report_path, files_path)
+        return plots
+
+    def make_item_plots(self, plots, unique_id, item, report_path, files_path):
+        ''' Append the Bokeh models of one item to plots. '''
+        plots.append(self.make_div(f'<h2>{item.name}</h2><br>'))
+
+        plot = self.handlers.resolve(type(item))(self, item, unique_id, report_path, files_path)
+        if plot is not None:
+            plots.append(plot)
+
+        # Add a description for every item.
+        if item.description and len(item.description) > 0:
+            plots.append(self.make_div(f'Description:<br>{item.description}<hr width=100%>'))
+
+        self.record_files(unique_id, item)
+
+        # The Bokeh models hold copies of what they need, so file-backed data can be freed before the next item.
+        release_item_data(item)
+
+    def submit_offloaded_work(self, keyed_items, report_path, files_path, process_pool, thread_pool):
+        '''
+        Submit the slow, independent parts of rendering (matplotlib rasterization and file copies) to the pools.
+
+        :return: dict of unique_id -> Future. Output file names only depend on the unique_id, so the result is the same
+            as a serial render.
+        '''
+        pending = {}
+
+        # The same item can be added more than once; its copies share a file handle, so they must not overlap.
+        file_locks = {}
+
+        for unique_id, item in keyed_items:
+            stacked = isinstance(item, ReportGraphItem) and item.get_output_type() is ReportGraphItem.STACKED
+            if stacked:
+                # Claimed in item order, even if it is reused or cached, so later items of the same chart link to it
+                filename = self.image_path(report_path, unique_id)
+                if self.claim_figure(item, filename) != filename:
+                    # The same chart is saved for an earlier item
+                    continue
+            if self._incremental_run is not None and self._incremental_run.can_reuse(unique_id, item):
+                continue
+            if isinstance(item, ReportFileItem):
+                lock = file_locks.setdefault(id(item), Lock())
+                pending[unique_id] = thread_pool.submit(copy_file_item, lock, item, unique_id, files_path)
+            elif stacked:
+                key = self.image_cache_key(unique_id, item)
+                if key is not None and self.cache.contains(key):
+                    continue
+                pending[unique_id] = process_pool.submit(
+                    save_stacked_bar_plot_figure,
+                    item.as_data_frame(),
+                    filename=filename,
+                    title=item.get_name(),
+                    y_label='Value',
+                    image_options=self.image_options,
+                )
+                # The data was pickled for the worker, so file-backed data does not need to stay loaded.
+                release_item_data(item)
+        return pending
+
+    def cache_key(self, unique_id, item, **options):
+        ''' Render cache key of an item, or None without a cache. Computed once per item and render. '''
+        if self.cache is None or unique_id is None:
+            return None
+        memo_key = (unique_id, tuple(sorted(options.items())))
+        if memo_key not in self._cache_keys:
+            self._cache_keys[memo_key] = self.cache.make_key(unique_id, item, 'bokeh', name=item.get_name(), **options)
+        return self._cache_keys[memo_key]
+
+    def image_cache_key(self, unique_id, item):
+        return self.cache_key(unique_id, item, **self.image_options.cache_options())
+
+    def image_path(self, dest_path, unique_id):
+        return path.join(Path(dest_path).resolve(), f'{unique_id}{self.image_options.extension}')
+
+    def claim_figure(self, item, filename):
+        '''
+        The path the stacked bar chart of item is saved to: filename, or that of the same chart of an earlier item.
+        '''
+        if not self._images.enabled:
+            return filename
+        key = figure_key(save_stacked_bar_plot_figure, hash_item_data(item), title=item.get_name(), y_label='Value')
+        return self._images.claim_figure(key, filename)
+
+    def encode_payload(self, unique_id, item, df, index=True):
+        ''' Columnar widget payload of df, from the render cache when possible. '''
+        with self.instrumentation.phase(SERIALIZE):
+            key = self.cache_key(unique_id, item, payload='columnar', rows=len(df), index=index)
+            if key is None:
+                return encode_data_frame(df, index=index)
+            return self.cache.json(key, lambda: encode_data_frame(df, index=index))
+
+    def load_data(self, item):
+        ''' The item's DataFrame, read from its data source if it was not loaded yet. '''
+        with self.instrumentation.phase(DATA_LOAD):
+            return item.as_data_frame()
+
+    def reuse_files(self, unique_id, item):
+        ''' In incremental mode, the files of an unchanged item linked from the previous run. None otherwise. '''
+        if self._incremental_run is None:
+            return None
+        with self.instrumentation.phase(FILE_COPY):
+            return self._incremental_run.reuse(unique_id, item)
+
+    def record_files(self, unique_id, item, files=(), metadata=None):
+        ''' Record the files rendered for an item in the manifest of an incremental render. '''
+        if self._incremental_run is not None:
+            self._incremental_run.record(unique_id, item, files, metadata=metadata)
+
+    def run_or_collect(self, unique_id, func):
+        '''
+        Return the result of the work submitted for unique_id, or run it inline if nothing was submitted.
+
+        :param func: Called without arguments, and only when nothing was submitted, so it can defer loading data.
+        '''
+        future = self._pending.get(unique_id)
+        if future is None:
+            return func()
+        return future.result()
+
+    def copy_file(self, item: ReportFileItem, unique_id, dest_path):
+        ''' Copy the file of an item to dest_path, or link it from the previous run if it did not change. '''
+        reused_files = self.reuse_files(unique_id, item)
+        if reused_files is not None:
+            return reused_files[0]
+
+        with self.instrumentation.phase(FILE_COPY) as phase:
+            copied_path = self.run_or_collect(unique_id, lambda: item.copy_to(dest_path, filename=unique_id))
+            phase.bytes_written = file_size(copied_path)
+        # With ImageOptions.dedupe_files, a file with the same contents as an earlier one is removed, and the earlier
+        # one linked instead.
+        file_path = Path(self._images.dedupe_file(copied_path))
+        if file_path == copied_path:
+            self.record_files(unique_id, item, [file_path])
+        return file_path
 
     @staticmethod
     def make_div(text):
@@ -83,16 +320,21 @@ class BokehReportRenderer:
 
     def make_image_item(self, item: ReportImageItem, unique_id, dest_path):
         plot = figure(x_range=(0, 1), y_range=(0, 1))
-        file_path = item.copy_to(dest_path, filename=unique_id)
+        file_path = self.copy_file(item, unique_id, dest_path)
         return self.make_div(f'<img src="file://{file_path.resolve()}" alt="{item.name}">')
 
     def make_file_item(self, item: ReportFileItem, unique_id, dest_path):
-        file_path = item.copy_to(dest_path, filename=unique_id)
+        file_path = self.copy_file(item, unique_id, dest_path)
         return self.make_div(f"<a href='file://{file_path.resolve()}'>{item.name}</a><br>")
 
     def make_plot_from_line_graph_item(self, line_graph_item: ReportLineGraphItem):
-        df = line_graph_item.as_data_frame()
-        return self.make_plot_from_dataframe(df, line_graph_item.get_name())
+        if not line_graph_item.can_stream():
+            self.load_data(line_graph_item)
+        # Streaming items are read while they are downsampled.
+        with self.instrumentation.phase(TRANSFORM):
+            df = downsample_item(line_graph_item)
+        with self.instrumentation.phase(FIGURE_BUILD):
+            return self.make_plot_from_dataframe(df, line_graph_item.get_name())
 
     def make_plot_from_graph_item(self, item, unique_id, dest_path):
         output_type = item.get_output_type()
@@ -100,21 +342,34 @@ class BokehReportRenderer:
             p = self.make_plot_from_line_graph_item(item)
         elif output_type is ReportGraphItem.STACKED:
             # TODO: consider http://bokeh.pydata.org/en/latest/docs/gallery/bar_stacked.html
-            fig = generate_stacked_bar_plot_figure(
-                item.as_data_frame(),
-                title=item.get_name(),
-                y_label='Value'
-            )
-            filename = path.join(Path(dest_path).resolve(), f'{unique_id}.png')
-            fig.savefig(filename, bbox_inches='tight')
+            own_filename = self.image_path(dest_path, unique_id)
+            # Claimed before the chart is reused, restored or drawn, so later items of the same chart link to it in
+            # every case. Claiming again what submit_offloaded_work() claimed returns the same path.
+            filename = self.claim_figure(item, own_filename)
+            if filename == own_filename and self.reuse_files(unique_id, item) is None:
+                key = self.image_cache_key(unique_id, item)
+                if key is None or not self.cache.restore(key, filename):
+                    with self.instrumentation.phase(RASTERIZE) as phase:
+                        self.run_or_collect(unique_id, lambda: save_stacked_bar_plot_figure(
+                            self.load_data(item),
+                            filename=filename,
+                            title=item.get_name(),
+                            y_label='Value',
+                            image_options=self.image_options,
+                        ))
+                        phase.bytes_written = file_size(filename)
+                    if key is not None:
+                        self.cache.store(key, filename)
+                self.record_files(unique_id, item, [filename])
             p = self.make_div(f'<img src="file://{filename}" alt="{item.get_name()}">')
         else:
             raise NotImplementedError(f'Unexpected output type: {output_type}')
         return p
 
     def make_table_item(self, table_item: ReportTableItem):
-        df = table_item.as_data_frame()
-        return self.make_table_from_dataframe(df)
+        df = self.load_data(table_item)
+        with self.instrumentation.phase(FIGURE_BUILD):
+            return self.make_table_from_dataframe(df)
 
     @staticmethod
     def make_plot_from_dataframe(df: pd.DataFrame, name='DataFrame'):
@@ -123,13 +378,17 @@ class BokehReportRenderer:
         p1.xaxis.axis_label = df.index.name
         p1.yaxis.axis_label = 'VALUE'
 
-        def datetime(x):
-            return np.array(pd.to_datetime(x, infer_datetime_format=True), dtype=np.datetime64)
+        # One source for all lines, so the x values are parsed once and serialized once. Columns get generated field
+        # names, since the frame's column names need not be strings or differ from 'x'.
+        data = {'x': datetime_values(df.index)}
+        for index, col in enumerate(df.columns):
+            data[f'y{index}'] = df.iloc[:, index].values
+        source = ColumnDataSource(data)
 
         palette = Spectral6
         for index, col in enumerate(df.columns):
             color = palette[index % len(palette)]
-            p1.line(datetime(df.index.values), df[col], line_color=color, legend=col)
+            p1.line('x', f'y{index}', source=source, line_color=color, legend=value(str(col)))
         p1.legend.location = "top_left"
         return p1
 
@@ -143,12 +402,43 @@ class BokehReportRenderer:
         data_table = DataTable(source=source, columns=columns, width=400, height=280)
         return data_table
 
-    @staticmethod
-    def make_heatmap_item(item: ReportHeatmapItem):
+    def encode_heatmap_payload(self, unique_id, item, df, colors, levels):
+        ''' Quantized heatmap payload of df, from the render cache when possible. '''
+        with self.instrumentation.phase(SERIALIZE):
+            key = self.cache_key(unique_id, item, payload='heatmap', rows=len(df), colors=colors, levels=levels)
+            if key is None:
+                return encode_heatmap(df, colors=colors, levels=levels)
+            return self.cache.json(key, lambda: encode_heatmap(df, colors=colors, levels=levels))
+
+    def make_heatmap_item(self, item: ReportHeatmapItem, unique_id=None, report_path=None):
         id_base = 'heatmap-react-div'
 
         # get pandas DataFrame of heatmap data
-        df = item.as_data_frame()
+        df = self.load_data(item)
+        levels = getattr(item, 'levels', False)
+        colors = getattr(item, 'colors', None) or (DEFAULT_COLORS if levels else None)
+        if colors:
+            payload = self.encode_heatmap_payload(unique_id, item, df, colors, levels)
+            if levels and report_path is not None:
+                if self.reuse_files(unique_id, item) is not None:
+                    payload = embedded_levels(payload, unique_id)
+                else:
+                    with self.instrumentation.phase(TRANSFORM):
+                        payload = write_levels(payload, report_path, unique_id)
+                    if 'tiles' in payload:
+                        self.record_files(unique_id, item, [tiles_path(report_path, unique_id)])
+            return HeatmapWidget(
+                quantized_data=payload,
+                title=item.name,
+                element_id=f'{id_base}-{item.name}',
+            )
+        if self.columnar:
+            return HeatmapWidget(
+                columnar_data=self.encode_payload(unique_id, item, df),
+                title=item.name,
+                element_id=f'{id_base}-{item.name}',
+            )
+
         headers = ['date'] + list(df.columns)
 
         # Create a list of lists with headers as the first row and data as every other row, example:
@@ -157,8 +447,9 @@ class BokehReportRenderer:
         #     ['2017-01-01', 1.2, 3.3],
         #     ['2017-01-11', 1.8, 3.7],
         # ]
-        data: list = df.to_records().tolist()
-        data.insert(0, headers)
+        with self.instrumentation.phase(TRANSFORM):
+            data: list = df.to_records().tolist()
+            data.insert(0, headers)
 
         return HeatmapWidget(
             data=data,
@@ -166,16 +457,31 @@ class BokehReportRenderer:
             element_id=f'{id_base}-{item.name}',
         )
 
-    @staticmethod
-    def make_interactive_table_item(item: ReportTableItem):
+    def make_interactive_table_item(self, item: ReportTableItem, unique_id=None, report_path=None):
         id_base = 'interactive-table-react-div'
 
-        # get pandas DataFrame of heatmap data
-        df = item.as_data_frame()
+        # Paged tables only embed their first page; the rest is loaded from files next to report.html.
+        paging = None
+        if getattr(item, 'page_size', None) and report_path is not None:
+            df, paging = self.write_table_pages(unique_id, item, report_path)
+        else:
+            # get pandas DataFrame of heatmap data
+            df = self.load_data(item)
         headers = list(df.columns)
 
+        if self.columnar or paging:
+            return InteractiveTableWidget(
+                headers=headers,
+                columnar_data=self.encode_payload(unique_id, item, df, index=False),
+                paging=paging,
+                title=item.name,
+                width=1200,
+                element_id=f'{id_base}-{item.name}',
+            )
+
         # Sample: [{'col1': 'row1_value1', 'col2': 'row1_value2'}, {'col1': 'row2_value1', 'col2': 'row2_value2'}]
-        data: list = df.to_dict('records')
+        with self.instrumentation.phase(TRANSFORM):
+            data: list = df.to_dict('records')
 
         return InteractiveTableWidget(
             headers=headers,
@@ -185,12 +491,61 @@ class BokehReportRenderer:
             element_id=f'{id_base}-{item.name}',
         )
 
-    @staticmethod
-    def make_table_explorer_item(item: ReportTableItem):
+    def write_table_pages(self, unique_id, item: ReportTableItem, report_path):
+        '''
+        Write the pages of a paged table, or link them from the previous run if the table did not change.
+
+        :return: (first page DataFrame, paging metadata for the widget)
+        '''
+        if self.reuse_files(unique_id, item) is not None:
+            with self.instrumentation.phase(TRANSFORM):
+                rows = item.iter_chunks() if item.can_stream() else item.as_data_frame()
+                return first_page(rows, item.page_size), self._incremental_run.metadata(unique_id)
+
+        with self.instrumentation.phase(TRANSFORM):
+            df, paging = write_pages(table_rows(item), report_path, unique_id, page_size=item.page_size,
+                                     sort_columns=item.sort_columns)
+        self.record_files(unique_id, item, [pages_path(report_path, unique_id)], metadata=paging)
+        return df, paging
+
+    def encode_table_summary(self, unique_id, item):
+        ''' Summary of the whole table of item, from the render cache when possible. '''
+        options = dict(bins=item.bins, row_bins=item.row_bins, pca=item.pca)
+        with self.instrumentation.phase(SERIALIZE):
+            key = self.cache_key(unique_id, item, payload='summary', **options)
+            if key is None:
+                return summarize_table(self.load_data(item), **options)
+            return self.cache.json(key, lambda: summarize_table(self.load_data(item), **options))
+
+    def make_table_explorer_item(self, item: ReportTableItem, unique_id=None, report_path=None):
         id_base = 'table-explorer-react-div'
 
-        # get pandas DataFrame of heatmap data
-        df = item.as_data_frame()
+        summary = self.encode_table_summary(unique_id, item) if getattr(item, 'summary', False) else None
+        if not getattr(item, 'include_rows', True):
+            return TableExplorerWidget(
+                summary=summary,
+                title=item.name,
+                width=1200,
+                element_id=f'{id_base}-{item.name}',
+            )
+
+        paging = None
+        if getattr(item, 'page_size', None) and report_path is not None:
+            df, paging = self.write_table_pages(unique_id, item, report_path)
+        else:
+            # get pandas DataFrame of heatmap data
+            df = self.load_data(item)
+
+        if self.columnar or paging:
+            return TableExplorerWidget(
+                columnar_data=self.encode_payload(unique_id, item, df, index=False),
+                paging=paging,
+                summary=summary,
+                title=item.name,
+                width=1200,
+                element_id=f'{id_base}-{item.name}',
+            )
+
         headers = list(df.columns)
 
         # Sample: [
@@ -198,23 +553,91 @@ class BokehReportRenderer:
         #   [11, 21, 31],
         #   [12, 22, 32],
         # ]
-        data: list = df.to_records(index=False).tolist()
-        data.insert(0, headers)
+        with self.instrumentation.phase(TRANSFORM):
+            data: list = df.to_records(index=False).tolist()
+            data.insert(0, headers)
 
         return TableExplorerWidget(
             data=data,
+            summary=summary,
             title=item.name,
             width=1200,
             element_id=f'{id_base}-{item.name}',
         )
 
-    @staticmethod
-    def make_interactive_plot_item(item: ReportInteractivePlotItem):
+    def encode_trace_payload(self, unique_id, item, df):
+        ''' Typed traces of df, downsampled per trace if the item asks for it, from the render cache when possible. '''
+        max_points = getattr(item, 'max_points', None)
+        downsample = getattr(item, 'downsample', None)
+        float32 = getattr(item, 'float32', False)
+
+        def encode():
+            selections = downsample_selections(df, max_points=max_points, method=downsample)
+            return encode_traces(df, float32=float32, selections=selections)
+
+        with self.instrumentation.phase(SERIALIZE):
+            key = self.cache_key(unique_id, item, payload='traces', rows=len(df), max_points=max_points,
+                                 downsample=downsample, float32=float32)
+            if key is None:
+                return encode()
+            return self.cache.json(key, encode)
+
+    def make_interactive_plot_item(self, item: ReportInteractivePlotItem, unique_id=None):
         id_base = 'interactive-plot-react-div'
 
+        # The index is the shared x-axis and every column is the y of one trace, shipped as typed arrays.
         return InteractivePlotWidget(
-            traces=item.item_as_traces(),
+            trace_data=self.encode_trace_payload(unique_id, item, self.load_data(item)),
             title=item.name,
             width=1200,
             element_id=f'{id_base}-{item.name}',
         )
+
+
+BokehReportRenderer.handlers = HandlerRegistry({
+    ReportLineGraphItem: lambda renderer, item, unique_id, report_path, files_path:
+        renderer.make_plot_from_line_graph_item(item),
+    ReportTableExplorerItem: lambda renderer, item, unique_id, report_path, files_path:
+        renderer.make_table_explorer_item(item, unique_id, report_path),
+    ReportHeatmapItem: lambda renderer, item, unique_id, report_path, files_path:
+        renderer.make_heatmap_item(item, unique_id, report_path),
+    ReportInteractiveTableItem: lambda renderer, item, unique_id, report_path, files_path:
+        renderer.make_interactive_table_item(item, unique_id, report_path),
+    ReportInteractivePlotItem: lambda renderer, item, unique_id, report_path, files_path:
+        renderer.make_interactive_plot_item(item, unique_id),
+    ReportTableItem: lambda renderer, item, unique_id, report_path, files_path:
+        renderer.make_table_item(item),
+    ReportImageItem: lambda renderer, item, unique_id, report_path, files_path:
+        renderer.make_image_item(item, unique_id, files_path),
+    # TODO: Not the best unique ID
+    ReportFileItem: lambda renderer, item, unique_id, report_path, files_path:
+        renderer.make_file_item(item, unique_id, files_path),
+    ReportGraphItem: lambda renderer, item, unique_id, report_path, files_path:
+        renderer.make_plot_from_graph_item(item, unique_id, report_path),
+}, fallback=lambda renderer, item, unique_id, report_path, files_path: None)  # Other items only get their name
+
+
+def copy_file_item(lock, item: ReportFileItem, unique_id, dest_path):
+    ''' Copy a file item under its lock; used from the thread pool in parallel mode. '''
+    with lock:
+        return item.copy_to(dest_path, filename=unique_id)
+
+
+def datetime_values(index: pd.Index) -> np.ndarray:
+    ''' The values of an index as datetime64, e.g. of dates read as strings from a CSV. Parsed once per index. '''
+    if isinstance(index, pd.DatetimeIndex):
+        return index.values
+    return pd.to_datetime(index).values
+
+
+def release_item_data(item):
+    ''' Free the loaded data of a file-backed item once nothing else needs it. '''
+    if isinstance(item, ReportDataItem):
+        item.release_data()
+
+
+def table_rows(item: ReportTableItem):
+    ''' The rows to page: streamed in chunks, unless they have to be sorted, which needs the whole table. '''
+    if item.sort_columns or not item.can_stream():
+        return item.as_data_frame()
+    return item.iter_chunks()
@@ -0,0 +1,303 @@
+'''
+Data sources behind the DataFrame-backed report items.
+
+An item holds a DataSource instead of a DataFrame so that file-backed data is only read when a renderer needs it, can
+be streamed in chunks by renderers that support it, and can be released once the item has been rendered. Render cache
+keys and incremental fingerprints use DataSource.fingerprint(), which does not read file-backed data either.
+'''
+import hashlib
+import json
+from abc import ABC, abstractmethod
+from os import PathLike
+from pathlib import Path
+
+import pandas as pd
+
+from .render_cache import hash_data_frame
+
+DEFAULT_CHUNK_SIZE = 100000
+
+
+def import_pyarrow():
+    ''' pyarrow is only needed for the Parquet, Feather and Arrow sources, so it is imported when one is used. '''
+    try:
+        import pyarrow
+        import pyarrow.compute
+        import pyarrow.dataset
+        import pyarrow.feather
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ImportError('Parquet, Feather and Arrow inputs need pyarrow: pip install pyreporting[arrow]') from e
+    return pyarrow
+
+
+def file_fingerprint(path, *options) -> str:
+    '''
+    Identity of a file, or of every file under a directory, read with options: their paths, sizes and modification
+    times. The files are not read.
+    '''
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(json.dumps(options, sort_keys=True, default=str).encode())
+    path = Path(path)
+    file_paths = sorted(file_path for file_path in path.rglob('*') if file_path.is_file()) if path.is_dir() else [path]
+    for file_path in file_paths:
+        stat = file_path.stat()
+        digest.update(f'{file_path.resolve()}\0{stat.st_size}\0{stat.st_mtime_ns}\0'.encode())
+    return digest.hexdigest()
+
+
+class DataSource(ABC):
+    # If iter_chunks() can read the data piece by piece without loading all of it.
+    streams = False
+
+    def __init__(self):
+        self._data_frame = None
+
+    @abstractmethod
+    def read(self) -> pd.DataFrame:
+        ''' Read all of the data. '''
+
+    def load(self) -> pd.DataFrame:
+        ''' The data as a DataFrame. Read on first use and kept until release(). '''
+        if self._data_frame is None:
+            self._data_frame = self.read()
+        return self._data_frame
+
+    @property
+    def loaded(self):
+        return self._data_frame is not None
+
+    def iter_chunks(self, chunksize=DEFAULT_CHUNK_SIZE):
+        ''' Yield the data as consecutive DataFrames of at most chunksize rows. '''
+        data_frame = self.load()
+        for start in range(0, len(data_frame), chunksize):
+            yield data_frame.iloc[start:start + chunksize]
+
+    def release(self):
+        ''' Drop the loaded data; it is read again on the next load(). '''
+        self._data_frame = None
+
+    def fingerprint(self) -> str:
+        ''' Changes whenever the data changes, for cache keys. Hashes the loaded data unless a subclass knows more. '''
+        return hash_data_frame(self.load())
+
+
+class FrameDataSource(DataSource):
+    ''' An in-memory DataFrame. The caller owns it, so it is never released. '''
+    def __init__(self, data_frame: pd.DataFrame):
+        super(FrameDataSource, self).__init__()
+        self._data_frame = data_frame
+
+    def read(self):
+        return self._data_frame
+
+    def release(self):
+        pass
+
+
+class CsvDataSource(DataSource):
+    streams = True
+
+    def __init__(self, path, **read_csv_kwargs):
+        '''
+        :param path: Path of the CSV file
+        :param read_csv_kwargs: Passed to pandas.read_csv
+        '''
+        super(CsvDataSource, self).__init__()
+        self.path = path
+        self.read_csv_kwargs = read_csv_kwargs
+
+    def read(self):
+        return pd.read_csv(self.path, **self.read_csv_kwargs)
+
+    def fingerprint(self):
+        return file_fingerprint(self.path, type(self).__name__, self.read_csv_kwargs)
+
+    def iter_chunks(self, chunksize=DEFAULT_CHUNK_SIZE):
+        if self.loaded:
+            yield from super(CsvDataSource, self).iter_chunks(chunksize)
+            return
+        with pd.read_csv(self.path, chunksize=chunksize, **self.read_csv_kwargs) as reader:
+            yield from reader
+
+
+class ArrowDataSource(DataSource):
+    '''
+    Base of the pyarrow-backed sources. Columns and rows are selected on the Arrow data, so only what was selected is
+    ever converted to pandas.
+    '''
+    streams = True
+
+    def __init__(self, columns=None, filters=None, index_col=None):
+        '''
+        :param columns: Columns to read; all of them if None. The columns of a pandas index are always read.
+        :param filters: Row filter, as a pyarrow.compute.Expression or in the list form of pyarrow.parquet.read_table,
+            e.g. [('price', '>', 0)]
+        :param index_col: Column to use as the index. Not needed for data written from pandas with its index, which is
+            restored from the pandas metadata.
+        '''
+        super(ArrowDataSource, self).__init__()
+        self.columns = list(columns) if columns is not None else None
+        self.filters = filters
+        self.index_col = index_col
+
+    @abstractmethod
+    def read_table(self):
+        ''' Read the selected columns and rows as a pyarrow.Table. '''
+
+    def iter_batches(self, chunksize):
+        ''' Yield the selected data as pyarrow.RecordBatches of at most chunksize rows. '''
+        yield from self.read_table().to_batches(max_chunksize=chunksize)
+
+    def read(self):
+        return self.to_data_frame(self.read_table())
+
+    def iter_chunks(self, chunksize=DEFAULT_CHUNK_SIZE):
+        if self.loaded:
+            yield from super(ArrowDataSource, self).iter_chunks(chunksize)
+            return
+        for batch in self.iter_batches(chunksize):
+            if batch.num_rows > 0:
+                yield self.to_data_frame(batch)
+
+    def read_options(self):
+        ''' The options that select what is read, for fingerprints. '''
+        return {'columns': self.columns, 'filters': self.filters, 'index_col': self.index_col}
+
+    def to_data_frame(self, table) -> pd.DataFrame:
+        data_frame = table.to_pandas()
+        if self.index_col is not None:
+            data_frame = data_frame.set_index(self.index_col)
+        return data_frame
+
+    def projection(self, schema):
+        ''' The names of the columns to read from schema, in schema order, or None to read all of them. '''
+        if self.columns is None:
+            return None
+        missing = [column for column in self.columns if column not in schema.names]
+        if missing:
+            raise KeyError(f'Columns not found: {missing}')
+
+        needed = set(self.columns)
+        pandas_metadata = schema.pandas_metadata or {}
+        # A RangeIndex is stored as a dict of its parameters rather than as a column.
+        needed.update(column for column in pandas_metadata.get('index_columns', []) if isinstance(column, str))
+        if self.index_col is not None:
+            needed.add(self.index_col)
+        return [name for name in schema.names if name in needed]
+
+    def filter_expression(self):
+        ''' self.filters as a pyarrow.compute.Expression, or None. '''
+        pyarrow = import_pyarrow()
+        if self.filters is None or isinstance(self.filters, pyarrow.compute.Expression):
+            return self.filters
+        return pyarrow.parquet.filters_to_expression(self.filters)
+
+    def select(self, table):
+        ''' Apply the column projection and the filters to an in-memory pyarrow.Table. '''
+        projection = self.projection(table.schema)
+        if projection is not None:
+            table = table.select(projection)
+        expression = self.filter_expression()
+        if expression is not None:
+            table = table.filter(expression)
+        return table
+
+
+class ParquetDataSource(ArrowDataSource):
+    def __init__(self, path, columns=None, filters=None, index_col=None, memory_map=True):
+        '''
+        Filters are also checked against the row group statistics, so row groups that cannot match are skipped.
+
+        :param path: Path of the Parquet file, or of a directory of Parquet files
+        :param memory_map: Memory-map the file instead of reading it into a buffer
+        '''
+        super(ParquetDataSource, self).__init__(columns=columns, filters=filters, index_col=index_col)
+        self.path = path
+        self.memory_map = memory_map
+
+    def fingerprint(self):
+        return file_fingerprint(self.path, type(self).__name__, self.read_options())
+
+    def read_table(self):
+        pyarrow = import_pyarrow()
+        schema = pyarrow.dataset.dataset(self.path, format='parquet').schema
+        return pyarrow.parquet.read_table(self.path, columns=self.projection(schema), filters=self.filter_expression(),
+                                          memory_map=self.memory_map)
+
+    def iter_batches(self, chunksize):
+        pyarrow = import_pyarrow()
+        dataset = pyarrow.dataset.dataset(self.path, format='parquet')
+        yield from dataset.to_batches(columns=self.projection(dataset.schema), filter=self.filter_expression(),
+                                      batch_size=chunksize)
+
+
+class ArrowFileDataSource(ArrowDataSource):
+    ''' An Arrow IPC file. Feather (v2) files are Arrow IPC files, so this reads both. '''
+    def __init__(self, path, columns=None, filters=None, index_col=None, memory_map=True):
+        '''
+        :param path: Path of the Arrow or Feather file
+        :param memory_map: Memory-map the file. Uncompressed columns are then used in place, without a copy.
+        '''
+        super(ArrowFileDataSource, self).__init__(columns=columns, filters=filters, index_col=index_col)
+        self.path = path
+        self.memory_map = memory_map
+
+    def fingerprint(self):
+        return file_fingerprint(self.path, type(self).__name__, self.read_options())
+
+    def read_table(self):
+        pyarrow = import_pyarrow()
+        with pyarrow.memory_map(str(self.path)) as source:
+            schema = pyarrow.ipc.open_file(source).schema
+        return self.select(pyarrow.feather.read_table(self.path, columns=self.projection(schema),
+                                                      memory_map=self.memory_map))
+
+    def iter_batches(self, chunksize):
+        ''' Read the record batches of the file one at a time, so only one of them is decoded in memory at once. '''
+        pyarrow = import_pyarrow()
+        path = str(self.path)
+        with (pyarrow.memory_map(path) if self.memory_map else pyarrow.OSFile(path)) as source:
+            reader = pyarrow.ipc.open_file(source)
+            for i in range(reader.num_record_batches):
+                table = self.select(pyarrow.Table.from_batches([reader.get_batch(i)]))
+                yield from table.to_batches(max_chunksize=chunksize)
+
+
+class ArrowTableDataSource(ArrowDataSource):
+    ''' An in-memory pyarrow.Table. '''
+    def __init__(self, table, columns=None, filters=None, index_col=None):
+        super(ArrowTableDataSource, self).__init__(columns=columns, filters=filters, index_col=index_col)
+        self.table = table
+
+    def read_table(self):
+        return self.select(self.table)
+
+    def fingerprint(self):
+        ''' Hashes the Arrow buffers of the table in place, without converting it to pandas. '''
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(json.dumps(self.read_options(), sort_keys=True, default=str).encode())
+        digest.update(str(self.table.schema).encode())
+        for column in self.table.columns:
+            for chunk in column.chunks:
+                # Slices share the buffers of the whole array
+                digest.update(f'{chunk.offset}\0{len(chunk)}\0'.encode())
+                for buffer in chunk.buffers():
+                    if buffer is not None:
+                        digest.update(buffer)
+        return digest.hexdigest()
+
+
+def arrow_data_source(source, columns=None, filters=None, index_col=None, memory_map=True) -> ArrowDataSource:
+    ''' An ArrowFileDataSource for a path, or an ArrowTableDataSource for a pyarrow.Table. '''
+    if isinstance(source, (str, PathLike)):
+        return ArrowFileDataSource(source, columns=columns, filters=filters, index_col=index_col, memory_map=memory_map)
+    return ArrowTableDataSource(source, columns=columns, filters=filters, index_col=index_col)
+
+
+def as_data_source(data) -> DataSource:
+    ''' Wrap a DataFrame in a FrameDataSource; DataSources are returned as they are. '''
+    if isinstance(data, DataSource):
+        return data
+    return FrameDataSource(data)
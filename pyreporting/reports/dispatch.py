@@ -0,0 +1,62 @@
+'''
+Dispatch of report items to the code that renders their type.
+
+Each renderer has a HandlerRegistry of item type -> handler. An item is rendered by the handler registered for the
+nearest class in its type's MRO, so a subclass is rendered like its parent until a handler is registered for it, and
+the order of registration does not matter. Resolved handlers are cached per type, so dispatch costs one dict lookup per
+item.
+
+Third parties can render their own item types by registering a handler with the renderer's signature (see the
+`handlers` of each renderer), on the class for renderers created afterwards or on one renderer:
+
+    @BokehReportRenderer.handlers.register(MyItem)
+    def make_my_item(renderer, item, unique_id, report_path, files_path):
+        return renderer.make_div(item.to_html())
+
+    renderer = EmailReportRenderer(send_email)
+    renderer.handlers.register(MyItem, append_my_item)
+'''
+
+
+class HandlerRegistry:
+    def __init__(self, handlers=None, fallback=None):
+        '''
+        :param handlers: dict of item type -> handler
+        :param fallback: Handler of items without a registered type; if None, they raise NotImplementedError
+        '''
+        self._handlers = dict(handlers or {})
+        self.fallback = fallback
+        self._resolved = {}
+
+    def register(self, item_type, handler=None):
+        '''
+        Render items of item_type and its subclasses with handler. Without handler, returns a decorator that registers
+        the decorated function.
+        '''
+        if handler is None:
+            return lambda decorated: self.register(item_type, decorated)
+        self._handlers[item_type] = handler
+        self._resolved.clear()
+        return handler
+
+    def set_fallback(self, handler):
+        ''' Render items of types without a handler with handler, or raise NotImplementedError if it is None. '''
+        self.fallback = handler
+        self._resolved.clear()
+
+    def resolve(self, item_type):
+        ''' The handler of items of item_type. '''
+        try:
+            return self._resolved[item_type]
+        except KeyError:
+            pass
+
+        handler = next((self._handlers[cls] for cls in item_type.__mro__ if cls in self._handlers), self.fallback)
+        if handler is None:
+            raise NotImplementedError(f'Unexpected report item type {item_type}')
+        self._resolved[item_type] = handler
+        return handler
+
+    def copy(self):
+        ''' A registry with the same handlers, to extend without changing this one. '''
+        return HandlerRegistry(self._handlers, self.fallback)
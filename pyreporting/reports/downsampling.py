@@ -0,0 +1,188 @@
+'''
+Downsampling of long series before they are plotted.
+
+A line chart is at most a few thousand pixels wide, so plotting millions of points only makes the output bigger and
+slower without changing how it looks. Two methods are available:
+
+* LTTB (largest-triangle-three-buckets): keeps the points that preserve the visual shape of the line.
+  https://skemman.is/bitstream/1946/15343/3/SS_MSthesis.pdf
+* MIN_MAX: keeps the minimum and maximum of every x-bucket ("pixel"), so spikes are never dropped.
+
+Selection is done per column, and a frame keeps the union of the selected rows so its columns still share one index.
+'''
+import numpy as np
+import pandas as pd
+
+LTTB = 'lttb'
+MIN_MAX = 'minmax'
+
+# Points per column after downsampling; a few times the width of a typical chart.
+DEFAULT_MAX_POINTS = 5000
+
+
+def x_values(index: pd.Index) -> np.ndarray:
+    ''' Numeric x-coordinates for an index: datetimes as nanoseconds, numbers as-is, anything else by position. '''
+    if pd.api.types.is_datetime64_any_dtype(index.dtype):
+        return index.asi8.astype(np.float64)
+    if pd.api.types.is_numeric_dtype(index.dtype):
+        return np.asarray(index, dtype=np.float64)
+    try:
+        return pd.to_datetime(index).asi8.astype(np.float64)
+    except (ValueError, TypeError):
+        return np.arange(len(index), dtype=np.float64)
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out) -> np.ndarray:
+    '''
+    Positions of the points selected by largest-triangle-three-buckets.
+
+    The first and last points are always kept. The points in between are split into n_out - 2 buckets. From each bucket,
+    the point that forms the largest triangle with the point picked from the previous bucket and the mean of the next
+    bucket is kept. Each bucket depends on the previous pick, so the loop runs once per output point. The work inside
+    each bucket is vectorized, so the cost is O(n) with n_out Python iterations.
+    '''
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    # Bucket boundaries over the interior points [1, n - 1)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    starts, stops = edges[:-1], edges[1:]
+
+    # Mean of every bucket, used as the third vertex of the triangle for the bucket before it
+    sums_x = np.add.reduceat(x[1:n - 1], starts - 1)
+    sums_y = np.add.reduceat(y[1:n - 1], starts - 1)
+    counts = stops - starts
+    mean_x = np.append(sums_x / counts, x[n - 1])
+    mean_y = np.append(sums_y / counts, y[n - 1])
+
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+    previous = 0
+    for bucket, (start, stop) in enumerate(zip(starts, stops)):
+        bucket_x = x[start:stop]
+        bucket_y = y[start:stop]
+        next_x, next_y = mean_x[bucket + 1], mean_y[bucket + 1]
+
+        # Twice the triangle area; the constant factor does not change the argmax
+        areas = np.abs(
+            (x[previous] - next_x) * (bucket_y - y[previous]) - (x[previous] - bucket_x) * (next_y - y[previous])
+        )
+        previous = start + int(np.argmax(areas))
+        selected[bucket + 1] = previous
+    return selected
+
+
+def min_max_indices(x: np.ndarray, y: np.ndarray, n_out) -> np.ndarray:
+    '''
+    Positions of the minimum and maximum of y in each of n_out // 2 equal-width x-buckets, plus the first and last
+    points.
+    '''
+    n = len(x)
+    if n_out >= n or n_out < 4:
+        return np.arange(n)
+
+    n_buckets = (n_out - 2) // 2
+    span = x[-1] - x[0]
+    if span > 0:
+        buckets = np.minimum(((x - x[0]) / span * n_buckets).astype(np.int64), n_buckets - 1)
+    else:
+        buckets = np.arange(n) * n_buckets // n
+
+    # Sort by (bucket, y): the first entry of every bucket is its minimum and the last one its maximum
+    order = np.lexsort((y, buckets))
+    sorted_buckets = buckets[order]
+    boundaries = np.flatnonzero(np.diff(sorted_buckets)) + 1
+    firsts = np.concatenate(([0], boundaries))
+    lasts = np.concatenate((boundaries - 1, [n - 1]))
+
+    return np.unique(np.concatenate(([0, n - 1], order[firsts], order[lasts])))
+
+
+METHODS = {
+    LTTB: lttb_indices,
+    MIN_MAX: min_max_indices,
+}
+
+
+def downsample_series_indices(x: np.ndarray, y: np.ndarray, max_points, method=LTTB) -> np.ndarray:
+    ''' Positions to keep for one column. NaNs are skipped, since they do not get drawn. '''
+    valid = np.flatnonzero(~np.isnan(y))
+    if len(valid) <= max_points:
+        return valid
+    return valid[METHODS[method](x[valid], y[valid], max_points)]
+
+
+def downsample_data_frame(df: pd.DataFrame, max_points=DEFAULT_MAX_POINTS, method=LTTB) -> pd.DataFrame:
+    '''
+    Downsample every numeric column of df to about max_points points.
+
+    :param df: Frame with one line per column, indexed by x.
+    :param max_points: Target number of points per column. None keeps full resolution.
+    :param method: LTTB or MIN_MAX. None keeps full resolution.
+    :return: The rows of df that were selected for any column, in their original order. df itself if it is already
+        small enough, or if it has no numeric column to select rows by.
+    '''
+    if method is None or max_points is None or len(df) <= max_points:
+        return df
+    if method not in METHODS:
+        raise NotImplementedError(f'Unexpected downsampling method: {method}')
+
+    x = x_values(df.index)
+    keep = []
+    for position in range(len(df.columns)):
+        column = df.iloc[:, position]
+        if not pd.api.types.is_numeric_dtype(column.dtype):
+            continue
+        y = column.to_numpy(dtype=np.float64, na_value=np.nan)
+        keep.append(downsample_series_indices(x, y, max_points, method))
+    if not keep:
+        return df
+
+    return df.iloc[np.unique(np.concatenate(keep))]
+
+
+def downsample_selections(df: pd.DataFrame, max_points=DEFAULT_MAX_POINTS, method=LTTB):
+    '''
+    Per-column selection of rows, for traces that do not share their points (see `columnar.encode_traces`).
+
+    :return: list with, per column, the sorted positions of the rows kept for it, or None for a column kept whole:
+        non-numeric columns, and every column if df is already small enough. None instead of a list if nothing is
+        downsampled.
+    '''
+    if method is None or max_points is None or len(df) <= max_points:
+        return None
+    if method not in METHODS:
+        raise NotImplementedError(f'Unexpected downsampling method: {method}')
+
+    x = x_values(df.index)
+    selections = []
+    for position in range(len(df.columns)):
+        column = df.iloc[:, position]
+        if not pd.api.types.is_numeric_dtype(column.dtype):
+            selections.append(None)
+            continue
+        selections.append(downsample_series_indices(x, column.to_numpy(dtype=np.float64, na_value=np.nan), max_points,
+                                                    method))
+    return selections
+
+
+def downsample_chunks(chunks, max_points=DEFAULT_MAX_POINTS, method=LTTB) -> pd.DataFrame:
+    '''
+    Downsample data that arrives as consecutive chunks, holding one chunk at a time plus the rows kept so far.
+
+    Every chunk is reduced to max_points and the concatenation is reduced again, which approximates
+    downsample_data_frame() over the whole data.
+    '''
+    reduced = [downsample_data_frame(chunk, max_points=max_points, method=method) for chunk in chunks]
+    if not reduced:
+        return pd.DataFrame()
+    return downsample_data_frame(pd.concat(reduced), max_points=max_points, method=method)
+
+
+def downsample_item(item) -> pd.DataFrame:
+    ''' The downsampled data of a line graph item, streamed in chunks if the item can stream its data. '''
+    if item.downsample is not None and item.max_points is not None and item.can_stream():
+        return downsample_chunks(item.iter_chunks(), max_points=item.max_points, method=item.downsample)
+    return downsample_data_frame(item.as_data_frame(), max_points=item.max_points, method=item.downsample)
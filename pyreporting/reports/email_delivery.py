@@ -0,0 +1,148 @@
+'''
+Delivery of rendered email reports.
+
+make_email_message() assembles the MIME message for the kwargs that EmailReportRenderer passes to send_email: the HTML,
+the images it references by cid, and the attachments. SmtpEmailSender is an async send_email for
+EmailReportRenderer.render_async() that reuses a bounded pool of SMTP connections across many reports:
+
+    async with SmtpEmailSender('smtp.example.com', sender='reports@example.com', max_connections=4) as sender:
+        renderer = EmailReportRenderer(send_email=sender)
+        await asyncio.gather(*(renderer.render_async(report, recipients, report.get_name()) for report in reports))
+
+For local testing, any SMTP debugging server will do, e.g. `python -m aiosmtpd -n -l localhost:8025`.
+'''
+import asyncio
+import mimetypes
+import smtplib
+from email.message import EmailMessage
+from logging import getLogger
+from pathlib import Path
+
+logger = getLogger(__name__)
+
+# Not known to mimetypes before Python 3.11
+mimetypes.add_type('image/webp', '.webp')
+
+
+def make_email_message(sender, recipients, email_subject, html_content, images=(), files=()) -> EmailMessage:
+    '''
+    :param images: List of {'filename', 'cid'}, referenced from html_content as <img src="cid:...">
+    :param files: Paths of the files to attach
+    '''
+    message = EmailMessage()
+    message['From'] = sender
+    message['To'] = ', '.join(recipients)
+    message['Subject'] = email_subject
+    message.set_content('This report is only available as HTML.')
+    message.add_alternative(html_content, subtype='html')
+
+    # Images go in a multipart/related part next to the HTML, so clients show them inline.
+    html_part = message.get_payload()[-1]
+    for image in images:
+        maintype, subtype = guess_type(image['filename'])
+        html_part.add_related(Path(image['filename']).read_bytes(), maintype=maintype, subtype=subtype,
+                              cid=f'<{image["cid"]}>')
+
+    for file_path in files:
+        maintype, subtype = guess_type(file_path)
+        message.add_attachment(Path(file_path).read_bytes(), maintype=maintype, subtype=subtype,
+                               filename=Path(file_path).name)
+    return message
+
+
+def guess_type(file_path):
+    mime_type, _ = mimetypes.guess_type(str(file_path))
+    if mime_type is None:
+        mime_type = 'application/octet-stream'
+    maintype, subtype = mime_type.split('/', 1)
+    return maintype, subtype
+
+
+class SmtpEmailSender:
+    def __init__(self, host, port=25, sender='no-reply@localhost', max_connections=4, username=None, password=None,
+                 starttls=False, timeout=60):
+        '''
+        An async send_email that keeps up to max_connections SMTP connections open and reuses them across messages.
+        At most max_connections messages are sent at the same time; more wait for a free connection.
+
+        smtplib is blocking, so messages are assembled and sent in the event loop's default thread pool.
+        '''
+        self.host = host
+        self.port = port
+        self.sender = sender
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+        self.timeout = timeout
+
+        self._slots = asyncio.Semaphore(max_connections)
+        self._idle_connections = []
+
+    def connect(self):
+        connection = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            if self.starttls:
+                connection.starttls()
+            if self.username is not None:
+                connection.login(self.username, self.password)
+        except Exception:
+            connection.close()
+            raise
+        return connection
+
+    def send(self, connection, message):
+        '''
+        Send on connection, or on a new connection if it is None or the server closed it while it was idle. Returns the
+        connection the message was sent on. A new connection is closed if sending on it fails; closing the connection
+        that was passed in on other errors is up to the caller.
+        '''
+        if connection is not None:
+            try:
+                connection.send_message(message)
+                return connection
+            except smtplib.SMTPServerDisconnected:
+                logger.debug('Idle SMTP connection was closed by the server, reconnecting')
+                connection.close()
+
+        connection = self.connect()
+        try:
+            connection.send_message(message)
+        except Exception:
+            close_connection(connection)
+            raise
+        return connection
+
+    async def __call__(self, html_content, recipients, email_subject, images, files):
+        loop = asyncio.get_running_loop()
+        message = await loop.run_in_executor(
+            None, make_email_message, self.sender, recipients, email_subject, html_content, images, files)
+
+        async with self._slots:
+            connection = self._idle_connections.pop() if self._idle_connections else None
+            try:
+                connection = await loop.run_in_executor(None, self.send, connection, message)
+            except Exception:
+                if connection is not None:
+                    await loop.run_in_executor(None, close_connection, connection)
+                raise
+            self._idle_connections.append(connection)
+
+    async def close(self):
+        ''' Close the idle connections. '''
+        loop = asyncio.get_running_loop()
+        connections, self._idle_connections = self._idle_connections, []
+        for connection in connections:
+            await loop.run_in_executor(None, close_connection, connection)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+
+def close_connection(connection):
+    try:
+        connection.quit()
+    except smtplib.SMTPException:
+        connection.close()
@@ -1,45 +1,87 @@
 from pathlib import Path
+import asyncio
+import copy
+import inspect
+import os
 import time
 import re
 import imghdr
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 from logging import getLogger
 from typing import Callable
 
-from .plotutils import generate_stacked_bar_plot_figure
+from .image_pipeline import ImageOptions, ImageDeduplicator, figure_key
+from .dispatch import HandlerRegistry
+from .downsampling import downsample_item
+from .render_cache import RenderCache, hash_item_data
+from .incremental import IncrementalRun
+from .fileutils import make_run_directory
+from .instrumentation import Instrumentation, DATA_LOAD, TRANSFORM, RASTERIZE, FILE_COPY, SERIALIZE, file_size
 
-from . import ReportTableItem, ReportImageItem, ReportLineGraphItem, ReportFileItem, ReportGraphItem, ReportTextItem
+from . import ReportTableItem, ReportLineGraphItem, ReportFileItem, ReportGraphItem, ReportTextItem,\
+    ReportDataItem
 logger = getLogger(__name__)
 
+# The functions of `pyreporting.reports.plotutils` that draw the charts, by name, since matplotlib is only imported once
+# a chart is drawn
+STACKED_BAR_FIGURE = 'pyreporting.reports.plotutils.save_stacked_bar_plot_figure'
+LINE_FIGURE = 'pyreporting.reports.plotutils.save_line_plot_figure'
+
 
 def send_email(*args, **kwargs):
     raise NotImplementedError('Implement your own logic for sending email')
 
 
 class EmailReportRenderer:
-    def __init__(self, send_email: Callable=send_email):
+    # Item type -> handler(renderer, item, unique_id, files_path, html_items, image_and_cid_references,
+    # file_attachments) that appends the HTML, images and attachments of the item. Set below the class; see
+    # `pyreporting.reports.dispatch`.
+    handlers: HandlerRegistry = None
+
+    def __init__(self, send_email: Callable=send_email, cache: RenderCache=None, hooks=(), incremental=False,
+                 image_options: ImageOptions=None):
         '''
-        :param send_email: Function that accepts kwargs of:
+        :param send_email: Function, or coroutine function for render_async(), that accepts kwargs of:
         * html_content
         * recipients
         * email_subject
         * images
         * files
+        :param cache: If set, reuse PNGs and table HTML of items whose data and options did not change.
+        :param hooks: RenderHooks notified of every item and phase of the render (see
+            `pyreporting.reports.instrumentation`)
+        :param incremental: Reuse the PNGs and attachments of items that did not change since the previous run of the
+            same report, and write a manifest of what was reused (see `pyreporting.reports.incremental`).
+        :param image_options: DPI, size and format of the charts, and whether identical charts and files are attached
+            once (see `pyreporting.reports.image_pipeline`). Full size PNGs if None.
         '''
         self.send_email = send_email
+        self.cache = cache
+        self.instrumentation = Instrumentation(hooks)
+        self.incremental = incremental
+        self.image_options = image_options or ImageOptions()
+
+        # Handlers registered on this renderer do not change other renderers
+        self.handlers = type(self).handlers.copy()
+
+        # Previous run and new manifest of the current render (incremental mode only)
+        self._incremental_run = None
+        # Images left to rasterize, as (save_figure, data, file path, cache key, kwargs); render_async() only
+        self._pending_images = None
+        # First file of every chart and file content in the current render, and the cid each image is attached as
+        self._images = ImageDeduplicator.for_options(self.image_options)
+        self._image_cids = {}
 
     def render(self, report, email_addresses, email_subject, output_dir='./report'):
-        # Get a unique name for this report
-        report_name = report.get_name()
-        run_string = time.strftime('%Y%M%d_%H%M%S')
-
-        # Create a sequence of sub-paths to make unique reports by name and time run.
-        path = Path('.') / output_dir / report_name / run_string
-
-        if not path.exists():
-            path.mkdir(parents=True)
-        assert path.exists(), f"Couldn't create directory {path}"
+        with self.instrumentation.report(report, 'email') as context:
+            context['output_path'] = self.render_report(report, email_addresses, email_subject, output_dir)
 
+    def render_report(self, report, email_addresses, email_subject, output_dir):
+        path = self.make_run(report, output_dir)
         html_output, image_and_cid_references, file_attachments = self.__to_html_and_images(report, path)
+        self.save_manifest()
+
         self.send_email(
             html_content=html_output,
             recipients=email_addresses,
@@ -47,6 +89,125 @@ class EmailReportRenderer:
             images=image_and_cid_references,
             files=file_attachments,
         )
+        return path
+
+    async def render_async(self, report, email_addresses, email_subject, output_dir='./report', executor=None):
+        '''
+        Render and send a report without blocking the event loop, so that many reports can be rendered and sent at
+        once, e.g. with asyncio.gather(). The HTML is built in the loop's default thread pool, the images are
+        rasterized concurrently in executor, and then the email is handed to send_email: awaited if it is a
+        coroutine function (see `pyreporting.reports.email_delivery.SmtpEmailSender`), otherwise run in a thread.
+
+        Concurrent calls on one renderer are independent of each other. Hooks receive the events of all of them, so
+        hooks that keep state per render, such as TimingCollector, should not be shared between concurrent calls.
+
+        :param executor: Executor to rasterize the images in. Rasterizing is CPU-bound and mostly holds the GIL, so this
+            should be a process pool. If None, a ProcessPoolExecutor is created for this report; pass one to share it
+            between reports.
+        :return: The path of the run
+        '''
+        loop = asyncio.get_running_loop()
+
+        # A copy holds the state of this render, so that concurrent renders do not share it.
+        renderer = copy.copy(self)
+        renderer.instrumentation = Instrumentation(self.instrumentation.hooks)
+        renderer._pending_images = []
+
+        with renderer.instrumentation.report(report, 'email') as context:
+            path = await loop.run_in_executor(None, renderer.make_run, report, output_dir)
+            html_output, image_and_cid_references, file_attachments = await loop.run_in_executor(
+                None, renderer.__to_html_and_images, report, path)
+            await renderer.rasterize_pending(executor)
+            renderer.save_manifest()
+
+            email = dict(
+                html_content=html_output,
+                recipients=email_addresses,
+                email_subject=email_subject,
+                images=image_and_cid_references,
+                files=file_attachments,
+            )
+            if is_coroutine_callable(self.send_email):
+                await self.send_email(**email)
+            else:
+                await loop.run_in_executor(None, partial(self.send_email, **email))
+            context['output_path'] = path
+        return path
+
+    def make_run(self, report, output_dir):
+        ''' Create the directory of this run and, in incremental mode, find the previous run. '''
+        # Get a unique name for this report
+        report_name = report.get_name()
+        run_string = time.strftime('%Y%M%d_%H%M%S')
+
+        # Create a sequence of sub-paths to make unique reports by name and time run.
+        path = make_run_directory(Path('.') / output_dir / report_name, run_string)
+
+        self._incremental_run = None
+        if self.incremental:
+            self._incremental_run = IncrementalRun(path, report, 'email', self.image_options.cache_options())
+        self._images = ImageDeduplicator.for_options(self.image_options)
+        self._image_cids = {}
+        return path
+
+    def save_manifest(self):
+        if self._incremental_run is not None:
+            self._incremental_run.save()
+            self._incremental_run = None
+
+    def claim_figure(self, item, image_file_path, save_figure_name, **kwargs):
+        '''
+        The path the chart of item is saved to: image_file_path, or that of the same chart of an earlier item. Claimed
+        before the chart is reused, restored from the cache or drawn, so later items of the same chart link to it in
+        every case.
+
+        :param save_figure_name: Qualified name of the function that draws the chart
+        :param kwargs: The arguments of the chart besides the item's data
+        '''
+        if not self._images.enabled:
+            return image_file_path
+        return self._images.claim_figure(figure_key(save_figure_name, hash_item_data(item), **kwargs), image_file_path)
+
+    def rasterize(self, save_figure, data, image_file_path, cache_key=None, **kwargs):
+        '''
+        Save the figure of data to image_file_path with save_figure(data, image_file_path, image_options, **kwargs),
+        and store it in the cache under cache_key. In render_async(), this is deferred to rasterize_pending().
+        '''
+        kwargs['image_options'] = self.image_options
+        if self._pending_images is not None:
+            self._pending_images.append((save_figure, data, image_file_path, cache_key, kwargs))
+            return
+
+        with self.instrumentation.phase(RASTERIZE) as phase:
+            save_figure(data, image_file_path, **kwargs)
+            phase.bytes_written = file_size(image_file_path)
+        if cache_key is not None:
+            self.cache.store(cache_key, image_file_path)
+
+    async def rasterize_pending(self, executor=None):
+        ''' Rasterize the images deferred by rasterize() concurrently in executor, or in a new process pool. '''
+        pending_images, self._pending_images = self._pending_images, []
+        if not pending_images:
+            return
+
+        loop = asyncio.get_running_loop()
+        own_executor = executor is None
+        if own_executor:
+            executor = ProcessPoolExecutor(min(len(pending_images), os.cpu_count() or 1))
+        try:
+            with self.instrumentation.phase(RASTERIZE) as phase:
+                await asyncio.gather(*(
+                    loop.run_in_executor(executor, partial(save_figure, data, image_file_path, **kwargs))
+                    for save_figure, data, image_file_path, _, kwargs in pending_images
+                ))
+                phase.bytes_written = sum(file_size(image[2]) for image in pending_images)
+        finally:
+            if own_executor:
+                await loop.run_in_executor(None, executor.shutdown)
+
+        for _, _, image_file_path, cache_key, _ in pending_images:
+            if cache_key is not None:
+                self.cache.store(cache_key, image_file_path)
 
     def __to_html_and_images(self, report, output_dir):
         files_path = output_dir / 'Files'
@@ -58,31 +219,21 @@ class EmailReportRenderer:
         file_attachments = []
 
         for unique_id, item in report.get_uniquely_keyed_items():
-            html_items.append(self.render_div(f'<h2>{item.name}</h2><br>'))
-
-            if isinstance(item, ReportFileItem):
-                self.append_file_item(item, unique_id, files_path, html_items, image_and_cid_references, file_attachments)
+            with self.instrumentation.item(unique_id, item):
+                self.append_item(item, unique_id, files_path, html_items, image_and_cid_references, file_attachments)
 
-            elif isinstance(item, ReportGraphItem):
-                self.append_report_graph_item(item, unique_id, files_path, html_items, image_and_cid_references)
-
-            elif isinstance(item, ReportImageItem):
-                self.append_image_item(item, unique_id, files_path, image_and_cid_references)
+        return ''.join(html_items), image_and_cid_references, file_attachments
 
-            elif isinstance(item, ReportLineGraphItem):
-                self.append_line_graph_item(item, unique_id, files_path, html_items, image_and_cid_references)
+    def append_item(self, item, unique_id, files_path, html_items, image_and_cid_references, file_attachments):
+        html_items.append(self.render_div(f'<h2>{item.name}</h2><br>'))
 
-            elif isinstance(item, ReportTableItem):
-                self.append_table_item(item, html_items)
+        handler = self.handlers.resolve(type(item))
+        handler(self, item, unique_id, files_path, html_items, image_and_cid_references, file_attachments)
 
-            elif isinstance(item, ReportTextItem):
-                self.append_text_item(item, html_items)
+        self.record_files(unique_id, item)
 
-            else:
-                report_type = type(item)
-                raise NotImplementedError(f'Unexpected report item type {report_type}')
-
-        return ''.join(html_items), image_and_cid_references, file_attachments
+        if isinstance(item, ReportDataItem):
+            item.release_data()
 
     def append_text_item(self, text_item, html_items):
         html_items.append(self.render_div(text_item.render_text_snippet()))
@@ -94,51 +245,104 @@ class EmailReportRenderer:
             self.append_line_graph_item(item, unique_id, destination_path, html_items, image_and_cid_references)
 
         elif output_type is ReportGraphItem.STACKED:
-            fig = generate_stacked_bar_plot_figure(
-                item.as_data_frame(),
-                title=item.get_name(),
-                y_label='Value'
-            )
-            image_file_path = f'{destination_path}/{unique_id}.png'
-            fig.savefig(image_file_path, bbox_inches='tight')
-
-            cid = self.safe_string(unique_id)
-            html_items.append(self.render_image(cid=cid))
-            image_and_cid_references.append(self.make_filename_cid_reference(image_file_path, cid=cid))
+            own_path = self.image_path(destination_path, unique_id)
+            image_file_path = self.claim_figure(item, own_path, STACKED_BAR_FIGURE, title=item.get_name(),
+                                                y_label='Value')
+            if image_file_path == own_path and self.reuse_files(unique_id, item) is None:
+                key = self.cache_key(unique_id, item, output_type=output_type, **self.image_options.cache_options())
+                if key is None or not self.cache.restore(key, image_file_path):
+                    # matplotlib is only imported once a chart is drawn
+                    from .plotutils import save_stacked_bar_plot_figure
+                    self.rasterize(save_stacked_bar_plot_figure, self.load_data(item), image_file_path, key,
+                                   title=item.get_name(), y_label='Value')
+                self.record_files(unique_id, item, [image_file_path])
+
+            self.append_image(image_file_path, unique_id, html_items, image_and_cid_references)
 
         else:
             raise NotImplementedError(f'Unexpected output type: {output_type}')
 
     def append_line_graph_item(self, item, unique_id, destination_path, html_items, image_and_cid_references):
-        image_file_path = f'{destination_path}/{unique_id}.png'
-
-        df = item.as_data_frame()
-        ax = df.plot(kind='line')
-        ax.get_figure().savefig(image_file_path, bbox_inches='tight')
-
-        cid = self.safe_string(unique_id)
-        html_items.append(self.render_image(cid=cid))
-        image_and_cid_references.append(self.make_filename_cid_reference(image_file_path, cid=cid))
+        own_path = self.image_path(destination_path, unique_id)
+        image_file_path = self.claim_figure(item, own_path, LINE_FIGURE, max_points=item.max_points,
+                                            downsample=item.downsample)
+
+        if image_file_path == own_path and self.reuse_files(unique_id, item) is None:
+            key = self.cache_key(unique_id, item, output_type='line', max_points=item.max_points,
+                                 downsample=item.downsample, **self.image_options.cache_options())
+            if key is None or not self.cache.restore(key, image_file_path):
+                if not item.can_stream():
+                    self.load_data(item)
+                with self.instrumentation.phase(TRANSFORM):
+                    df = downsample_item(item)
+                from .plotutils import save_line_plot_figure
+                self.rasterize(save_line_plot_figure, df, image_file_path, key)
+            self.record_files(unique_id, item, [image_file_path])
+
+        self.append_image(image_file_path, unique_id, html_items, image_and_cid_references)
 
     def append_file_item(self, item, unique_id, dest_path, html_items, image_and_cid_references, file_attachments):
         # determine the file type. If it is an image, append and embed as an image and cid reference.
         # if it is a file, append as a file
-        file_path = item.copy_to(dest_path, filename=unique_id)
+        reused_files = self.reuse_files(unique_id, item)
+        if reused_files is not None:
+            file_path = reused_files[0]
+        else:
+            with self.instrumentation.phase(FILE_COPY) as phase:
+                copied_path = item.copy_to(dest_path, filename=unique_id)
+                phase.bytes_written = file_size(copied_path)
+            # With ImageOptions.dedupe_files, a file with the same contents as an earlier one is removed, and the
+            # earlier one attached instead.
+            file_path = self._images.dedupe_file(copied_path)
+            if file_path == copied_path:
+                self.record_files(unique_id, item, [file_path])
         if imghdr.what(file_path) is not None:
-            cid = self.safe_string(unique_id)
-            html_items.append(self.render_image(cid))
-            image_and_cid_references.append(self.make_filename_cid_reference(file_path, cid=cid))
+            self.append_image(file_path, unique_id, html_items, image_and_cid_references)
         else:
             html_items.append(self.render_div(f'See attached file named {item.name}'))
-            file_attachments.append(file_path)
+            if file_path not in file_attachments:
+                file_attachments.append(file_path)
 
-    def append_image_item(self, item, unique_id, files_path, image_and_cid_references):
-        self.append_file_item(item, unique_id, files_path, image_and_cid_references, file_attachments=[])
+    def append_table_item(self, item, html_items, cache_key=None):
+        with self.instrumentation.phase(SERIALIZE):
+            if cache_key is None:
+                html_items.append(self.load_data(item).to_html())
+            else:
+                html_items.append(self.cache.text(cache_key, lambda: self.load_data(item).to_html(), suffix='.html'))
 
-    @staticmethod
-    def append_table_item(item, html_items):
-        df = item.as_data_frame()
-        html_items.append(df.to_html())
+    def image_path(self, destination_path, unique_id):
+        return f'{destination_path}/{unique_id}{self.image_options.extension}'
+
+    def append_image(self, image_file_path, unique_id, html_items, image_and_cid_references):
+        ''' Embed an image. An image that is already attached is referenced by its cid instead of attached again. '''
+        cid = self._image_cids.get(str(image_file_path))
+        if cid is None:
+            cid = self._image_cids[str(image_file_path)] = self.safe_string(unique_id)
+            image_and_cid_references.append(self.make_filename_cid_reference(image_file_path, cid=cid))
+        html_items.append(self.render_image(cid=cid))
+
+    def load_data(self, item):
+        ''' The item's DataFrame, read from its data source if it was not loaded yet. '''
+        with self.instrumentation.phase(DATA_LOAD):
+            return item.as_data_frame()
+
+    def reuse_files(self, unique_id, item):
+        ''' In incremental mode, the files of an unchanged item linked from the previous run. None otherwise. '''
+        if self._incremental_run is None:
+            return None
+        with self.instrumentation.phase(FILE_COPY):
+            return self._incremental_run.reuse(unique_id, item)
+
+    def record_files(self, unique_id, item, files=()):
+        ''' Record the files rendered for an item in the manifest of an incremental render. '''
+        if self._incremental_run is not None:
+            self._incremental_run.record(unique_id, item, files)
+
+    def cache_key(self, unique_id, item, **options):
+        ''' Render cache key of an item, or None without a cache. '''
+        if self.cache is None:
+            return None
+        return self.cache.make_key(unique_id, item, 'email', name=item.get_name(), **options)
 
     @staticmethod
     def make_filename_cid_reference(image_file_path, cid):
@@ -154,3 +358,22 @@ class EmailReportRenderer:
     @staticmethod
     def safe_string(s):
         return re.sub('[^0-9a-zA-Z_]', '_', s)
+
+
+# Image items are file items that are embedded rather than attached, which append_file_item() detects.
+EmailReportRenderer.handlers = HandlerRegistry({
+    ReportFileItem: EmailReportRenderer.append_file_item,
+    ReportGraphItem: lambda renderer, item, unique_id, files_path, html_items, images, files:
+        renderer.append_report_graph_item(item, unique_id, files_path, html_items, images),
+    ReportLineGraphItem: lambda renderer, item, unique_id, files_path, html_items, images, files:
+        renderer.append_line_graph_item(item, unique_id, files_path, html_items, images),
+    ReportTableItem: lambda renderer, item, unique_id, files_path, html_items, images, files:
+        renderer.append_table_item(item, html_items, renderer.cache_key(unique_id, item, output_type='table')),
+    ReportTextItem: lambda renderer, item, unique_id, files_path, html_items, images, files:
+        renderer.append_text_item(item, html_items),
+})
+
+
+def is_coroutine_callable(func):
+    ''' Whether calling func returns an awaitable: a coroutine function, or an object with an async __call__. '''
+    return inspect.iscoroutinefunction(func) or inspect.iscoroutinefunction(getattr(func, '__call__', None))
@@ -0,0 +1,121 @@
+'''
+File helpers shared by the renderers.
+'''
+import os
+import shutil
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# ioctl request that clones the extents of a file (copy-on-write) on Btrfs, XFS and other file systems that support it
+FICLONE = 0x40049409
+
+BUFFER_SIZE = 1024 * 1024
+
+
+def reflink(source_fd, destination_fd, size):
+    if fcntl is None:
+        raise NotImplementedError('Reflinks need fcntl')
+    fcntl.ioctl(destination_fd, FICLONE, source_fd)
+
+
+def copy_range(source_fd, destination_fd, size):
+    ''' Copy inside the kernel; some file systems (e.g. NFS, Btrfs) also share the data instead of copying it. '''
+    if not hasattr(os, 'copy_file_range'):
+        raise NotImplementedError('copy_file_range needs Python 3.8+ on Linux')
+    offset = 0
+    while offset < size:
+        copied = os.copy_file_range(source_fd, destination_fd, size - offset, offset, offset)
+        if copied == 0:
+            break
+        offset += copied
+
+
+def send_file(source_fd, destination_fd, size):
+    ''' Copy inside the kernel with sendfile, which accepts a regular file as the destination on Linux. '''
+    offset = 0
+    while offset < size:
+        sent = os.sendfile(destination_fd, source_fd, offset, size - offset)
+        if sent == 0:
+            break
+        offset += sent
+
+
+# Ways to copy a file without reading it into Python, fastest first
+ZERO_COPY_METHODS = (reflink, copy_range, send_file)
+
+
+def copy_file(source, destination, hardlink=False) -> Path:
+    '''
+    Copy a file without passing its contents through Python where possible. In order: a hard link (only if hardlink),
+    a reflink, copy_file_range, sendfile, and last a buffered copy.
+
+    :param hardlink: Allow a hard link. The copy then changes whenever the source changes, so only use it for sources
+        that are not modified in place.
+    '''
+    if hardlink:
+        try:
+            os.link(source, destination)
+            return Path(destination)
+        except OSError:
+            pass
+
+    with open(source, 'rb') as source_file, open(destination, 'wb') as destination_file:
+        source_fd, destination_fd = source_file.fileno(), destination_file.fileno()
+        size = os.fstat(source_fd).st_size
+        if size == 0:
+            return Path(destination)
+
+        for method in ZERO_COPY_METHODS:
+            try:
+                method(source_fd, destination_fd, size)
+                return Path(destination)
+            except (OSError, NotImplementedError):
+                # Not supported by this platform, kernel or file system; start over with the next method.
+                os.ftruncate(destination_fd, 0)
+                os.lseek(destination_fd, 0, os.SEEK_SET)
+
+        shutil.copyfileobj(source_file, destination_file, BUFFER_SIZE)
+    return Path(destination)
+
+
+def link_or_copy(source, destination) -> Path:
+    '''
+    Hard-link source to destination, or copy it where a hard link is not possible (another file system, or no support
+    for hard links). Rendered files are never modified once written, so runs can share them.
+    '''
+    return copy_file(source, destination, hardlink=True)
+
+
+def make_run_directory(report_dir: Path, run_string):
+    '''
+    Create the directory of a run. Runs of the same report within one second, e.g. in a batch, get a numbered suffix
+    instead of sharing a directory.
+    '''
+    report_dir.mkdir(parents=True, exist_ok=True)
+    path = report_dir / run_string
+    suffix = 0
+    while True:
+        try:
+            path.mkdir()
+            return path
+        except FileExistsError:
+            suffix += 1
+            path = report_dir / f'{run_string}_{suffix}'
+
+
+def share_file(source, destination) -> Path:
+    '''
+    Hard-link or copy source to destination unless destination exists already, e.g. an asset shared by many reports.
+    Concurrent calls, e.g. from batch workers, never expose a partially written destination.
+    '''
+    destination = Path(destination)
+    if destination.exists():
+        return destination
+    temporary_path = destination.with_name(f'{destination.name}.{os.getpid()}.tmp')
+    copy_file(source, temporary_path, hardlink=True)
+    os.replace(temporary_path, destination)
+    return destination
@@ -0,0 +1,186 @@
+'''
+Compact heatmap payloads: quantized values and a pyramid of coarser levels.
+
+A heatmap only ever shows a color per cell, so instead of one float per cell the values are quantized to color codes in
+a uint8 (or uint16, for more than 256 colors) array, with the scale to turn codes back into values:
+
+    value = offset + (code - 1) * step        # code 0 is a missing value
+
+Optionally, the grid is also aggregated into a pyramid of levels, each halving the one below it (only along dates once
+the window lengths are few) by taking the mean of 2x2 blocks, down to a level of at most COARSE_LEVEL_CELLS cells. The
+coarsest level is embedded into the report so the browser draws it right away; the finer ones are written next to the
+report and loaded once the browser knows which resolution it needs:
+
+    Files/Report_Heatmap_0_tiles/level_1.js   # pyreporting.receiveHeatmapLevel(key, 1, {...})
+    Files/Report_Heatmap_0_tiles/level_0.js   # full resolution
+
+Everything is computed on whole NumPy arrays; no Python object is created per cell.
+'''
+import json
+from pathlib import Path
+from urllib.parse import quote
+
+import numpy as np
+import pandas as pd
+
+from pyreporting.widgets.columnar import encode_array, encode_buffer
+
+DEFAULT_COLORS = 256
+
+MAX_COLORS = 65536
+
+# Code of missing values
+MISSING_CODE = 0
+
+# A level with no more cells than this is embedded and drawn first
+COARSE_LEVEL_CELLS = 64 * 1024
+
+# The window lengths (columns) are only aggregated while a level has more of them than this
+MIN_LEVEL_COLUMNS = 32
+
+
+def quantization_scale(values: np.ndarray, colors=DEFAULT_COLORS) -> dict:
+    '''
+    Scale that maps the finite range of values onto codes 1..colors - 1.
+
+    :param colors: Number of codes, including the code of missing values. At most MAX_COLORS.
+    '''
+    if not 2 < colors <= MAX_COLORS:
+        raise ValueError(f'colors must be between 3 and {MAX_COLORS}, got {colors}')
+    finite = values[np.isfinite(values)]
+    low = float(finite.min()) if len(finite) else 0.0
+    high = float(finite.max()) if len(finite) else 0.0
+    step = (high - low) / (colors - 2) if high > low else 1.0
+    return {
+        'dtype': 'uint8' if colors <= 256 else 'uint16',
+        'colors': colors,
+        'offset': low,
+        'step': step,
+        'missing': MISSING_CODE,
+    }
+
+
+def quantize(values: np.ndarray, scale: dict) -> np.ndarray:
+    ''' Color codes of values, MISSING_CODE where they are NaN or infinite. '''
+    codes = np.full(values.shape, MISSING_CODE, dtype=scale['dtype'])
+    finite = np.isfinite(values)
+    scaled = np.rint((values[finite] - scale['offset']) / scale['step'])
+    codes[finite] = np.clip(scaled, 0, scale['colors'] - 2) + 1
+    return codes
+
+
+def block_sums(values: np.ndarray, row_factor, col_factor) -> np.ndarray:
+    ''' Sum of every row_factor x col_factor block of a 2-d array. The last blocks of each axis may be partial. '''
+    rows, cols = values.shape
+    padded_rows = -(-rows // row_factor) * row_factor
+    padded_cols = -(-cols // col_factor) * col_factor
+    padded = np.zeros((padded_rows, padded_cols), dtype=values.dtype)
+    padded[:rows, :cols] = values
+    return padded.reshape(padded_rows // row_factor, row_factor, padded_cols // col_factor, col_factor).sum(axis=(1, 3))
+
+
+def pyramid(values: np.ndarray, coarse_cells=COARSE_LEVEL_CELLS):
+    '''
+    Levels of values from the full resolution (level 0) to the first one with at most coarse_cells cells.
+
+    Every cell of a level is the mean of the values it covers at the full resolution, ignoring NaNs; cells without any
+    value are NaN. Sums and counts are aggregated rather than means, so partial blocks do not skew the coarser levels.
+
+    :return: list of (row_factor, col_factor, values) per level: every cell of a level covers row_factor rows and
+        col_factor columns of the full resolution.
+    '''
+    levels = [(1, 1, values)]
+    present = ~np.isnan(values)
+    sums = np.where(present, values, 0.0)
+    counts = present.astype(np.int64)
+    row_factor, col_factor = 1, 1
+    while sums.size > coarse_cells and sums.shape[0] > 1:
+        col_step = 2 if sums.shape[1] > MIN_LEVEL_COLUMNS else 1
+        sums = block_sums(sums, 2, col_step)
+        counts = block_sums(counts, 2, col_step)
+        row_factor, col_factor = row_factor * 2, col_factor * col_step
+        means = np.divide(sums, counts, out=np.full(sums.shape, np.nan), where=counts > 0)
+        levels.append((row_factor, col_factor, means))
+    return levels
+
+
+def encode_heatmap(df: pd.DataFrame, colors=DEFAULT_COLORS, levels=False) -> dict:
+    '''
+    Quantized payload of a heatmap, with rows as dates and columns as window lengths.
+
+    :param colors: Number of color codes, see quantization_scale().
+    :param levels: Also encode the coarser levels of the pyramid. Otherwise, only the full resolution is encoded.
+    :return: dict with 'columns', 'index_name', 'index' (full resolution), 'rows', 'cols', 'scale' and 'levels',
+        coarsest first. Every level has 'level', 'row_factor', 'col_factor', 'rows', 'cols' and 'codes' (row-major).
+    '''
+    values = df.to_numpy(dtype=np.float64, na_value=np.nan)
+    scale = quantization_scale(values, colors)
+    grids = pyramid(values) if levels else [(1, 1, values)]
+    return {
+        'columns': [str(column) for column in df.columns],
+        'index_name': None if df.index.name is None else str(df.index.name),
+        'index': encode_array(df.index),
+        'rows': values.shape[0],
+        'cols': values.shape[1],
+        'scale': scale,
+        'levels': [
+            {
+                'level': level,
+                'row_factor': row_factor,
+                'col_factor': col_factor,
+                'rows': grid.shape[0],
+                'cols': grid.shape[1],
+                'codes': encode_buffer(quantize(grid, scale).ravel(), scale['dtype']),
+            }
+            for level, (row_factor, col_factor, grid) in reversed(list(enumerate(grids)))
+        ],
+    }
+
+
+def tiles_path(report_path, unique_id) -> Path:
+    ''' The directory write_levels() writes the finer levels of an item to. '''
+    return Path(report_path) / 'Files' / f'{unique_id}_tiles'
+
+
+def embedded_levels(payload: dict, unique_id) -> dict:
+    '''
+    The payload to embed once the finer levels are in the tiles directory of the item, e.g. written by a previous run.
+
+    :param payload: Output of encode_heatmap(); not modified.
+    :return: The payload with 'tiles': {'key', 'url'}; the levels left out have no 'codes'. Unchanged if there is only
+        one level.
+    '''
+    coarsest, *finer = payload['levels']
+    if not finer:
+        return payload
+    return {
+        **payload,
+        'levels': [coarsest] + [{key: value for key, value in level.items() if key != 'codes'} for level in finer],
+        'tiles': {'key': unique_id, 'url': f'Files/{quote(f"{unique_id}_tiles")}/'},
+    }
+
+
+def write_levels(payload: dict, report_path, unique_id) -> dict:
+    '''
+    Write every level but the coarsest under `<report_path>/Files/<unique_id>_tiles`, and leave them out of the payload.
+
+    :param payload: Output of encode_heatmap(); not modified.
+    :param report_path: The directory of report.html. The returned URL is relative to it.
+    :param unique_id: The item's unique id, used to name the directory and to route levels in the browser.
+    :return: The payload to embed, see embedded_levels().
+    '''
+    coarsest, *finer = payload['levels']
+    if not finer:
+        return payload
+
+    tiles_dir = tiles_path(report_path, unique_id)
+    tiles_dir.mkdir(parents=True, exist_ok=True)
+
+    for level in finer:
+        level_path = tiles_dir / f'level_{level["level"]}.js'
+        with open(level_path, 'w') as level_file:
+            level_file.write(f'pyreporting.receiveHeatmapLevel({json.dumps(unique_id)}, {level["level"]}, ')
+            json.dump(level, level_file)
+            level_file.write(');\n')
+
+    return embedded_levels(payload, unique_id)
@@ -0,0 +1,190 @@
+'''
+Size and format of the images the renderers rasterize with matplotlib.
+
+By default, charts are saved as PNGs at matplotlib's default DPI, which for an 18x12 inch stacked bar chart is several
+MB per image. ImageOptions sets the DPI and figure size per renderer, and can save palette-quantized PNGs, WebP or
+SVG instead:
+
+    EmailReportRenderer(send_email, image_options=ImageOptions(dpi=72, figure_size=(12, 8), quantize=True))
+
+Renderers also deduplicate charts within a render: a chart of the same data and options is rasterized once. With
+dedupe_files, a file item with the same contents as an earlier one is also written or attached once (see
+ImageDeduplicator); this reads the files, so it is off by default.
+
+Quantization and WebP use Pillow, which matplotlib depends on.
+'''
+import hashlib
+import io
+import os
+from pathlib import Path
+
+from .render_cache import hash_data_frame, hash_file_obj
+
+FORMATS = ('png', 'webp', 'svg')
+
+
+class ImageOptions:
+    def __init__(self, format='png', dpi=None, figure_size=None, quantize=False, colors=256, quality=80,
+                 dedupe=True, dedupe_files=False, reuse_figures=False):
+        '''
+        :param format: 'png', 'webp' or 'svg'
+        :param dpi: Resolution of raster images; matplotlib's default (rcParams['savefig.dpi']) if None
+        :param figure_size: (width, height) in inches to resize figures to before saving; their own size if None
+        :param quantize: Reduce PNGs to a palette of colors, which is typically 3-4x smaller for charts
+        :param colors: Size of the palette of quantized PNGs
+        :param quality: WebP quality from 0 to 100; 100 is lossless
+        :param dedupe: Rasterize identical charts only once per render
+        :param dedupe_files: Also write or attach file items with identical contents only once per render. Files are
+            only hashed when an earlier file has the same size, but hashing still reads them on the rendering thread.
+        :param reuse_figures: Draw every chart of a thread or worker process on one reused figure and canvas, instead
+            of creating them per chart. Saves allocations when many charts are rendered.
+        '''
+        if format not in FORMATS:
+            raise ValueError(f'Unexpected image format {format!r}, expected one of {FORMATS}')
+        self.format = format
+        self.dpi = dpi
+        self.figure_size = tuple(figure_size) if figure_size is not None else None
+        self.quantize = quantize
+        self.colors = colors
+        self.quality = quality
+        self.dedupe = dedupe
+        self.dedupe_files = dedupe_files
+        self.reuse_figures = reuse_figures
+
+    @property
+    def extension(self):
+        return f'.{self.format}'
+
+    def cache_options(self):
+        ''' The options that change the saved image, for render cache keys and incremental fingerprints. '''
+        return {
+            'image_format': self.format,
+            'image_dpi': self.dpi,
+            'image_figure_size': self.figure_size,
+            'image_quantize': self.quantize and self.colors,
+            'image_quality': self.quality if self.format == 'webp' else None,
+        }
+
+
+DEFAULT_IMAGE_OPTIONS = ImageOptions()
+
+
+def save_figure(fig, filename, options: ImageOptions = None):
+    ''' Save a matplotlib figure to filename as options say, cropped to its contents. '''
+    options = options or DEFAULT_IMAGE_OPTIONS
+    if options.figure_size is not None:
+        fig.set_size_inches(options.figure_size)
+        fig.tight_layout()
+
+    if options.format == 'svg' or (options.format == 'png' and not options.quantize):
+        fig.savefig(filename, format=options.format, dpi=options.dpi, bbox_inches='tight')
+        return filename
+
+    # Quantized PNG and WebP: rasterize to a PNG in memory and re-encode it with Pillow
+    from PIL import Image
+
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format='png', dpi=options.dpi, bbox_inches='tight')
+    buffer.seek(0)
+    with Image.open(buffer) as image:
+        image = image.convert('RGB')
+        if options.format == 'png':
+            image.quantize(options.colors).save(filename, format='PNG', optimize=True)
+        else:
+            image.save(filename, format='WEBP', quality=options.quality, lossless=options.quality >= 100, method=6)
+    return filename
+
+
+def figure_key(save_figure_function, data, **kwargs) -> str:
+    '''
+    Identifies a chart before it is rasterized: the function that draws it, its data and its arguments.
+
+    :param save_figure_function: The function, or its qualified name, so a chart can be identified without importing
+        matplotlib
+    :param data: The DataFrame drawn, or a hash of it, e.g. `render_cache.hash_item_data` of the item, which does not
+        load file-backed data
+    '''
+    if not isinstance(save_figure_function, str):
+        save_figure_function = f'{save_figure_function.__module__}.{save_figure_function.__qualname__}'
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(save_figure_function.encode())
+    digest.update((data if isinstance(data, str) else hash_data_frame(data)).encode())
+    digest.update(repr(sorted(kwargs.items())).encode())
+    return digest.hexdigest()
+
+
+class ImageDeduplicator:
+    ''' The first file of every chart and every file content seen in one render. '''
+    def __init__(self, enabled=True, files=False):
+        '''
+        :param enabled: Deduplicate charts
+        :param files: Deduplicate files by contents
+        '''
+        self.enabled = enabled
+        self.files = files
+        self._figures = {}
+        # Size -> [path, digest or None until a second file of that size is seen] of the first file of every content
+        self._sizes = {}
+        # (device, inode) -> path of the first file of every content, so hard links to it are known without hashing
+        self._inodes = {}
+        self.duplicates = 0
+
+    @classmethod
+    def for_options(cls, options: ImageOptions):
+        return cls(options.dedupe, options.dedupe_files)
+
+    def claim_figure(self, key, file_path):
+        '''
+        :param key: figure_key() of the chart to be saved to file_path, or None to not deduplicate it
+        :return: The path the chart is saved to: file_path, or the path of the same chart claimed earlier. Claiming
+            the same key and path again returns that path, so a chart can be claimed before and while it is saved.
+        '''
+        if not self.enabled or key is None:
+            return file_path
+        first_path = self._figures.setdefault(key, file_path)
+        if str(first_path) != str(file_path):
+            self.duplicates += 1
+        return first_path
+
+    def dedupe_file(self, file_path):
+        '''
+        Files are compared by size first and only hashed if an earlier file has the same size. A hard link to an earlier
+        file is a duplicate without being read.
+
+        :return: file_path, or the path of an earlier file with the same contents, in which case file_path is removed
+        '''
+        if not self.files:
+            return file_path
+        stat = os.stat(file_path)
+        inode = (stat.st_dev, stat.st_ino)
+        first_path = self._inodes.get(inode)
+        if first_path is None:
+            first_path = self.find_contents(file_path, stat.st_size)
+        if first_path is None:
+            self._inodes[inode] = file_path
+            return file_path
+        if Path(first_path) != Path(file_path):
+            Path(file_path).unlink()
+            self.duplicates += 1
+        return first_path
+
+    def find_contents(self, file_path, size):
+        ''' The path of an earlier file with the same contents as file_path, or None after recording file_path. '''
+        candidates = self._sizes.setdefault(size, [])
+        if not candidates:
+            candidates.append([file_path, None])
+            return None
+
+        digest = hash_file(file_path)
+        for candidate in candidates:
+            if candidate[1] is None:
+                candidate[1] = hash_file(candidate[0])
+            if candidate[1] == digest:
+                return candidate[0]
+        candidates.append([file_path, digest])
+        return None
+
+
+def hash_file(file_path):
+    with open(file_path, 'rb') as file_obj:
+        return hash_file_obj(file_obj)
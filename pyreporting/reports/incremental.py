@@ -0,0 +1,185 @@
+'''
+Incremental re-rendering: reuse the files of items that did not change since the previous run of a report.
+
+Every run of a renderer in incremental mode writes a manifest.json next to the report. It records, per item unique key,
+a fingerprint of the item (its unique key, type, options and a hash of its data) and the files that were rendered for
+it. The next run finds the latest previous run of the same Report.unique_key, and for every item whose fingerprint did
+not change, hard-links the previous files into the new run instead of rendering them again.
+
+Rendered files (PNGs and copied attachments) and directories (the pages of paged tables and the tiles of heatmap
+pyramids) are reused, the directories by hard-linking every file in them. An item can also record metadata that the
+renderer needs to embed its reused files, e.g. the paging metadata of a table. The HTML is always built anew.
+'''
+import json
+import shutil
+from logging import getLogger
+from pathlib import Path
+
+from .fileutils import link_or_copy
+from .render_cache import RenderCache
+
+logger = getLogger(__name__)
+
+MANIFEST_FILE_NAME = 'manifest.json'
+
+MANIFEST_VERSION = 2
+
+# Attributes of an item that are not options: the data, which is hashed separately, and open files.
+NON_OPTION_ATTRIBUTES = ('data_source', 'file_obj')
+
+
+def item_options(item):
+    ''' The attributes of an item that can change how it is rendered. '''
+    return {
+        name: value for name, value in vars(item).items()
+        if name not in NON_OPTION_ATTRIBUTES and not name.startswith('_')
+    }
+
+
+def item_fingerprint(unique_id, item, renderer_name, **renderer_options) -> str:
+    return RenderCache.make_key(unique_id, item, renderer_name, **renderer_options, **item_options(item))
+
+
+class RunManifest:
+    def __init__(self, run_path, report_key, renderer_name, items=None):
+        '''
+        :param run_path: Directory of the run
+        :param report_key: Report.unique_key of the rendered report
+        :param renderer_name: Name of the renderer, e.g. 'bokeh' or 'email'
+        :param items: dict of unique_id -> {'fingerprint', 'files' (files and directories relative to run_path),
+            'metadata', 'reused'}. Items without files have no fingerprint, since there is nothing to reuse.
+        '''
+        self.run_path = Path(run_path)
+        self.report_key = report_key
+        self.renderer_name = renderer_name
+        self.items = items if items is not None else {}
+
+    @classmethod
+    def load(cls, run_path):
+        ''' The manifest of a run, or None if the run has no (readable) manifest. '''
+        manifest_path = Path(run_path) / MANIFEST_FILE_NAME
+        try:
+            manifest = json.loads(manifest_path.read_text())
+        except (OSError, ValueError):
+            return None
+        if manifest.get('version') != MANIFEST_VERSION:
+            return None
+        return cls(run_path, manifest['report_key'], manifest['renderer'], manifest['items'])
+
+    def save(self):
+        manifest = {
+            'version': MANIFEST_VERSION,
+            'report_key': self.report_key,
+            'renderer': self.renderer_name,
+            'items': self.items,
+        }
+        (self.run_path / MANIFEST_FILE_NAME).write_text(json.dumps(manifest, indent=2, sort_keys=True))
+
+    def record(self, unique_id, fingerprint, files, reused=False, metadata=None):
+        self.items[unique_id] = {
+            'fingerprint': fingerprint,
+            'files': [str(Path(file_path).resolve().relative_to(self.run_path.resolve())) for file_path in files],
+            'metadata': metadata,
+            'reused': reused,
+        }
+
+
+def find_previous_run(report_dir, report_key, renderer_name, exclude=None):
+    '''
+    The manifest of the latest run under report_dir (output_dir / report name) of the same report and renderer.
+
+    :param exclude: Run directory to skip, i.e. the one being rendered
+    '''
+    report_dir = Path(report_dir)
+    if not report_dir.is_dir():
+        return None
+
+    candidates = []
+    for manifest_path in report_dir.glob(f'*/{MANIFEST_FILE_NAME}'):
+        if exclude is not None and manifest_path.parent.resolve() == Path(exclude).resolve():
+            continue
+        manifest = RunManifest.load(manifest_path.parent)
+        if manifest is not None and manifest.report_key == report_key and manifest.renderer_name == renderer_name:
+            candidates.append((manifest_path.stat().st_mtime, manifest))
+    if not candidates:
+        return None
+    return max(candidates, key=lambda candidate: candidate[0])[1]
+
+
+class IncrementalRun:
+    ''' Reuse decisions and the new manifest for one incremental render. '''
+    def __init__(self, run_path, report, renderer_name, renderer_options=None):
+        '''
+        :param renderer_options: Options of the renderer that change its files, e.g. the image format; files rendered
+            with other options are not reused
+        '''
+        self.renderer_name = renderer_name
+        self.renderer_options = renderer_options or {}
+        self.previous = find_previous_run(Path(run_path).parent, report.get_unique_key(), renderer_name,
+                                          exclude=run_path)
+        self.manifest = RunManifest(run_path, report.get_unique_key(), renderer_name)
+        self._fingerprints = {}
+
+    def fingerprint(self, unique_id, item):
+        if unique_id not in self._fingerprints:
+            self._fingerprints[unique_id] = item_fingerprint(unique_id, item, self.renderer_name,
+                                                              **self.renderer_options)
+        return self._fingerprints[unique_id]
+
+    def previous_files(self, unique_id, item):
+        ''' Paths of the previous run's files for an unchanged item, or None if it has to be rendered. '''
+        if self.previous is None:
+            return None
+        entry = self.previous.items.get(unique_id)
+        if entry is None or not entry['files'] or entry['fingerprint'] != self.fingerprint(unique_id, item):
+            return None
+        files = [self.previous.run_path / relative_path for relative_path in entry['files']]
+        if not all(file_path.exists() for file_path in files):
+            return None
+        return files
+
+    def can_reuse(self, unique_id, item):
+        return self.previous_files(unique_id, item) is not None
+
+    def reuse(self, unique_id, item):
+        '''
+        Link the previous files of an unchanged item into this run.
+
+        :return: The paths of the files in this run, or None if the item has to be rendered
+        '''
+        previous_files = self.previous_files(unique_id, item)
+        if previous_files is None:
+            return None
+        files = []
+        for previous_file in previous_files:
+            file_path = self.manifest.run_path / previous_file.relative_to(self.previous.run_path)
+            file_path.parent.mkdir(parents=True, exist_ok=True)
+            if previous_file.is_dir():
+                shutil.copytree(previous_file, file_path, copy_function=link_or_copy)
+                files.append(file_path)
+            else:
+                files.append(link_or_copy(previous_file, file_path))
+        self.manifest.record(unique_id, self.fingerprint(unique_id, item), files, reused=True,
+                             metadata=self.previous.items[unique_id]['metadata'])
+        return files
+
+    def metadata(self, unique_id):
+        ''' The metadata recorded for an item in this run, e.g. the one of its reused files. '''
+        entry = self.manifest.items.get(unique_id)
+        return entry['metadata'] if entry is not None else None
+
+    def record(self, unique_id, item, files=(), metadata=None):
+        ''' Record the files (or directories) rendered for an item. Only the first record of an item counts, so
+        renderers can record every item once it is done without overwriting the files recorded while rendering it.
+
+        :param metadata: JSON-serializable data the renderer needs to embed the files when they are reused
+        '''
+        if unique_id not in self.manifest.items:
+            fingerprint = self.fingerprint(unique_id, item) if files else None
+            self.manifest.record(unique_id, fingerprint, files, metadata=metadata)
+
+    def save(self):
+        self.manifest.save()
+        reused = sum(entry['reused'] for entry in self.manifest.items.values())
+        logger.info(f'Reused the files of {reused} of {len(self.manifest.items)} items from '
+                    f'{self.previous.run_path if self.previous else "no previous run"}')
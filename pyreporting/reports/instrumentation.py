@@ -0,0 +1,270 @@
+'''
+Instrumentation of report rendering.
+
+Renderers report events to a list of RenderHooks: the start and end of the report, of every item (by its unique key) and
+of the phases of rendering an item. Phases can nest; a data load that happens during rasterization is reported inside
+the rasterize phase. TimingCollector is a built-in hook that records timings, bytes written and memory deltas, and
+dumps a per-report timing table and a Chrome trace (chrome://tracing, https://ui.perfetto.dev).
+
+    collector = TimingCollector(track_memory=True)
+    BokehReportRenderer(hooks=[collector]).render(report)
+    print(collector.timing_table())
+
+In parallel mode the rasterize and file copy phases measure the wait for the worker's result, not the work itself.
+'''
+import json
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from logging import getLogger
+from pathlib import Path
+
+logger = getLogger(__name__)
+
+# Phases of rendering an item
+DATA_LOAD = 'data_load'
+TRANSFORM = 'transform'
+FIGURE_BUILD = 'figure_build'
+RASTERIZE = 'rasterize'
+FILE_COPY = 'file_copy'
+SERIALIZE = 'serialize'
+
+PHASES = (DATA_LOAD, TRANSFORM, FIGURE_BUILD, RASTERIZE, FILE_COPY, SERIALIZE)
+
+
+class RenderHooks:
+    '''
+    Base class of instrumentation hooks; every method is a no-op. Events of the whole report, outside of any item, have
+    unique_id None. error is the exception that ended the item or phase, or None.
+    '''
+    def before_report(self, report, renderer_name):
+        pass
+
+    def after_report(self, report, output_path, error=None):
+        pass
+
+    def before_item(self, unique_id, item):
+        pass
+
+    def after_item(self, unique_id, item, error=None):
+        pass
+
+    def before_phase(self, unique_id, phase):
+        pass
+
+    def after_phase(self, unique_id, phase, bytes_written=0, error=None):
+        pass
+
+
+class Phase:
+    ''' Yielded by Instrumentation.phase(); the renderer sets bytes_written if the phase wrote a file. '''
+    def __init__(self, name):
+        self.name = name
+        self.bytes_written = 0
+
+
+class Instrumentation:
+    ''' Sends render events to hooks. Renderers always hold one; without hooks, every event is a no-op. '''
+    def __init__(self, hooks=()):
+        self.hooks = list(hooks)
+        self.unique_id = None
+
+    @contextmanager
+    def report(self, report, renderer_name):
+        ''' Context of rendering a report. Yields a dict; set 'output_path' in it for after_report. '''
+        context = {'output_path': None}
+        for hook in self.hooks:
+            hook.before_report(report, renderer_name)
+        error = None
+        try:
+            yield context
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            for hook in self.hooks:
+                hook.after_report(report, context['output_path'], error=error)
+
+    @contextmanager
+    def item(self, unique_id, item):
+        ''' Context of rendering an item; phases inside it are attributed to unique_id. '''
+        for hook in self.hooks:
+            hook.before_item(unique_id, item)
+        self.unique_id = unique_id
+        error = None
+        try:
+            yield
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            self.unique_id = None
+            for hook in self.hooks:
+                hook.after_item(unique_id, item, error=error)
+
+    @contextmanager
+    def phase(self, name):
+        ''' Context of a phase of the current item. '''
+        phase = Phase(name)
+        if not self.hooks:
+            yield phase
+            return
+
+        unique_id = self.unique_id
+        for hook in self.hooks:
+            hook.before_phase(unique_id, name)
+        error = None
+        try:
+            yield phase
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            for hook in self.hooks:
+                hook.after_phase(unique_id, name, bytes_written=phase.bytes_written, error=error)
+
+
+def file_size(file_path):
+    ''' Size of a written file, for Phase.bytes_written; 0 if it does not exist. '''
+    try:
+        return os.path.getsize(file_path)
+    except OSError:
+        return 0
+
+
+class TimingCollector(RenderHooks):
+    def __init__(self, trace_file_name='render_trace.json', track_memory=False, log_table=True):
+        '''
+        :param trace_file_name: Name of the Chrome trace written next to the rendered report. None to not write one.
+        :param track_memory: Record the change in memory allocated by Python (tracemalloc) per item and phase. Makes
+            rendering noticeably slower.
+        :param log_table: Log the timing table at INFO level after every report.
+        '''
+        self.trace_file_name = trace_file_name
+        self.track_memory = track_memory
+        self.log_table = log_table
+
+        # Start of the current report, which trace event timestamps are relative to
+        self.origin = time.perf_counter()
+        self.trace_events = []
+
+        # If this collector started tracemalloc for the current report, in which case it stops it after the report
+        self._started_tracing = False
+
+        # unique_id -> {'name', 'type', 'seconds', 'phases': {phase: seconds}, 'bytes_written', 'memory_delta'}
+        self.items = {}
+
+        # Open items and phases: [name, unique_id, start time, start memory, seconds spent in nested phases]
+        self._stack = []
+
+    def _memory(self):
+        return tracemalloc.get_traced_memory()[0] if self.track_memory else 0
+
+    def _open(self, name, unique_id):
+        self._stack.append([name, unique_id, time.perf_counter(), self._memory(), 0.0])
+
+    def _close(self, category, error, **args):
+        name, unique_id, start, start_memory, nested_seconds = self._stack.pop()
+        end = time.perf_counter()
+        seconds = end - start
+        memory_delta = self._memory() - start_memory
+        if category == 'phase' and self._stack and self._stack[-1][1] == unique_id:
+            self._stack[-1][4] += seconds
+
+        event_args = {'unique_id': unique_id, **args}
+        if self.track_memory:
+            event_args['memory_delta'] = memory_delta
+        if error is not None:
+            event_args['error'] = repr(error)
+        self.trace_events.append({
+            'name': name,
+            'cat': category,
+            'ph': 'X',
+            'ts': (start - self.origin) * 1e6,
+            'dur': seconds * 1e6,
+            'pid': os.getpid(),
+            'tid': threading.get_ident(),
+            'args': event_args,
+        })
+        return seconds, seconds - nested_seconds, memory_delta
+
+    def _item_row(self, unique_id):
+        return self.items.setdefault(unique_id, {
+            'name': '(report)' if unique_id is None else unique_id,
+            'type': '',
+            'seconds': 0.0,
+            'phases': {},
+            'bytes_written': 0,
+            'memory_delta': 0,
+        })
+
+    def before_report(self, report, renderer_name):
+        if self.track_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        # A collector reused for several reports only keeps the timings and trace of the last one
+        self.items = {}
+        self.trace_events = []
+        self.origin = time.perf_counter()
+        self._open(f'{renderer_name}: {report.get_name()}', None)
+
+    def after_report(self, report, output_path, error=None):
+        seconds, _, _ = self._close('report', error)
+        self._item_row(None)['seconds'] = seconds
+
+        try:
+            if self.log_table:
+                logger.info(f'Render timings of {report.get_name()}:\n{self.timing_table()}')
+            if self.trace_file_name and output_path is not None:
+                self.write_chrome_trace(Path(output_path) / self.trace_file_name)
+        finally:
+            if self._started_tracing:
+                tracemalloc.stop()
+                self._started_tracing = False
+
+    def before_item(self, unique_id, item):
+        self._item_row(unique_id)['type'] = type(item).__name__
+        self._open(unique_id, unique_id)
+
+    def after_item(self, unique_id, item, error=None):
+        seconds, _, memory_delta = self._close('item', error, item_type=type(item).__name__)
+        row = self._item_row(unique_id)
+        row['seconds'] += seconds
+        row['memory_delta'] += memory_delta
+
+    def before_phase(self, unique_id, phase):
+        self._open(phase, unique_id)
+
+    def after_phase(self, unique_id, phase, bytes_written=0, error=None):
+        _, self_seconds, _ = self._close('phase', error, bytes_written=bytes_written)
+        row = self._item_row(unique_id)
+        row['phases'][phase] = row['phases'].get(phase, 0.0) + self_seconds
+        row['bytes_written'] += bytes_written
+
+    def timing_table(self):
+        '''
+        One row per item, slowest first, with the time spent in each phase. Phase times exclude nested phases, so they
+        add up to at most the item's total.
+        '''
+        phases = [phase for phase in PHASES if any(phase in row['phases'] for row in self.items.values())]
+        header = f'{"unique key":<40} {"type":<26} {"total s":>9}' + ''.join(f' {phase:>12}' for phase in phases) + \
+            f' {"bytes":>12}'
+        if self.track_memory:
+            header += f' {"memory":>12}'
+
+        lines = [header, '-' * len(header)]
+        for row in sorted(self.items.values(), key=lambda item_row: item_row['seconds'], reverse=True):
+            line = f'{str(row["name"])[:40]:<40} {row["type"][:26]:<26} {row["seconds"]:>9.3f}'
+            line += ''.join(f' {row["phases"].get(phase, 0.0):>12.3f}' for phase in phases)
+            line += f' {row["bytes_written"]:>12}'
+            if self.track_memory:
+                line += f' {row["memory_delta"]:>12}'
+            lines.append(line)
+        return '\n'.join(lines)
+
+    def write_chrome_trace(self, trace_path):
+        ''' Write the recorded events in the Chrome trace event format. '''
+        with open(trace_path, 'w') as trace_file:
+            json.dump({'traceEvents': self.trace_events, 'displayTimeUnit': 'ms'}, trace_file)
@@ -0,0 +1,176 @@
+'''
+Static, windowed layout for large tables.
+
+Instead of embedding a whole DataFrame into report.html, the rows are written next to it as fixed-size pages that the
+browser loads on demand. Pages are small JS files (`pyreporting.receivePage(...)`) rather than JSON so they can be
+loaded with a <script> tag from a report opened via file://, where fetch() is not allowed.
+
+Layout for an item with unique_id `Report_Table_0` and `sort_columns=['price']`:
+
+    Files/Report_Table_0_pages/rows_00000.js      # rows in their original order
+    Files/Report_Table_0_pages/rows_00001.js
+    Files/Report_Table_0_pages/sort_0_00000.js    # rows sorted ascending by 'price'; descending reads these backwards
+    ...
+
+Missing values sort first (NA_POSITION), like react-table's default sort of the in-memory tables, which turns them into
+empty strings; descending, read backwards, they come last. An empty table gets one empty page per order, which still
+has the table's columns if it was given as a DataFrame or as chunks without rows.
+
+Pages are encoded and written one at a time, and the browser only keeps a bounded number of pages in memory.
+
+Sorted orders are the exception on the Python side: sorting needs every row, so a table with sort_columns is loaded
+whole into memory (chunks are concatenated) before any page is written. Leave sort_columns empty for tables that do not
+fit in memory; they are then paged chunk by chunk and can only be browsed in their original order.
+'''
+import json
+from pathlib import Path
+from urllib.parse import quote
+
+import pandas as pd
+
+from pyreporting.widgets.columnar import encode_data_frame
+
+DEFAULT_PAGE_SIZE = 1000
+
+# Where sorted orders put missing values; see the module docstring
+NA_POSITION = 'first'
+
+ORIGINAL_ORDER = 'rows'
+
+
+def iter_pages(chunks, page_size):
+    ''' Regroup consecutive chunks of rows into pages of page_size rows; only the last page can be shorter. '''
+    buffered = []
+    buffered_rows = 0
+    for chunk in chunks:
+        buffered.append(chunk)
+        buffered_rows += len(chunk)
+        if buffered_rows < page_size:
+            continue
+
+        rows = pd.concat(buffered) if len(buffered) > 1 else buffered[0]
+        full_pages_rows = len(rows) // page_size * page_size
+        for start in range(0, full_pages_rows, page_size):
+            yield rows.iloc[start:start + page_size]
+        remainder = rows.iloc[full_pages_rows:]
+        buffered = [remainder] if len(remainder) > 0 else []
+        buffered_rows = len(remainder)
+
+    if buffered_rows > 0:
+        yield pd.concat(buffered) if len(buffered) > 1 else buffered[0]
+
+
+def write_page(pages_dir: Path, key, order, page_number, page_df: pd.DataFrame, index=False):
+    ''' Write one page as a JS file that hands its columnar payload to the bundle. '''
+    payload = encode_data_frame(page_df, index=index)
+    page_path = pages_dir / f'{order}_{page_number:05d}.js'
+    with open(page_path, 'w') as page_file:
+        page_file.write(f'pyreporting.receivePage({json.dumps(key)}, {json.dumps(order)}, {page_number}, ')
+        json.dump(payload, page_file)
+        page_file.write(');\n')
+    return page_path
+
+
+def write_pages(data, report_path, unique_id, page_size=DEFAULT_PAGE_SIZE, sort_columns=(), index=False):
+    '''
+    Write the rows of a table as pages under `<report_path>/Files/<unique_id>_pages`.
+
+    :param data: The full table as a DataFrame, or an iterable of consecutive chunks of it. Chunks are consumed one at a
+        time, unless sort_columns are given.
+    :param report_path: The directory of report.html. URLs in the returned metadata are relative to it.
+    :param unique_id: The item's unique id, used to name the pages directory and to route pages in the browser.
+    :param page_size: Rows per page
+    :param sort_columns: Columns that can be sorted server-side. One extra set of pages, sorted ascending with missing
+        values first, is written per column. Sorting loads the whole table into memory: all chunks are concatenated
+        into one DataFrame first.
+    :param index: Include the index as a column of every page.
+    :return: (first page DataFrame, paging metadata for the widget)
+    '''
+    pages_dir = pages_path(report_path, unique_id)
+    pages_dir.mkdir(parents=True)
+
+    if isinstance(data, pd.DataFrame):
+        data = [data]
+    if sort_columns:
+        chunks = list(data)
+        data = [pd.concat(chunks) if chunks else pd.DataFrame()]
+
+    # The first chunk without its rows, for the columns of the page of an empty table
+    empty_pages = []
+
+    def empty_page():
+        return empty_pages[0] if empty_pages else pd.DataFrame()
+
+    first_page, row_count = write_order(pages_dir, unique_id, ORIGINAL_ORDER, keep_empty_page(data, empty_pages),
+                                        page_size, empty_page, index=index)
+
+    order_names = {}
+    for position, column in enumerate(sort_columns):
+        order = f'sort_{position}'
+        order_names[str(column)] = order
+        rows = data[0].sort_values(column, kind='mergesort', na_position=NA_POSITION) if row_count else data[0]
+        write_order(pages_dir, unique_id, order, [rows], page_size, empty_page, index=index)
+
+    paging = {
+        'key': unique_id,
+        'url': f'Files/{quote(pages_dir.name)}/',
+        'page_size': page_size,
+        'row_count': row_count,
+        'page_count': max(1, -(-row_count // page_size)),
+        'sort_orders': order_names,
+    }
+    return first_page, paging
+
+
+def pages_path(report_path, unique_id) -> Path:
+    ''' The directory write_pages() writes the pages of an item to. '''
+    return Path(report_path) / 'Files' / f'{unique_id}_pages'
+
+
+def keep_empty_page(chunks, empty_pages):
+    ''' Yield chunks, and append the first one without its rows to empty_pages. '''
+    for chunk in chunks:
+        if not empty_pages:
+            empty_pages.append(chunk.iloc[:0])
+        yield chunk
+
+
+def first_page(data, page_size=DEFAULT_PAGE_SIZE) -> pd.DataFrame:
+    '''
+    The first page write_pages() returns for data, reading only the chunks it needs, e.g. when the pages of an unchanged
+    table are reused from a previous run.
+    '''
+    if isinstance(data, pd.DataFrame):
+        return data.iloc[:page_size]
+    empty_pages = []
+    pages = iter_pages(keep_empty_page(data, empty_pages), page_size)
+    try:
+        page_df = next(pages, None)
+    finally:
+        # Close the rest of the chunks, e.g. a CSV reader
+        pages.close()
+        if hasattr(data, 'close'):
+            data.close()
+    if page_df is not None:
+        return page_df
+    return empty_pages[0] if empty_pages else pd.DataFrame()
+
+
+def write_order(pages_dir: Path, key, order, chunks, page_size, empty_page, index=False):
+    '''
+    Write the pages of one order of the rows. Without rows, one empty page is written.
+
+    :param empty_page: Returns the page of an empty table; called once chunks are consumed
+    :return: (first page DataFrame, row count)
+    '''
+    first_page = None
+    row_count = 0
+    for page_number, page_df in enumerate(iter_pages(chunks, page_size)):
+        if first_page is None:
+            first_page = page_df
+        row_count += len(page_df)
+        write_page(pages_dir, key, order, page_number, page_df, index=index)
+    if first_page is None:
+        first_page = empty_page()
+        write_page(pages_dir, key, order, 0, first_page, index=index)
+    return first_page, row_count
@@ -6,9 +6,18 @@ import matplotlib
 # matplotlib.use() must be called before pylab, matplotlib.pyplot, or matplotlib.backends is imported for the first time
 matplotlib.use('Agg')
 
+import threading
+from contextlib import contextmanager
+
 import matplotlib.dates as mdates
-import matplotlib.pyplot as plt
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.collections import PolyCollection
+from matplotlib.figure import Figure
+from matplotlib.patches import Patch
 import numpy as np
+import pandas as pd
+
+from .image_pipeline import save_figure
 # import statsmodels.api as stats
 # from statsmodels.sandbox.regression.predstd import wls_prediction_std
 #
@@ -80,7 +89,7 @@ def plot_positive_and_negative_stacked_bar_chart(data, ax, bar_width=1.0, bar_al
 
     # for each column, ensure we use the same color map across calls to plot_stacked_bars
     # get the color prop cycle, then map to column
-    prop_cycle = plt.rcParams['axes.prop_cycle']
+    prop_cycle = matplotlib.rcParams['axes.prop_cycle']
     colors = prop_cycle.by_key()['color']
     column_color_map = {column: color for column, color in zip(data.columns, colors)}
 
@@ -91,19 +100,133 @@ def plot_positive_and_negative_stacked_bar_chart(data, ax, bar_width=1.0, bar_al
     plot_stacked_bars(df_negative, ax, column_color_map=column_color_map, bar_width=bar_width, bar_alpha=bar_alpha)
 
 
-def generate_stacked_bar_plot_figure(data, title, y_label, bar_alpha=1.0, bar_width=1.0, figure_size=(18, 12)):
+def stacked_bar_vertices(x, values, bar_width=1.0):
     """
-    Take data, generate stacked bar plot, and return.
+    Rectangles of a stacked bar chart with positive values stacked upwards and negative values stacked downwards.
+
+    All bottoms come from one cumulative sum over the 2D array of values.
+
+    :param x: 1-d array of bar centers, one per row of values
+    :param values: 2-d array, rows x columns. NaN is treated as 0.
+    :param bar_width: Width of every bar, in x units
+    :return: (vertices with shape (n_bars, 4, 2), column index of every bar)
+    """
+    values = np.nan_to_num(np.asarray(values, dtype=np.float64))
+    positive = np.clip(values, 0.0, None)
+    negative = np.clip(values, None, 0.0)
+
+    # (value, bottom) for both signs, stacked along a new first axis: shape (2, rows, columns)
+    heights = np.stack([positive, negative])
+    bottoms = np.cumsum(heights, axis=2) - heights
+
+    # Zero-height bars would be invisible; skip them
+    sign, row, column = np.nonzero(heights)
+    bottom = bottoms[sign, row, column]
+    top = bottom + heights[sign, row, column]
+    left = x[row] - bar_width / 2.0
+    right = x[row] + bar_width / 2.0
+
+    vertices = np.stack([
+        np.column_stack([left, bottom]),
+        np.column_stack([left, top]),
+        np.column_stack([right, top]),
+        np.column_stack([right, bottom]),
+    ], axis=1)
+    return vertices, column
+
+
+def plot_stacked_bar_collection(data, ax, colors=None, bar_width=1.0, bar_alpha=1.0):
+    """
+    Plot a stacked bar chart allowing positive and negative values, without modifying `data`.
+
+    Equivalent to `plot_positive_and_negative_stacked_bar_chart`, but the date index is converted once and every bar is
+    drawn by a single PolyCollection instead of one `ax.bar` call per column and sign.
+
+    :param data: A pandas.DataFrame indexed by date
+    :param ax: Matplotlib axis
+    :param colors: The colors to use by column position; defaults to the axes color cycle.
+    :param bar_width: The width of every bar, in days
+    :param bar_alpha: The alpha of every bar
+    :return: Legend handles, one per column
+    """
+    if colors is None:
+        colors = matplotlib.rcParams['axes.prop_cycle'].by_key()['color']
+    column_colors = [colors[position % len(colors)] for position in range(len(data.columns))]
+
+    x = mdates.date2num(pd.DatetimeIndex(pd.to_datetime(data.index)).to_pydatetime())
+    vertices, columns = stacked_bar_vertices(x, data.to_numpy(dtype=np.float64, na_value=np.nan), bar_width=bar_width)
+
+    collection = PolyCollection(
+        vertices,
+        facecolors=[column_colors[column] for column in columns],
+        edgecolors='none',
+        linewidths=0,
+        alpha=bar_alpha,
+    )
+    ax.add_collection(collection)
+    ax.xaxis_date()
+    ax.autoscale_view()
+
+    return [Patch(facecolor=color, alpha=bar_alpha, label=column) for column, color in zip(data.columns, column_colors)]
+
+
+# Figure reused by the save_*_figure() functions in each thread, if ImageOptions.reuse_figures is set
+_reusable_figures = threading.local()
+
+SUBPLOT_PARAMETERS = ('left', 'right', 'bottom', 'top', 'wspace', 'hspace')
+
+
+def new_figure(figure_size=None):
+    """
+    Create a figure with its own Agg canvas. Unlike `matplotlib.pyplot.figure()`, the figure is not registered with
+    pyplot, so it is freed as soon as it is no longer referenced and never needs to be closed.
+
+    :param figure_size: (width, height) in inches; `rcParams['figure.figsize']` if None.
+    :return: The figure
+    """
+    fig = Figure(figsize=figure_size)
+    FigureCanvasAgg(fig)
+    return fig
+
+
+@contextmanager
+def figure_for_saving(figure_size=None, reuse=False):
+    """
+    Provide a figure to draw a chart on and save. The figure is cleared on exit, which releases its artists and the
+    data they hold as soon as the chart is saved.
+
+    :param figure_size: (width, height) in inches; `rcParams['figure.figsize']` if None.
+    :param reuse: Reuse one figure and canvas per thread instead of creating new ones for every chart.
+    """
+    if reuse:
+        fig = getattr(_reusable_figures, 'figure', None)
+        if fig is None:
+            fig = _reusable_figures.figure = new_figure(figure_size)
+        else:
+            fig.set_size_inches(figure_size or matplotlib.rcParams['figure.figsize'])
+            # tight_layout() moves the subplots; start every chart from the defaults
+            fig.subplotpars.update(**{name: matplotlib.rcParams[f'figure.subplot.{name}']
+                                      for name in SUBPLOT_PARAMETERS})
+    else:
+        fig = new_figure(figure_size)
+    try:
+        yield fig
+    finally:
+        fig.clear()
 
+
+def draw_stacked_bar_plot(fig, data, title, y_label, bar_alpha=1.0, bar_width=1.0):
+    """
+    Draw a stacked bar plot of data on an empty figure.
+
+    :param fig: The `matplotlib.figure.Figure` to draw on.
     :param data: A pandas data frame of values.
     :param title: The title of the output chart.
     :param y_label: The label for the y-axis
     :param bar_width: The `bar` argument passed into `matplotlib.axis.bar()`
     :param bar_alpha: The `alpha` argument passed into `matplotlib.axis.bar()`
-    :param figure_size: The `figsize` argument passed into `matplotlib.pyplot.figure()`
-    :return:
+    :return: The figure
     """
-    fig = plt.figure(figsize=figure_size)
     ax = fig.add_subplot(111)
     ax.set_title(title)
     ax.set_ylabel(y_label)
@@ -112,13 +235,69 @@ def generate_stacked_bar_plot_figure(data, title, y_label, bar_alpha=1.0, bar_wi
     setup_x_axis_with_major_ticks_on_years(ax)
 
     # plot stacked bars
-    plot_positive_and_negative_stacked_bar_chart(data, ax, bar_width=bar_width, bar_alpha=bar_alpha)
+    legend_handles = plot_stacked_bar_collection(data, ax, bar_width=bar_width, bar_alpha=bar_alpha)
 
     # plot sum of bars
     summation = np.sum(data, axis=1)
-    ax.plot(summation.index.to_pydatetime(), summation, color='black')
+    ax.plot(pd.to_datetime(summation.index).to_pydatetime(), summation, color='black')
 
-    plt.legend(loc='best')
-    plt.tight_layout()
+    ax.legend(handles=legend_handles, loc='best')
+    fig.tight_layout()
 
     return fig
+
+
+def generate_stacked_bar_plot_figure(data, title, y_label, bar_alpha=1.0, bar_width=1.0, figure_size=(18, 12)):
+    """
+    Take data, generate stacked bar plot, and return.
+
+    The figure is not managed by pyplot (see `new_figure()`), so it does not need to be closed.
+
+    :param data: A pandas data frame of values.
+    :param title: The title of the output chart.
+    :param y_label: The label for the y-axis
+    :param bar_width: The `bar` argument passed into `matplotlib.axis.bar()`
+    :param bar_alpha: The `alpha` argument passed into `matplotlib.axis.bar()`
+    :param figure_size: The size of the figure in inches
+    :return:
+    """
+    fig = new_figure(figure_size)
+    return draw_stacked_bar_plot(fig, data, title, y_label, bar_alpha=bar_alpha, bar_width=bar_width)
+
+
+def save_stacked_bar_plot_figure(data, filename, title, y_label, image_options=None, figure_size=(18, 12), **kwargs):
+    """
+    Generate a stacked bar plot, save it to `filename` and release the figure.
+
+    This is a module-level function so it can be sent to a process pool.
+
+    :param data: A pandas data frame of values.
+    :param filename: Where to save the image.
+    :param title: The title of the output chart.
+    :param y_label: The label for the y-axis
+    :param image_options: `ImageOptions` for the size and format of the image; a full size PNG if None.
+    :param figure_size: The size of the figure in inches
+    :param kwargs: Passed to `draw_stacked_bar_plot()`
+    :return: The filename
+    """
+    with figure_for_saving(figure_size, reuse=image_options is not None and image_options.reuse_figures) as fig:
+        draw_stacked_bar_plot(fig, data, title=title, y_label=y_label, **kwargs)
+        save_figure(fig, filename, image_options)
+    return filename
+
+
+def save_line_plot_figure(data, filename, image_options=None):
+    """
+    Plot every column of `data` as a line, save it to `filename` and release the figure.
+
+    This is a module-level function so it can be sent to a process pool.
+
+    :param data: A pandas data frame of values, indexed by x.
+    :param filename: Where to save the image.
+    :param image_options: `ImageOptions` for the size and format of the image; a PNG if None.
+    :return: The filename
+    """
+    with figure_for_saving(reuse=image_options is not None and image_options.reuse_figures) as fig:
+        data.plot(kind='line', ax=fig.add_subplot(111))
+        save_figure(fig, filename, image_options)
+    return filename
@@ -0,0 +1,186 @@
+'''
+On-disk cache of rendered artifacts (PNGs, HTML fragments, widget payloads).
+
+Entries are keyed by the item's unique id, its type, the renderer, a hash of the data behind it and the options that
+change the output, so an unchanged item is not rendered again on the next run. The cache is bounded in size and evicts
+the least recently used entries first.
+'''
+import hashlib
+import json
+import os
+import shutil
+from pathlib import Path
+
+import pandas as pd
+
+DEFAULT_MAX_BYTES = 1024 ** 3
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def hash_data_frame(df: pd.DataFrame) -> str:
+    ''' Fast content hash of a DataFrame, including its index, column names and dtypes. '''
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr(list(df.columns)).encode())
+    digest.update(repr(list(df.dtypes.astype(str))).encode())
+    digest.update(repr(df.index.name).encode())
+    digest.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def hash_file_obj(file_obj) -> str:
+    ''' Content hash of a file-like object. The read position is restored. '''
+    digest = hashlib.blake2b(digest_size=16)
+    position = file_obj.tell()
+    file_obj.seek(0)
+    while True:
+        chunk = file_obj.read(HASH_CHUNK_SIZE)
+        if not chunk:
+            break
+        digest.update(chunk.encode() if isinstance(chunk, str) else chunk)
+    file_obj.seek(position)
+    return digest.hexdigest()
+
+
+def hash_item_data(item) -> str:
+    '''
+    Hash of whatever backs an item: its data source (see `DataSource.fingerprint`, which does not read file-backed
+    data), its file contents or its text.
+    '''
+    if hasattr(item, 'data_source'):
+        return item.data_source.fingerprint()
+    if hasattr(item, 'as_data_frame'):
+        return hash_data_frame(item.as_data_frame())
+    if getattr(item, 'path', None) is not None:
+        # Path-backed file items: hash the file without keeping a handle open
+        with open(item.path, 'rb') as file_obj:
+            return hash_file_obj(file_obj)
+    if hasattr(item, 'file_obj'):
+        return hash_file_obj(item.file_obj)
+    return hashlib.blake2b(str(item.get_description()).encode(), digest_size=16).hexdigest()
+
+
+class RenderCache:
+    def __init__(self, cache_dir, max_bytes=DEFAULT_MAX_BYTES):
+        '''
+        :param cache_dir: Directory for the cache entries; shared between runs and renderers.
+        :param max_bytes: Least recently used entries are evicted once the cache grows beyond this size.
+        '''
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.total_bytes = sum(entry.stat().st_size for entry in self._entries())
+
+    @staticmethod
+    def make_key(unique_id, item, renderer, **options) -> str:
+        '''
+        :param unique_id: The item's key within the report
+        :param item: The ReportItem
+        :param renderer: Name of the renderer (e.g. 'bokeh', 'email')
+        :param options: Anything else that changes the output (output type, title, point budget, ...)
+        '''
+        key_parts = {
+            'unique_id': unique_id,
+            'item_type': f'{type(item).__module__}.{type(item).__qualname__}',
+            'renderer': renderer,
+            'data': hash_item_data(item),
+            'options': options,
+        }
+        serialized = json.dumps(key_parts, sort_keys=True, default=str)
+        return hashlib.blake2b(serialized.encode(), digest_size=20).hexdigest()
+
+    def _path(self, key, suffix=''):
+        return self.cache_dir / key[:2] / f'{key}{suffix}'
+
+    def _entries(self):
+        return (entry for entry in self.cache_dir.glob('*/*') if entry.is_file())
+
+    def _touch(self, entry_path):
+        # The modification time doubles as the last-used time for LRU eviction.
+        os.utime(entry_path)
+
+    def _lookup(self, key, suffix):
+        entry_path = self._path(key, suffix)
+        if entry_path.exists():
+            self.hits += 1
+            self._touch(entry_path)
+            return entry_path
+        self.misses += 1
+        return None
+
+    def _add(self, key, suffix, write):
+        entry_path = self._path(key, suffix)
+        entry_path.parent.mkdir(exist_ok=True)
+
+        # Write to a temporary name first so a concurrent reader never sees a partial entry.
+        temp_path = entry_path.with_name(f'.{entry_path.name}.{os.getpid()}.tmp')
+        write(temp_path)
+        previous_size = entry_path.stat().st_size if entry_path.exists() else 0
+        os.replace(temp_path, entry_path)
+        self.total_bytes += entry_path.stat().st_size - previous_size
+        self.evict()
+
+    def contains(self, key, suffix='') -> bool:
+        ''' If key is cached. Does not count as a hit or miss. '''
+        return self._path(key, suffix).exists()
+
+    def restore(self, key, dest_path, suffix='') -> bool:
+        ''' Copy the cached file for key to dest_path. Returns False on a cache miss. '''
+        entry_path = self._lookup(key, suffix)
+        if entry_path is None:
+            return False
+        shutil.copyfile(entry_path, dest_path)
+        return True
+
+    def store(self, key, source_path, suffix=''):
+        ''' Add a rendered file to the cache. '''
+        self._add(key, suffix, lambda temp_path: shutil.copyfile(source_path, temp_path))
+
+    def get_text(self, key, suffix='.txt'):
+        ''' Cached text for key, or None on a cache miss. '''
+        entry_path = self._lookup(key, suffix)
+        if entry_path is None:
+            return None
+        return entry_path.read_text()
+
+    def put_text(self, key, text, suffix='.txt'):
+        self._add(key, suffix, lambda temp_path: temp_path.write_text(text))
+
+    def text(self, key, build, suffix='.txt') -> str:
+        ''' Cached text for key, or the result of build(), which is then cached. '''
+        text = self.get_text(key, suffix)
+        if text is None:
+            text = build()
+            self.put_text(key, text, suffix)
+        return text
+
+    def json(self, key, build):
+        ''' Like text(), for JSON-serializable values such as widget payloads. '''
+        return json.loads(self.text(key, lambda: json.dumps(build()), suffix='.json'))
+
+    def evict(self):
+        ''' Remove least recently used entries until the cache fits in max_bytes. '''
+        if self.total_bytes <= self.max_bytes:
+            return
+        entries = sorted(((entry.stat(), entry) for entry in self._entries()), key=lambda pair: pair[0].st_mtime)
+        for stat, entry in entries:
+            if self.total_bytes <= self.max_bytes:
+                break
+            entry.unlink()
+            self.total_bytes -= stat.st_size
+            self.evictions += 1
+
+    def stats(self):
+        ''' Hit/miss counters since this object was created, plus the current size of the cache. '''
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'evictions': self.evictions,
+            'bytes': self.total_bytes,
+        }
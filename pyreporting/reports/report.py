@@ -3,6 +3,9 @@ from logging import getLogger
 
 logger = getLogger(__name__)
 
+# Number of duplicated keys named in the duplicate key warning
+MAX_DUPLICATES_LISTED = 5
+
 
 class Report:
     def __init__(self, name, unique_key=None):
@@ -13,13 +16,21 @@ class Report:
         self.unique_key = unique_key
         self.report_labels = []
 
+        # Index of the unique keys of self.items, extended as items are added; see _index_items()
+        self._keyed_items = []
+        self._items_by_key = {}
+        self._key_counts = {}
+        self._indexed_report_key = unique_key
+
     def add_item(self, item: ReportItem):
         ''' Add an item to the list of items '''
         self.items.append(item)
+        self._index_items()
 
     def add_items(self, items):
         ''' Add items to the list of items '''
         self.items.extend(items)
+        self._index_items()
 
     def get_items(self):
         ''' Get the list of items '''
@@ -28,22 +39,53 @@ class Report:
     def get_report_labels(self):
         return self.report_labels
 
+    def _index_items(self):
+        '''
+        Assign unique keys to the items added since the last call. The n-th item (from 0) with the item key K gets the
+        unique key '{report key}_{K}_{n}', so every item costs one counter lookup.
+
+        Items appended to self.items directly are indexed on the next call. The index is rebuilt if items were removed
+        or the report's unique key changed.
+        '''
+        items = self.get_items()
+        indexed = len(self._keyed_items)
+        if self._indexed_report_key != self.get_unique_key() or len(items) < indexed or \
+                (indexed and items[indexed - 1] is not self._keyed_items[-1][1]):
+            self._keyed_items = []
+            self._items_by_key = {}
+            self._key_counts = {}
+            self._indexed_report_key = self.get_unique_key()
+
+        for item in items[len(self._keyed_items):]:
+            item_key = item.get_unique_key()
+            count = self._key_counts.get(item_key, 0)
+            self._key_counts[item_key] = count + 1
+            lookup_key = f'{self._indexed_report_key}_{item_key}_{count}'
+            self._keyed_items.append((lookup_key, item))
+            self._items_by_key[lookup_key] = item
+
     def get_uniquely_keyed_items(self):
-        ''' Get a list of (unique_key, item) for each report item '''
-        results = []
-        keys_seen = set()
-        for item in self.get_items():
-            i = 0
-            while True:
-                lookup_key = f'{self.get_unique_key()}_{item.get_unique_key()}_{i}'
-                if lookup_key not in keys_seen:
-                    keys_seen.add(lookup_key)
-                    results.append((lookup_key, item))
-                    break
-                logger.warning(f'Duplicate lookup key found for item: {item.get_name()} key: {item.get_unique_key()}. '
-                               'Explicitly include proper unique keys to avoid ordering fragility for chart versioning.')
-                i += 1
-        return results
+        '''
+        Get a list of (unique_key, item) for each report item
+
+        Items are keyed when they are added, so changing an item's key afterwards does not change its unique key.
+        '''
+        self._index_items()
+
+        duplicates = {item_key: count for item_key, count in self._key_counts.items() if count > 1}
+        if duplicates:
+            listed = ', '.join(f'{item_key!r} ({count} items)'
+                               for item_key, count in list(duplicates.items())[:MAX_DUPLICATES_LISTED])
+            if len(duplicates) > MAX_DUPLICATES_LISTED:
+                listed += f' and {len(duplicates) - MAX_DUPLICATES_LISTED} more'
+            logger.warning(f'Duplicate lookup keys found in report {self.get_name()}: {listed}. '
+                           'Explicitly include proper unique keys to avoid ordering fragility for chart versioning.')
+        return list(self._keyed_items)
+
+    def get_item_by_unique_key(self, unique_key):
+        ''' The item with a unique key of get_uniquely_keyed_items(). Raises KeyError if there is none. '''
+        self._index_items()
+        return self._items_by_key[unique_key]
 
     def add_label(self, label):
         self.report_labels.append(label)
@@ -54,6 +96,28 @@ class Report:
     def get_unique_key(self):
         return self.unique_key
 
+    def iter_html(self):
+        '''
+        Render each item to HTML, one at a time.
+
+        :return: Generator of (html, list of assets referenced by the HTML) per item.
+        '''
+        for item in self.items:
+            yield item.render_html_snippet()
+
+    def write_html(self, file_obj):
+        '''
+        Render each item to HTML and write it to file_obj as soon as it is rendered, so the whole document is never held
+        in memory.
+
+        :return: List of assets referenced by the HTML.
+        '''
+        assets = []
+        for html, item_assets in self.iter_html():
+            file_obj.write(html)
+            assets.extend(item_assets)
+        return assets
+
     def render_to_html(self):
         '''
         Render each item to HTML, concatenate, and return
@@ -61,19 +125,24 @@ class Report:
         :return: Tuple of html and list of assets referenced by the HTML.
         '''
         # TODO: Consider adding any headers here (& footer below) or if that would just be an item in the list
-        concatenated_html = ''
-        concatenated_assets = []
+        html_chunks = []
+        assets = []
+        for html, item_assets in self.iter_html():
+            html_chunks.append(html)
+            assets.extend(item_assets)
+
+        return ''.join(html_chunks), assets
+
+    def iter_text(self):
+        ''' Render each item to TEXT, one at a time. '''
         for item in self.items:
-            html, assets = item.render_html_snippet()
-            concatenated_html += html
-            concatenated_assets += assets
+            yield item.render_text_snippet()
 
-        return concatenated_html, concatenated_assets
+    def write_text(self, file_obj):
+        ''' Render each item to TEXT and write it to file_obj as soon as it is rendered. '''
+        for text in self.iter_text():
+            file_obj.write(text)
 
     def render_to_text(self):
         ''' Render each item to TEXT, concatenate, and return '''
-        text = ''
-        for item in self.items:
-            text += item.render_text_snippet()
-
-        return text
+        return ''.join(self.iter_text())
@@ -0,0 +1,74 @@
+from .report_item import ReportItem
+from .data_source import DataSource, CsvDataSource, ParquetDataSource, ArrowFileDataSource, as_data_source,\
+    arrow_data_source, DEFAULT_CHUNK_SIZE
+
+
+class ReportDataItem(ReportItem):
+    '''
+    A ReportItem backed by tabular data. The data is held as a DataSource, so file-backed items are only read when they
+    are rendered and can be released afterwards.
+    '''
+    def __init__(self, data, name, description, unique_key=None):
+        '''
+        :param data: A pandas DataFrame or a DataSource
+        '''
+        super(ReportDataItem, self).__init__(name, description, unique_key)
+        self.data_source: DataSource = as_data_source(data)
+
+    @classmethod
+    def from_csv(cls, path, name, description, sep=',', index_col=0, read_csv_kwargs=None, **kwargs):
+        '''
+        :param path: Path of the CSV file. It is read when the item is rendered.
+        :param sep: Passed to pandas.read_csv, like index_col
+        :param read_csv_kwargs: Other options of pandas.read_csv, e.g. {'usecols': [...], 'dtype': {...}}
+        :param kwargs: Passed to the item's constructor
+        '''
+        data_source = CsvDataSource(path, sep=sep, index_col=index_col, **(read_csv_kwargs or {}))
+        return cls(data_source, name, description, **kwargs)
+
+    @classmethod
+    def from_parquet(cls, path, name, description, columns=None, filters=None, index_col=None, memory_map=True,
+                     **kwargs):
+        '''
+        :param path: Path of the Parquet file, or of a directory of Parquet files
+        :param columns: Columns to read; all of them if None
+        :param filters: Row filter, as a pyarrow.compute.Expression or e.g. [('price', '>', 0)]. Row groups that cannot
+            match are skipped.
+        :param index_col: Column to use as the index, if the file does not have a pandas index
+        :param memory_map: Memory-map the file instead of reading it into a buffer
+        :param kwargs: Passed to the item's constructor
+        '''
+        data_source = ParquetDataSource(path, columns=columns, filters=filters, index_col=index_col,
+                                        memory_map=memory_map)
+        return cls(data_source, name, description, **kwargs)
+
+    @classmethod
+    def from_feather(cls, path, name, description, columns=None, filters=None, index_col=None, memory_map=True,
+                     **kwargs):
+        ''' Like from_parquet(), for a Feather file. Feather does not store a pandas index, hence index_col. '''
+        data_source = ArrowFileDataSource(path, columns=columns, filters=filters, index_col=index_col,
+                                          memory_map=memory_map)
+        return cls(data_source, name, description, **kwargs)
+
+    @classmethod
+    def from_arrow(cls, source, name, description, columns=None, filters=None, index_col=None, memory_map=True,
+                   **kwargs):
+        ''' Like from_parquet(), for a pyarrow.Table or the path of an Arrow IPC file. '''
+        data_source = arrow_data_source(source, columns=columns, filters=filters, index_col=index_col,
+                                        memory_map=memory_map)
+        return cls(data_source, name, description, **kwargs)
+
+    def as_data_frame(self):
+        return self.data_source.load()
+
+    def iter_chunks(self, chunksize=DEFAULT_CHUNK_SIZE):
+        ''' Iterate over the data in chunks, without loading all of it if the source supports streaming. '''
+        return self.data_source.iter_chunks(chunksize)
+
+    def can_stream(self):
+        ''' If iter_chunks() would avoid reading all of the data into memory. '''
+        return self.data_source.streams and not self.data_source.loaded
+
+    def release_data(self):
+        ''' Free the loaded data of file-backed items; called by the renderers once the item has been rendered. '''
+        self.data_source.release()
@@ -1,4 +1,5 @@
 from . import ReportItem
+from .fileutils import copy_file
 
 from pathlib import Path
 from shutil import copyfileobj
@@ -7,25 +8,50 @@ from shutil import copyfileobj
 class ReportFileItem(ReportItem):
 
     # Can be given a file-like object, and can be provided with an extension in the case of an in-memory file.
-    def __init__(self, name, description, file_obj, extension=None):
+    def __init__(self, name, description, file_obj, extension=None, hardlink=False):
+        '''
+        :param file_obj: A file-like object, or the path of a file. Paths are not opened until the file is needed, and
+            are copied without reading the file into Python where the file system allows it.
+        :param hardlink: Hard-link a path into the report instead of copying it. Only for files that are not modified in
+            place afterwards, since the report would change with them.
+        '''
         super(ReportFileItem, self).__init__(name, description)
 
-        # Open the file automagically if someone provided a filename
-        if isinstance(file_obj, str) or isinstance(file_obj, Path):
-            filepath = Path(file_obj)
-            assert filepath.exists()
-            file_obj = open(file_obj, 'rb')
-
-        self.file_obj = file_obj
+        self.path = None
+        self._file_obj = None
         self.extension = extension
+        self.hardlink = hardlink
+
+        if isinstance(file_obj, str) or isinstance(file_obj, Path):
+            self.path = Path(file_obj)
+            assert self.path.exists()
+            implied_name = self.path.name
+        else:
+            self._file_obj = file_obj
+            implied_name = getattr(file_obj, 'name', None)
 
-        if hasattr(file_obj, 'name') and file_obj.name is not None:
-            implied_extension = Path(file_obj.name).suffix
+        if implied_name is not None:
+            implied_extension = Path(implied_name).suffix
 
             # If there is an implied extension, it should match the provided extension.
             assert self.extension is None or implied_extension is None or self.extension == implied_extension
             self.extension = implied_extension
 
+    @property
+    def file_obj(self):
+        ''' The file-like object of the item. Path-backed items open their file on first use; see close(). '''
+        if self._file_obj is None:
+            self._file_obj = open(self.path, 'rb')
+        return self._file_obj
+
+    def close(self):
+        '''
+        Close the file opened by file_obj for a path-backed item. File objects given by the caller are left open.
+        '''
+        if self.path is not None and self._file_obj is not None:
+            self._file_obj.close()
+            self._file_obj = None
+
     def render_text_snippet(self):
         return self.get_description()
 
@@ -37,6 +63,10 @@ class ReportFileItem(ReportItem):
 
         file_path = Path(output_path) / filename
         assert (not file_path.exists())
+
+        if self.path is not None:
+            return copy_file(self.path, file_path, hardlink=self.hardlink)
+
         self.file_obj.seek(0)
 
         # write in binary mode if the input was in binary mode.
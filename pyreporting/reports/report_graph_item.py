@@ -1,24 +1,32 @@
-import pandas
-from . import ReportItem
+from .report_data_item import ReportDataItem
+from .data_source import as_data_source
+from .downsampling import LTTB, DEFAULT_MAX_POINTS
 
 
-class ReportGraphItem(ReportItem):
+class ReportGraphItem(ReportDataItem):
 
     LINE = 'line'
     STACKED = 'stacked'
 
-    def __init__(self, data_frame, name, description, unique_key=None, output_type=LINE):
-        super(ReportGraphItem, self).__init__(name, description, unique_key)
-        self.data_frame = data_frame
+    def __init__(self, data_frame, name, description, unique_key=None, output_type=LINE, max_points=DEFAULT_MAX_POINTS,
+                 downsample=LTTB):
+        '''
+        :param max_points: For LINE output, columns longer than this are downsampled before plotting.
+        :param downsample: downsampling.LTTB or downsampling.MIN_MAX, or None to plot every point.
+        '''
+        super(ReportGraphItem, self).__init__(data_frame, name, description, unique_key)
         self.output_type = output_type
-
-    @classmethod
-    def from_csv(cls, path, name, description, sep=','):
-        data_frame = pandas.read_csv(path, sep=sep, index_col=0)
-        return cls(data_frame, name, description)
+        self.max_points = max_points
+        self.downsample = downsample
 
     def get_output_type(self):
         return self.output_type
 
-    def as_data_frame(self):
-        return self.data_frame
+    @property
+    def data_frame(self):
+        return self.as_data_frame()
+
+    @data_frame.setter
+    def data_frame(self, data):
+        ''' Replace the item's data with a DataFrame or a DataSource. '''
+        self.data_source = as_data_source(data)
@@ -2,4 +2,13 @@ from . import ReportTableItem
 
 
 class ReportHeatmapItem(ReportTableItem):
-    pass
+    def __init__(self, dataframe, name, description, colors=None, levels=False):
+        '''
+        :param colors: If set, the values are shipped to the browser as this many color codes (see
+            `pyreporting.reports.heatmap_tiles`) rather than as exact values. At most 256 codes take one byte per cell.
+        :param levels: Also ship coarser levels of the heatmap. The browser draws the coarsest first, then loads the
+            level that matches the size of the heatmap. Implies colors, 256 by default.
+        '''
+        super(ReportHeatmapItem, self).__init__(dataframe, name, description)
+        self.colors = colors
+        self.levels = levels
@@ -1,8 +1,24 @@
 from . import ReportTableItem
+from .downsampling import LTTB
 
 
 class ReportInteractivePlotItem(ReportTableItem):
+    def __init__(self, dataframe, name, description, max_points=None, downsample=LTTB, float32=False):
+        '''
+        :param max_points: If set, every column longer than this is downsampled on its own to about max_points points.
+        :param downsample: downsampling.LTTB or downsampling.MIN_MAX, or None to plot every point.
+        :param float32: Ship the values as float32 instead of float64, halving the size of the report.
+        '''
+        super(ReportInteractivePlotItem, self).__init__(dataframe, name, description)
+        self.max_points = max_points
+        self.downsample = downsample
+        self.float32 = float32
+
     def item_as_traces(self):
+        '''
+        One {'name', 'x', 'y'} dict of Python lists per column. Renderers use `columnar.encode_traces` instead, which
+        does not create a Python object per point.
+        '''
         df = self.dataframe
         x = list(df.index.values)
         traces = []
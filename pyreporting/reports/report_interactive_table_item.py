@@ -2,4 +2,13 @@ from . import ReportTableItem
 
 
 class ReportInteractiveTableItem(ReportTableItem):
-    pass
+    def __init__(self, dataframe, name, description, page_size=None, sort_columns=()):
+        '''
+        :param page_size: If set, only the first page_size rows are embedded in the report; the rest is written next to
+            it in pages of page_size rows and loaded by the browser on demand.
+        :param sort_columns: With page_size, the columns that can be sorted across the whole table. The whole table is
+            then loaded into memory when rendering, even from a streaming data source.
+        '''
+        super(ReportInteractiveTableItem, self).__init__(dataframe, name, description)
+        self.page_size = page_size
+        self.sort_columns = list(sort_columns)
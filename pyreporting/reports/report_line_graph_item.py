@@ -1,16 +1,23 @@
-from .report_item import ReportItem
-import pandas
+from .report_data_item import ReportDataItem
+from .data_source import as_data_source
+from .downsampling import LTTB, DEFAULT_MAX_POINTS
 
 
-class ReportLineGraphItem(ReportItem):
-    def __init__(self, data_frame, name, description, unique_key=None):
-        super(ReportLineGraphItem, self).__init__(name, description, unique_key)
-        self.data_frame = data_frame
+class ReportLineGraphItem(ReportDataItem):
+    def __init__(self, data_frame, name, description, unique_key=None, max_points=DEFAULT_MAX_POINTS, downsample=LTTB):
+        '''
+        :param max_points: Columns longer than this are downsampled before plotting.
+        :param downsample: downsampling.LTTB or downsampling.MIN_MAX, or None to plot every point.
+        '''
+        super(ReportLineGraphItem, self).__init__(data_frame, name, description, unique_key)
+        self.max_points = max_points
+        self.downsample = downsample
 
-    @classmethod
-    def from_csv(cls, path, name, description, sep=',', unique_key=None):
-        dataframe = pandas.read_csv(path, sep=sep, index_col=0)
-        return cls(dataframe, name, description, unique_key=unique_key)
+    @property
+    def data_frame(self):
+        return self.as_data_frame()
 
-    def as_data_frame(self):
-        return self.data_frame
+    @data_frame.setter
+    def data_frame(self, data):
+        ''' Replace the item's data with a DataFrame or a DataSource. '''
+        self.data_source = as_data_source(data)
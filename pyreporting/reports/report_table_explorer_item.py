@@ -1,5 +1,28 @@
 from . import ReportTableItem
+from .table_summary import DEFAULT_BINS
 
 
 class ReportTableExplorerItem(ReportTableItem):
-    pass
+    def __init__(self, dataframe, name, description, page_size=None, sort_columns=(), summary=False, bins=DEFAULT_BINS,
+                 row_bins=True, pca=True, include_rows=True):
+        '''
+        :param page_size: If set, the table is paged like ReportInteractiveTableItem and the explorer panels only use
+            the first page_size rows.
+        :param sort_columns: With page_size, the columns that can be sorted across the whole table. The whole table is
+            then loaded into memory when rendering, even from a streaming data source.
+        :param summary: Ship statistics, histograms and optionally cross-filter bins and PCA of the whole table,
+            computed when rendering (see `pyreporting.reports.table_summary`), so the browser does not compute them
+            from the rows.
+        :param bins: With summary, the number of bins of the histograms.
+        :param row_bins: With summary, also ship the bin of every row of every numeric column, for cross-filtering.
+        :param pca: With summary, also ship the principal components and the projections of the rows onto them.
+        :param include_rows: If False, only ship the summary, not the rows themselves. Implies summary.
+        '''
+        super(ReportTableExplorerItem, self).__init__(dataframe, name, description)
+        self.page_size = page_size
+        self.sort_columns = list(sort_columns)
+        self.summary = summary or not include_rows
+        self.bins = bins
+        self.row_bins = row_bins
+        self.pca = pca
+        self.include_rows = include_rows
@@ -1,17 +1,30 @@
-from .report_item import ReportItem
+from .report_data_item import ReportDataItem
+from .data_source import as_data_source
 import pandas as pd
 
 
-class ReportTableItem(ReportItem):
+class ReportTableItem(ReportDataItem):
     def __init__(self, dataframe: pd.DataFrame, name: str, description: str):
-        super(ReportTableItem, self).__init__(name, description)
-        self.dataframe = dataframe
+        '''
+        :param dataframe: A pandas DataFrame or a DataSource
+        '''
+        super(ReportTableItem, self).__init__(dataframe, name, description)
 
     @classmethod
-    def from_csv(cls, path, name, description, sep=','):
+    def from_csv(cls, path, name, description, sep=',', index_col=0, read_csv_kwargs=None, **kwargs):
         # TODO: parse dates when formatting works.
-        dataframe = pd.read_csv(path, sep=sep, parse_dates=False, index_col=0)
-        return cls(dataframe, name, description)
+        read_csv_kwargs = {'parse_dates': False, **(read_csv_kwargs or {})}
+        return super(ReportTableItem, cls).from_csv(path, name, description, sep=sep, index_col=index_col,
+                                                    read_csv_kwargs=read_csv_kwargs, **kwargs)
 
     def as_data_frame(self) -> pd.DataFrame:
-        return self.dataframe
+        return self.data_source.load()
+
+    @property
+    def dataframe(self) -> pd.DataFrame:
+        return self.as_data_frame()
+
+    @dataframe.setter
+    def dataframe(self, data: pd.DataFrame):
+        ''' Replace the item's data with a DataFrame or a DataSource. '''
+        self.data_source = as_data_source(data)
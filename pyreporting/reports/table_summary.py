@@ -0,0 +1,167 @@
+'''
+Summary of a table for the table explorer, computed once in Python instead of from the raw rows in every browser.
+
+For the numeric columns of a table, the summary holds:
+
+* stats: count, missing, mean, std, min, quartiles and max of every column
+* histograms: the edges and counts of `bins` equal-width bins per column
+* bins: optionally, the bin of every row in every column as a uint8 array (MISSING_BIN for missing values), from which
+  the browser recomputes the histograms of the rows selected in other columns (cross-filtering) without the rows
+* pca: optionally, the principal components of the complete rows (centered, not scaled, like the explorer's own PCA) and
+  the projection of every row onto the first PCA_PROJECTED_COMPONENTS of them, as float32 arrays
+
+Infinite values count as missing. Everything is computed on the whole numeric block at once with NumPy.
+'''
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from pyreporting.widgets.columnar import encode_buffer
+
+DEFAULT_BINS = 32
+
+# Bin of missing values; bins are stored as uint8, so there are at most MISSING_BIN bins
+MISSING_BIN = 255
+
+PCA_PROJECTED_COMPONENTS = 2
+
+QUANTILES = (0.25, 0.5, 0.75)
+
+STATS = ('count', 'missing', 'mean', 'std', 'min', 'p25', 'median', 'p75', 'max')
+
+
+def json_floats(values) -> list:
+    ''' values as a list of floats, with None for NaN and infinities, which are not valid JSON. '''
+    values = np.asarray(values, dtype=np.float64)
+    return [float(value) if np.isfinite(value) else None for value in values]
+
+
+def numeric_block(df: pd.DataFrame):
+    '''
+    (names of the numeric columns, their values as a 2-d float64 array with NaN for missing and infinite values)
+    '''
+    positions = [
+        position for position, dtype in enumerate(df.dtypes)
+        if pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype)
+    ]
+    values = df.iloc[:, positions].to_numpy(dtype=np.float64, na_value=np.nan)
+    infinite = np.isinf(values)
+    if infinite.any():
+        # A new array, since values can be a view of df
+        values = np.where(infinite, np.nan, values)
+    return [str(df.columns[position]) for position in positions], values
+
+
+def column_stats(values: np.ndarray) -> dict:
+    ''' Statistics of every column of a 2-d array, ignoring NaNs. Columns without values get None. '''
+    if values.shape[1] == 0:
+        return {stat: [] for stat in STATS}
+    present = ~np.isnan(values)
+    with warnings.catch_warnings():
+        # All-NaN columns
+        warnings.simplefilter('ignore', category=RuntimeWarning)
+        quantiles = np.nanquantile(values, QUANTILES, axis=0) if len(values) else np.full((3, values.shape[1]), np.nan)
+        stats = {
+            'count': present.sum(axis=0).tolist(),
+            'missing': (~present).sum(axis=0).tolist(),
+            'mean': json_floats(np.nanmean(values, axis=0)),
+            'std': json_floats(np.nanstd(values, axis=0, ddof=1)),
+            'min': json_floats(np.min(values, axis=0, initial=np.inf, where=present)),
+            'p25': json_floats(quantiles[0]),
+            'median': json_floats(quantiles[1]),
+            'p75': json_floats(quantiles[2]),
+            'max': json_floats(np.max(values, axis=0, initial=-np.inf, where=present)),
+        }
+    return stats
+
+
+def bin_indexes(values: np.ndarray, bins=DEFAULT_BINS):
+    '''
+    Equal-width binning of every column of a 2-d array between its minimum and maximum.
+
+    :return: (bin of every value as a uint8 array shaped like values, MISSING_BIN for NaN and infinities; edges,
+        shaped (columns, bins + 1); counts, shaped (columns, bins))
+    '''
+    if not 0 < bins < MISSING_BIN:
+        raise ValueError(f'bins must be between 1 and {MISSING_BIN - 1}, got {bins}')
+    cols = values.shape[1]
+    present = np.isfinite(values)
+    low = np.min(values, axis=0, initial=np.inf, where=present)
+    high = np.max(values, axis=0, initial=-np.inf, where=present)
+    empty = ~np.isfinite(low)
+    low[empty], high[empty] = 0.0, 0.0
+    width = np.where(high > low, (high - low) / bins, 1.0)
+
+    with np.errstate(invalid='ignore'):
+        scaled = np.floor((values - low) / width)
+    indexes = np.full(values.shape, MISSING_BIN, dtype=np.uint8)
+    indexes[present] = np.clip(scaled[present], 0, bins - 1)
+
+    # One bincount for all columns: offset the bins of every column, with one extra slot per column for missing values
+    offsets = np.arange(cols, dtype=np.int64) * (bins + 1)
+    slots = np.where(present, indexes, bins) + offsets
+    counts = np.bincount(slots.ravel(), minlength=cols * (bins + 1)).reshape(cols, bins + 1)[:, :bins]
+
+    edges = low[:, np.newaxis] + width[:, np.newaxis] * np.arange(bins + 1)
+    return indexes, edges, counts
+
+
+def principal_components(values: np.ndarray, columns, projected_components=PCA_PROJECTED_COMPONENTS):
+    '''
+    PCA of the rows of values without NaNs or infinities, through the SVD of the centered rows.
+
+    :return: dict with 'columns', 'eigenvalues', 'explained_variance', 'eigenvectors' (one list per component, one value
+        per column) and 'projections' (one encoded float32 array per projected component, NaN for incomplete rows); or
+        None if there are fewer than two columns or two complete rows.
+    '''
+    complete = np.isfinite(values).all(axis=1)
+    if values.shape[1] < 2 or complete.sum() < 2:
+        return None
+
+    mean = values[complete].mean(axis=0)
+    centered = values[complete] - mean
+    _, singular_values, components = np.linalg.svd(centered, full_matrices=False)
+    variances = singular_values ** 2
+    total_variance = variances.sum()
+
+    projected = min(projected_components, len(components))
+    projections = np.full((len(values), projected), np.nan, dtype=np.float32)
+    projections[complete] = centered @ components[:projected].T
+
+    return {
+        'columns': list(columns),
+        'eigenvalues': json_floats(variances / (complete.sum() - 1)),
+        'explained_variance': json_floats(variances / total_variance if total_variance > 0 else variances),
+        'eigenvectors': [json_floats(component) for component in components],
+        'projections': [encode_buffer(projections[:, position], 'float32') for position in range(projected)],
+    }
+
+
+def summarize_table(df: pd.DataFrame, bins=DEFAULT_BINS, row_bins=True, pca=True) -> dict:
+    '''
+    Summary of the numeric columns of df for the table explorer.
+
+    :param bins: Bins of the histograms, at most MISSING_BIN - 1.
+    :param row_bins: Also ship the bin of every row, for cross-filtering. One byte per row and numeric column.
+    :param pca: Also compute the principal components and the projection of every row onto the first ones.
+    :return: dict with 'row_count', 'columns' (the numeric ones), 'other_columns', 'stats' (name -> one value per
+        column), 'histograms' ({'edges', 'counts'}, one list per column), 'bins' (one encoded uint8 array per column, or
+        None), 'missing_bin' and 'pca' (see principal_components(), or None)
+    '''
+    columns, values = numeric_block(df)
+    indexes, edges, counts = bin_indexes(values, bins)
+    numeric_columns = set(columns)
+    return {
+        'row_count': len(df),
+        'columns': columns,
+        'other_columns': [str(column) for column in df.columns if str(column) not in numeric_columns],
+        'stats': column_stats(values),
+        'histograms': {
+            'edges': [json_floats(column_edges) for column_edges in edges],
+            'counts': counts.tolist(),
+        },
+        'bins': [encode_buffer(column_bins, 'uint8') for column_bins in indexes.T] if row_bins else None,
+        'missing_bin': MISSING_BIN,
+        'pca': principal_components(values, columns) if pca else None,
+    }
@@ -1,4 +1,39 @@
-from .interactive_plot import InteractivePlotWidget
-from .interactive_table import InteractiveTableWidget
-from .heatmap import HeatmapWidget
-from .table_explorer import TableExplorerWidget
+'''
+Bokeh widgets backed by React components.
+
+The widgets are imported on first use (PEP 562), so that e.g. `pyreporting.widgets.columnar` can be used without
+importing Bokeh.
+'''
+from importlib import import_module
+from typing import TYPE_CHECKING
+
+# Public name -> module that defines it
+_LAZY_IMPORTS = {
+    'InteractivePlotWidget': 'interactive_plot',
+    'InteractiveTableWidget': 'interactive_table',
+    'HeatmapWidget': 'heatmap',
+    'TableExplorerWidget': 'table_explorer',
+}
+
+__all__ = list(_LAZY_IMPORTS)
+
+
+def __getattr__(name):
+    module_name = _LAZY_IMPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    value = getattr(import_module(f'.{module_name}', __name__), name)
+    # Later lookups find the name without calling __getattr__
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
+
+
+if TYPE_CHECKING:
+    from .interactive_plot import InteractivePlotWidget
+    from .interactive_table import InteractiveTableWidget
+    from .heatmap import HeatmapWidget
+    from .table_explorer import TableExplorerWidget
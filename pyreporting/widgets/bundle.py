@@ -0,0 +1,178 @@
+'''
+Prebuilt bundle of the widget implementations.
+
+Bokeh compiles the `__implementation__` of every widget with Node.js once per process, and inlines the result into every
+HTML file it saves. With a prebuilt bundle, the implementations are compiled once per version of their sources and of
+Bokeh, and saved to a file named after that version in a cache directory. Rendered reports reference a copy of that file
+next to them instead of inlining it, and need no Node.js on hosts where the cache already has the bundle:
+
+    # Once, on a host with Node.js; then copy the cache directory to the render hosts
+    $ python -m pyreporting.widgets.bundle --cache-dir /shared/pyreporting-bundles
+
+    BokehReportRenderer(prebuilt_widgets=True, widget_cache_dir='/shared/pyreporting-bundles')
+
+The compiled implementation of each widget is cached in the same directory too, so a change to one widget only
+recompiles that widget.
+'''
+import argparse
+import hashlib
+import json
+import os
+from contextlib import contextmanager
+from importlib import import_module
+from pathlib import Path
+
+import bokeh
+from bokeh.model import Model
+from bokeh.resources import Resources
+from bokeh.util import compiler
+
+DEFAULT_CACHE_DIR = Path(os.environ.get('PYREPORTING_BUNDLE_DIR', Path.home() / '.cache' / 'pyreporting' / 'bundles'))
+
+BUNDLE_BASE_NAME = 'pyreporting-widgets'
+
+# Modules that import bokeh.util.compiler.bundle_all_models by name and call it to inline the custom models into the
+# documents they save
+BUNDLE_ALL_MODELS_MODULES = ('bokeh.util.compiler', 'bokeh.embed.util', 'bokeh.embed.standalone')
+
+# Bokeh's own compiler, which compile_cache() wraps
+_nodejs_compile = compiler.nodejs_compile
+
+# Custom model names -> bundle of the custom models other than the widgets, like Bokeh's cache of bundle_all_models()
+_other_models_bundles = {}
+
+
+def widget_classes():
+    from . import HeatmapWidget, InteractiveTableWidget, InteractivePlotWidget, TableExplorerWidget
+    return [HeatmapWidget, InteractiveTableWidget, InteractivePlotWidget, TableExplorerWidget]
+
+
+def source_key(*parts) -> str:
+    ''' Version of compiled sources: the sources, their languages and Bokeh's version. '''
+    digest = hashlib.blake2b(digest_size=16)
+    for part in (bokeh.__version__,) + parts:
+        digest.update(part.encode())
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+def implementation_key(model: compiler.CustomModel, implementation) -> str:
+    ''' Version of a model's compiled implementation, including its name, which the bundle registers it under. '''
+    return source_key(model.full_name, implementation.lang, implementation.code)
+
+
+def bundle_key(classes) -> str:
+    ''' Version of the bundle of classes: the versions of their implementations. '''
+    digest = hashlib.blake2b(digest_size=8)
+    for cls in sorted(classes, key=lambda cls: cls.__name__):
+        model = compiler.CustomModel(cls)
+        digest.update(implementation_key(model, model.implementation).encode())
+    return digest.hexdigest()
+
+
+def write_atomically(path: Path, text):
+    ''' Write text to path so that concurrent readers, e.g. other batch workers, never see a partial file. '''
+    temporary_path = path.with_name(f'{path.name}.{os.getpid()}.tmp')
+    temporary_path.write_text(text, encoding='utf-8')
+    os.replace(temporary_path, path)
+
+
+@contextmanager
+def compile_cache(cache_dir=None):
+    '''
+    Within the context, Bokeh looks up compiled sources in cache_dir before compiling them with Node.js, and caches what
+    it compiles. Not thread-safe: it swaps `bokeh.util.compiler.nodejs_compile`, which bundle_models() calls for every
+    implementation and module it bundles.
+    '''
+    models_dir = Path(cache_dir or DEFAULT_CACHE_DIR) / 'models'
+    models_dir.mkdir(parents=True, exist_ok=True)
+
+    def cached_compile(code, lang='javascript', file=None):
+        # The file is only used in error messages, and errors are not cached
+        cache_path = models_dir / f'{source_key(lang, code)}.json'
+        try:
+            return compiler.AttrDict(json.loads(cache_path.read_text(encoding='utf-8')))
+        except (OSError, ValueError):
+            pass
+        compiled = _nodejs_compile(code, lang=lang, file=file)
+        if 'error' not in compiled:
+            write_atomically(cache_path, json.dumps(dict(compiled)))
+        return compiled
+
+    original = compiler.nodejs_compile
+    compiler.nodejs_compile = cached_compile
+    try:
+        yield
+    finally:
+        compiler.nodejs_compile = original
+
+
+def build_widget_bundle(cache_dir=None) -> Path:
+    '''
+    The path of the bundle of the widget implementations in cache_dir. Built, which needs Node.js, if the cache does not
+    have the bundle of the current sources and Bokeh version yet.
+    '''
+    cache_dir = Path(cache_dir or DEFAULT_CACHE_DIR)
+    classes = widget_classes()
+    bundle_path = cache_dir / f'{BUNDLE_BASE_NAME}-{bundle_key(classes)}.js'
+    if bundle_path.exists():
+        return bundle_path
+
+    with compile_cache(cache_dir):
+        bundle = compiler.bundle_models(classes)
+    write_atomically(bundle_path, bundle)
+    return bundle_path
+
+
+class BundleResources(Resources):
+    def __init__(self, bundle_urls, **kwargs):
+        '''
+        Bokeh resources that also load bundle_urls, after Bokeh itself since the bundles register models with it.
+
+        :param kwargs: Passed to `bokeh.resources.Resources`
+        '''
+        super(BundleResources, self).__init__(**kwargs)
+        self.bundle_urls = list(bundle_urls)
+
+    @property
+    def js_files(self):
+        return super(BundleResources, self).js_files + self.bundle_urls
+
+
+def bundle_other_models():
+    ''' Like `bokeh.util.compiler.bundle_all_models`, without the widgets. '''
+    widgets = set(widget_classes())
+    models = [model for model in Model.model_class_reverse_map.values()
+              if model not in widgets and getattr(model, '__implementation__', None) is not None]
+    key = tuple(sorted(compiler.CustomModel(model).full_name for model in models))
+    if key not in _other_models_bundles:
+        _other_models_bundles[key] = compiler.bundle_models(models) or ''
+    return _other_models_bundles[key]
+
+
+@contextmanager
+def referenced_widget_bundle():
+    '''
+    Within the context, Bokeh does not inline the implementations of the widgets into the documents it saves; load them
+    with BundleResources instead. Not thread-safe: it swaps bundle_all_models in the modules that save documents.
+    '''
+    modules = [import_module(name) for name in BUNDLE_ALL_MODELS_MODULES]
+    originals = [module.bundle_all_models for module in modules]
+    for module in modules:
+        module.bundle_all_models = bundle_other_models
+    try:
+        yield
+    finally:
+        for module, original in zip(modules, originals):
+            module.bundle_all_models = original
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Build the bundle of the widget implementations.')
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR, help=f'Default: {DEFAULT_CACHE_DIR}')
+    args = parser.parse_args(argv)
+    print(build_widget_bundle(args.cache_dir))
+
+
+if __name__ == '__main__':
+    main()
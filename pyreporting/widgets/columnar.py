@@ -0,0 +1,140 @@
+# Created: 10/18/26
+'''
+Columnar, binary encoding of pandas objects for the React widgets.
+
+Instead of shipping one JSON token per cell, every column is sent as a little-endian typed array, base64 encoded, which
+the JS side (`utils/columnarHelpers.js`) decodes straight into the matching TypedArray. Example payload:
+
+    {
+        'columns': ['30d_apply', '60d_apply'],
+        'index_name': 'date',
+        'index': {'dtype': 'string', 'length': 2, 'values': ['2017-01-01', '2017-01-11']},
+        'data': [
+            {'dtype': 'float64', 'length': 2, 'buffer': 'mpmZmZmZ8T/NzMzMzMz8Pw=='},
+            {'dtype': 'float64', 'length': 2, 'buffer': 'ZmZmZmZmCkCamZmZmZkNQA=='},
+        ],
+    }
+'''
+import base64
+
+import numpy as np
+import pandas as pd
+
+# dtypes that have a TypedArray counterpart in the browser
+TYPED_ARRAY_DTYPES = {'int8', 'int16', 'int32', 'uint8', 'uint16', 'uint32', 'float32', 'float64'}
+
+INT32_MIN = np.iinfo(np.int32).min
+INT32_MAX = np.iinfo(np.int32).max
+
+
+def encode_buffer(values: np.ndarray, dtype: str) -> dict:
+    ''' Encode a 1-d numeric array as a base64 little-endian buffer of the given dtype. '''
+    array = np.ascontiguousarray(values, dtype=np.dtype(dtype).newbyteorder('<'))
+    return {
+        'dtype': dtype,
+        'length': len(array),
+        'buffer': base64.b64encode(array.tobytes()).decode('ascii'),
+    }
+
+
+def encode_array(values, float32=False) -> dict:
+    '''
+    Encode one column.
+
+    * floats -> float64 (or float32 if requested); NaN is preserved
+    * integers -> the narrowest of (int32, float64) that holds them, since browsers have no portable int64 array
+    * booleans -> 'bool', stored as uint8
+    * datetimes -> 'datetime', stored as float64 milliseconds since the epoch, NaT as NaN
+    * anything else -> 'string', a plain JSON list with None for missing values
+
+    :param values: pandas Series/Index or numpy array
+    :param float32: Downcast floats to float32 to halve the payload size.
+    '''
+    if isinstance(values, (pd.Series, pd.Index)):
+        if isinstance(values.dtype, pd.DatetimeTZDtype):
+            values = pd.DatetimeIndex(values).tz_convert(None)
+        values = values.to_numpy()
+    values = np.asarray(values)
+
+    kind = values.dtype.kind
+    if kind == 'b':
+        encoded = encode_buffer(values.view(np.uint8), 'uint8')
+        encoded['dtype'] = 'bool'
+        return encoded
+    if kind == 'M':
+        milliseconds = values.astype('datetime64[ms]').astype(np.int64).astype(np.float64)
+        milliseconds[np.isnat(values)] = np.nan
+        encoded = encode_buffer(milliseconds, 'float64')
+        encoded['dtype'] = 'datetime'
+        return encoded
+    if kind == 'f':
+        return encode_buffer(values, 'float32' if float32 or values.dtype == np.float32 else 'float64')
+    if kind in 'iu':
+        if values.dtype.name in TYPED_ARRAY_DTYPES:
+            return encode_buffer(values, values.dtype.name)
+        if len(values) == 0 or (values.min() >= INT32_MIN and values.max() <= INT32_MAX):
+            return encode_buffer(values, 'int32')
+        return encode_buffer(values, 'float64')
+
+    return {
+        'dtype': 'string',
+        'length': len(values),
+        'values': [None if pd.isnull(value) else str(value) for value in values],
+    }
+
+
+def encode_data_frame(df: pd.DataFrame, index=True, float32=False) -> dict:
+    '''
+    Encode a DataFrame column by column.
+
+    :param df: The frame to encode
+    :param index: Include the index (e.g. the dates of a heatmap) as its own column.
+    :param float32: Downcast float columns to float32.
+    :return: dict with 'columns', 'index_name', 'index' and 'data' (one encoded array per column, in order)
+    '''
+    return {
+        'columns': [str(column) for column in df.columns],
+        'index_name': None if df.index.name is None else str(df.index.name),
+        'index': encode_array(df.index, float32=float32) if index else None,
+        'data': [encode_array(df.iloc[:, position], float32=float32) for position in range(len(df.columns))],
+    }
+
+
+def encode_traces(df: pd.DataFrame, float32=False, selections=None) -> dict:
+    '''
+    Encode every column of df as one plot trace, all sharing the index as their x-axis. The x-axis is encoded once.
+
+    :param df: Frame with one trace per column, indexed by x.
+    :param float32: Downcast float columns to float32. The x-axis keeps its precision.
+    :param selections: Optional list with, per column, the sorted row positions to keep (e.g. from downsampling) or None
+        to keep every row. The shared x-axis then only holds the rows kept by any trace (every row if a trace keeps
+        every row), and a trace that does not keep all of them has 'x_positions', its positions in the shared x-axis.
+    :return: dict with 'index_name', 'x' and 'traces', a list of {'name', 'y', 'x_positions'}
+    '''
+    if selections is None:
+        selections = [None] * len(df.columns)
+    if any(rows is None for rows in selections):
+        # The shared x-axis is the whole index, so the positions of a trace's rows in it are the rows themselves.
+        x_rows = None
+    else:
+        x_rows = np.unique(np.concatenate([np.empty(0, dtype=np.int64)] + list(selections)))
+    x_length = len(df) if x_rows is None else len(x_rows)
+
+    traces = []
+    for position in range(len(df.columns)):
+        column = df.iloc[:, position]
+        rows = selections[position]
+        if rows is None or len(rows) == x_length:
+            # Every row of the shared x-axis; rows is a subset of it, so the same length means the same rows.
+            y = encode_array(column if x_rows is None else column.iloc[x_rows], float32=float32)
+            x_positions = None
+        else:
+            y = encode_array(column.iloc[rows], float32=float32)
+            x_positions = encode_buffer(rows if x_rows is None else np.searchsorted(x_rows, rows), 'int32')
+        traces.append({'name': str(df.columns[position]), 'y': y, 'x_positions': x_positions})
+
+    return {
+        'index_name': None if df.index.name is None else str(df.index.name),
+        'x': encode_array(df.index if x_rows is None else df.index[x_rows]),
+        'traces': traces,
+    }
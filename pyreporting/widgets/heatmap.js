@@ -41,6 +41,8 @@ export class HeatmapWidget extends InputWidget {
     this.define({
       data: [p.Any,],
       element_id: [p.String,],
+      columnar_data: [p.Any,],
+      quantized_data: [p.Any,],
     });
   }
 }
@@ -21,3 +21,7 @@ class HeatmapWidget(ReactBaseWidget):
     # https://bokeh.pydata.org/en/latest/docs/reference/core.html#bokeh-core-properties
 
     data = List(Any)
+
+    # Color codes and scale, with optional coarser levels (see `pyreporting.reports.heatmap_tiles`). When set, the JS
+    # side ignores data and columnar_data.
+    quantized_data = Any(default=None, help='Output of encode_heatmap() or write_levels()')
@@ -33,6 +33,8 @@ export class InteractivePlotWidget extends InputWidget {
     this.define({
       traces: [p.Any,],
       element_id: [p.String,],
+      columnar_data: [p.Any,],
+      trace_data: [p.Any,],
     });
   }
 }
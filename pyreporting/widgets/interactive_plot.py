@@ -18,3 +18,7 @@ class InteractivePlotWidget(ReactBaseWidget):
     #     { 'name': 'my trace 2', 'x': [1, 3, 9], 'y': [2, 5, -8] },
     # ]
     traces = List(Any)
+
+    # Typed alternative to traces, with one shared x-axis (see `pyreporting.widgets.columnar.encode_traces`). When set,
+    # the JS side ignores traces and columnar_data.
+    trace_data = Any(default=None, help='Output of encode_traces()')
@@ -42,6 +42,8 @@ export class InteractiveTableWidget extends InputWidget {
       headers: [p.Any,],
       data: [p.Any,],
       element_id: [p.String,],
+      columnar_data: [p.Any,],
+      paging: [p.Any,],
     });
   }
 }
@@ -22,3 +22,7 @@ class InteractiveTableWidget(ReactBaseWidget):
 
     headers = List(Any)
     data = List(Any)
+
+    # Set for paged tables, see `pyreporting.reports.paging.write_pages`:
+    # {'key': ..., 'url': ..., 'page_size': ..., 'row_count': ..., 'page_count': ..., 'sort_orders': {column: order}}
+    paging = Any(default=None)
@@ -2,7 +2,7 @@
 import os
 from pathlib import Path
 
-from bokeh.core.properties import String
+from bokeh.core.properties import String, Any
 from bokeh.models import InputWidget
 
 # TODO: make sure this path works with pip install
@@ -28,3 +28,7 @@ class ReactBaseWidget(InputWidget):
     ]
 
     element_id = String(default='react-app', help='The ID for the div to create')
+
+    # Columnar alternative to the list properties of the subclasses, see `pyreporting.widgets.columnar`. When set, the
+    # JS side decodes it into typed arrays and ignores the list properties.
+    columnar_data = Any(default=None, help='Output of encode_data_frame()')
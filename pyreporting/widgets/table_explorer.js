@@ -41,6 +41,9 @@ export class TableExplorerWidget extends InputWidget {
     this.define({
       data: [p.Any,],
       element_id: [p.String,],
+      columnar_data: [p.Any,],
+      paging: [p.Any,],
+      summary: [p.Any,],
     });
   }
 }
@@ -28,3 +28,12 @@ class TableExplorerWidget(ReactBaseWidget):
     # ]
     #
     data = List(Any)
+
+    # Set for paged tables, see `pyreporting.reports.paging.write_pages`:
+    # {'key': ..., 'url': ..., 'page_size': ..., 'row_count': ..., 'page_count': ..., 'sort_orders': {column: order}}
+    paging = Any(default=None)
+
+    # Statistics, histograms, cross-filter bins and PCA of the whole table, see
+    # `pyreporting.reports.table_summary.summarize_table`. When set, the explorer shows them without computing anything
+    # from the rows, which may then be left out.
+    summary = Any(default=None, help='Output of summarize_table()')
@@ -8,6 +8,13 @@ import { Provider } from 'react-redux';
 
 import configureStore from './store/configureStore';
 import { heatmapCSVArrayToHeatmapDataFrame } from './utils/heatmapHelpers';
+import {
+  columnarToRecordArrays, columnarToRecordObjects, columnarToTableProps, columnarToTraces, decodeTraces,
+} from './utils/columnarHelpers';
+import { HeatmapLevelLoader, quantizedToRecordArrays, selectHeatmapLevel } from './utils/heatmapTiles';
+import PagedTable from './components/PagedTable';
+import TableSummary from './components/TableSummary';
+import { convertRecordArraysToRecordObjects } from './utils/dataManipulationHelpers';
 
 import {
   HeatmapComponent,
@@ -21,6 +28,12 @@ import 'bootstrap/dist/css/bootstrap.min.css';
 import '../react-dc/react-dc.css';
 import 'react-dropzone-component/styles/filepicker.css';
 
+// Called by the page scripts of paged tables (see pyreporting.reports.paging)
+export { receivePage } from './utils/pagedData';
+
+// Called by the level scripts of heatmaps (see pyreporting.reports.heatmap_tiles)
+export { receiveHeatmapLevel } from './utils/heatmapTiles';
+
 const initializeReactWithRedux = (components, elementId) => {
   const store = configureStore();
 
@@ -57,22 +70,41 @@ export const initializeBokehReact = (props) => {
 export const initializeBokehHeatmap = (props) => {
   const { model } = props;
   const {
-    title, element_id, data, valueDescription, domain, height, width,
+    title, element_id, data, columnar_data, quantized_data, valueDescription, domain, height, width,
   } = model;
-  const dataFrame = heatmapCSVArrayToHeatmapDataFrame(data);
-  const components = (
-    <div>
-      <h2>{title}</h2>
-      <HeatmapComponent
-        dataFrame={dataFrame}
-        valueDescription={valueDescription}
-        domain={domain || null}
-        height={height || 400}
-        width={width || 1000}
-      />
-    </div>
-  );
-  initializeReactWithRedux(components, element_id);
+  const store = configureStore();
+  const renderHeatmap = (rows) => {
+    const dataFrame = heatmapCSVArrayToHeatmapDataFrame(rows);
+    ReactDOM.render((
+      <Provider store={store}>
+        <div>
+          <h2>{title}</h2>
+          <HeatmapComponent
+            dataFrame={dataFrame}
+            valueDescription={valueDescription}
+            domain={domain || null}
+            height={height || 400}
+            width={width || 1000}
+          />
+        </div>
+      </Provider>
+    ), document.getElementById(element_id));
+  };
+
+  if (!quantized_data) {
+    renderHeatmap(columnar_data ? columnarToRecordArrays(columnar_data, { indexHeader: 'date' }) : data);
+    return;
+  }
+
+  // Draw the coarsest level right away, then the one that matches the width of the canvas if it is finer
+  const coarsest = quantized_data.levels[0];
+  renderHeatmap(quantizedToRecordArrays(quantized_data, coarsest));
+  const target = selectHeatmapLevel(quantized_data, width || 1000);
+  if (target.level !== coarsest.level) {
+    new HeatmapLevelLoader(quantized_data).loadRecordArrays(width || 1000)
+      .then(renderHeatmap)
+      .catch(error => console.error(error));
+  }
 };
 
 /**
@@ -81,20 +113,34 @@ export const initializeBokehHeatmap = (props) => {
 export const initializeBokehInteractiveTable = (props) => {
   const { model } = props;
   const {
-    title, element_id, data, headers, width,
+    title, element_id, data, columnar_data, paging, headers, width,
   } = model;
   const columns = headers.map(header => ({
     Header: header,
     accessor: header,
   }));
 
-  const components = (
-    <div style={{ width }}>
-      <Table
+  let table;
+  if (paging) {
+    // Only the first page is embedded; it is the window the table shows first
+    table = (
+      <PagedTable
         title={title}
-        data={data}
+        firstPage={columnarToRecordObjects(columnar_data)}
         columns={columns}
+        paging={paging}
       />
+    );
+  } else if (columnar_data) {
+    // The cells are read from the typed arrays, without an object per row
+    table = <Table title={title} {...columnarToTableProps(columnar_data)} />;
+  } else {
+    table = <Table title={title} data={data} columns={columns} />;
+  }
+
+  const components = (
+    <div style={{ width }}>
+      {table}
     </div>
   );
   initializeReactWithRedux(components, element_id);
@@ -106,13 +152,29 @@ export const initializeBokehInteractiveTable = (props) => {
 export const initializeBokehInteractivePlot = (props) => {
   const { model } = props;
   const {
-    title, element_id, traces, width,
+    title, element_id, traces, columnar_data, trace_data, width,
   } = model;
 
+  let plotTraces = traces;
+  let layout = {};
+  if (trace_data) {
+    plotTraces = decodeTraces(trace_data);
+    if (trace_data.x.dtype === 'datetime') {
+      // x values arrive as epoch milliseconds
+      layout = { xaxis: { type: 'date' } };
+    }
+  } else if (columnar_data) {
+    plotTraces = columnarToTraces(columnar_data);
+    if (columnar_data.index.dtype === 'datetime') {
+      // x values arrive as epoch milliseconds
+      layout = { xaxis: { type: 'date' } };
+    }
+  }
+
   const components = (
     <div style={{ width }}>
       <h3>{title}</h3>
-      <SimpleMultilineChart traces={traces} />
+      <SimpleMultilineChart traces={plotTraces} layout={layout} />
     </div>
   );
   initializeReactWithRedux(components, element_id);
@@ -124,12 +186,65 @@ export const initializeBokehInteractivePlot = (props) => {
 export const initializeBokehTableExplorer = (props) => {
   const { model } = props;
   const {
-    title, element_id, data, width,
+    title, element_id, data, columnar_data, paging, summary, width,
   } = model;
+  if (summary) {
+    // The summary covers the whole table, so the rows (if any) are only shown as a table, not explored again.
+    let table = null;
+    if (paging) {
+      const columns = columnar_data.columns.map(column => ({ Header: column, accessor: column }));
+      table = (
+        <PagedTable
+          title={title}
+          firstPage={columnarToRecordObjects(columnar_data)}
+          columns={columns}
+          paging={paging}
+        />
+      );
+    } else if (columnar_data) {
+      table = <Table title={title} {...columnarToTableProps(columnar_data)} />;
+    } else if (data && data.length > 0) {
+      table = (
+        <Table
+          title={title}
+          data={convertRecordArraysToRecordObjects(data)}
+          columns={data[0].map(column => ({ Header: column, accessor: column }))}
+        />
+      );
+    }
+    const components = (
+      <div style={{ width }}>
+        <TableSummary summary={summary} title={title} />
+        {table}
+      </div>
+    );
+    initializeReactWithRedux(components, element_id);
+    return;
+  }
+
+  // TableExplorer works on rows, so they are only built for it
+  const rows = columnar_data ? columnarToRecordArrays(columnar_data) : data;
+  if (paging) {
+    // Only the first page is available up front, so the explorer panels work on that sample.
+    const columns = columnar_data.columns.map(column => ({ Header: column, accessor: column }));
+    const components = (
+      <div style={{ width }}>
+        <PagedTable
+          title={title}
+          firstPage={columnarToRecordObjects(columnar_data)}
+          columns={columns}
+          paging={paging}
+        />
+        <TableExplorer data={rows} title={`${title} (first ${rows.length - 1} of ${paging.row_count} rows)`} />
+      </div>
+    );
+    initializeReactWithRedux(components, element_id);
+    return;
+  }
 
   const components = (
     <div style={{ width }}>
-      <TableExplorer data={data} title={title} />
+      <TableExplorer data={rows} title={title} />
     </div>
   );
   initializeReactWithRedux(components, element_id);
@@ -2,13 +2,63 @@ import React from 'react';
 import PropTypes from 'prop-types';
 import PlotlyComponent from './PlotlyComponentFork';
 
-const Histogram = ({ height, values }) => {
+const binnedTraces = (edges, counts, selectedCounts) => {
+  const centers = counts.map((count, bin) => (edges[bin] + edges[bin + 1]) / 2);
+  const width = counts.map((count, bin) => edges[bin + 1] - edges[bin]);
+  const traces = [
+    {
+      x: centers,
+      y: counts,
+      width,
+      type: 'bar',
+      marker: {
+        color: selectedCounts ? 'rgba(200,200,200,0.5)' : 'rgba(200,200,250,0.7)',
+      },
+    },
+  ];
+  if (selectedCounts) {
+    traces.push({
+      x: centers,
+      y: selectedCounts,
+      width,
+      type: 'bar',
+      marker: {
+        color: 'rgba(200,200,250,0.9)',
+      },
+    });
+  }
+  return traces;
+};
+
+/**
+ * Histogram of raw values, binned by Plotly, or of precomputed bins:
+ * <Histogram values={[13, 23, 33]} />
+ * <Histogram edges={[0, 10, 20]} counts={[4, 2]} selectedCounts={[1, 2]} onBinClick={bin => ...} />
+ */
+const Histogram = ({
+  height, values, edges, counts, selectedCounts, onBinClick,
+}) => {
   const layout = {
     margin: {
       t: 0,
     },
     height,
   };
+
+  if (counts) {
+    layout.barmode = 'overlay';
+    layout.showlegend = false;
+    const clickProps = onBinClick ? { onClick: event => onBinClick(event.points[0].pointIndex) } : {};
+    return (
+      <PlotlyComponent
+        data={binnedTraces(edges, counts, selectedCounts)}
+        layout={layout}
+        autoscaleVisibleYAxis={false}
+        {...clickProps}
+      />
+    );
+  }
+
   const data = [
     {
       x: values,
@@ -24,7 +74,19 @@ const Histogram = ({ height, values }) => {
 
 Histogram.propTypes = {
   height: PropTypes.number,
-  values: PropTypes.arrayOf(PropTypes.number).isRequired,
+
+  /** Raw values; either values or edges and counts are required */
+  values: PropTypes.arrayOf(PropTypes.number),
+
+  /** Edges of precomputed bins, one more than counts */
+  edges: PropTypes.arrayOf(PropTypes.number),
+  counts: PropTypes.arrayOf(PropTypes.number),
+
+  /** Counts of the selected rows, drawn over counts */
+  selectedCounts: PropTypes.arrayOf(PropTypes.number),
+
+  /** Called with the position of a clicked bin */
+  onBinClick: PropTypes.func,
 };
 
 Histogram.defaultProps = {
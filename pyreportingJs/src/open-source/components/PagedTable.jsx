@@ -0,0 +1,77 @@
+import React from 'react';
+import PropTypes from 'prop-types';
+import ReactTable from 'react-table';
+
+import { PagedDataLoader } from '../utils/pagedData';
+
+/**
+ * Table over the pages written by `pyreporting.reports.paging.write_pages`. Only the visible window is loaded, so the
+ * table can be much larger than what fits in the page. Sorting is only available for the columns that were paged with a
+ * precomputed sort order.
+ */
+class PagedTable extends React.Component {
+  constructor(props) {
+    super(props);
+    this.loader = new PagedDataLoader(props.paging);
+    this.state = {
+      data: props.firstPage,
+      loading: false,
+    };
+  }
+
+  fetchData = (state) => {
+    const { page, pageSize, sorted } = state;
+    const [sort] = sorted || [];
+    const start = page * pageSize;
+
+    this.setState({ loading: true });
+    this.loader.getRows(start, start + pageSize, {
+      sortColumn: sort ? sort.id : null,
+      descending: sort ? sort.desc : false,
+    }).then(
+      data => this.setState({ data, loading: false }),
+      (error) => {
+        console.error(error);
+        this.setState({ loading: false });
+      },
+    );
+  };
+
+  render() {
+    const { title, columns, paging } = this.props;
+    const { data, loading } = this.state;
+    const sortableColumns = columns.map(column => ({ ...column, sortable: this.loader.canSortBy(column.accessor) }));
+
+    return (
+      <div>
+        <h4 style={{ textAlign: 'center' }}>
+          {title}
+        </h4>
+        <ReactTable
+          manual
+          data={data}
+          pages={paging.page_count}
+          loading={loading}
+          onFetchData={this.fetchData}
+          columns={sortableColumns}
+          className="allow-wrap compact"
+          defaultPageSize={paging.page_size}
+          showPageSizeOptions={false}
+        />
+      </div>
+    );
+  }
+}
+
+PagedTable.propTypes = {
+  title: PropTypes.string.isRequired,
+  columns: PropTypes.arrayOf(PropTypes.object).isRequired,
+  paging: PropTypes.object.isRequired,
+  firstPage: PropTypes.arrayOf(PropTypes.object),
+};
+
+PagedTable.defaultProps = {
+  firstPage: [],
+};
+
+export default PagedTable;
@@ -23,13 +23,15 @@ class Table extends React.Component {
     const { data } = this.props;
     const colorScales = { all: null, columns: {} };
 
-    // scan over all values and columns, bucketing into all and by column
+    // scan over all values and columns, bucketing into all and by column. Columns are read through their accessors,
+    // so rows can also be positions into columnar data (see columnarToTableProps).
     const allValues = [];
-    const allColumns = Object.keys(data[0]);
     const columnToValues = {};
-    for (const column of allColumns) {
+    for (const { id, accessor } of this.props.columns) {
+      const column = id || accessor;
+      const cell = typeof accessor === 'function' ? accessor : row => _.get(row, accessor);
       for (const row of data) {
-        const value = _.get(row, column);
+        const value = cell(row);
         if (!isNaN(Number(value))) {
           if (this.props.colorByColumn) {
             if (!columnToValues[column]) {
@@ -114,7 +116,8 @@ class Table extends React.Component {
 
 Table.propTypes = {
   title: PropTypes.string.isRequired,
-  data: PropTypes.arrayOf(PropTypes.object).isRequired,
+  // Record objects, or row positions read by accessor functions of the columns
+  data: PropTypes.arrayOf(PropTypes.oneOfType([PropTypes.object, PropTypes.number])).isRequired,
   columns: PropTypes.arrayOf(PropTypes.object).isRequired,
   colorRange: PropTypes.arrayOf(PropTypes.string),
   colorByColumn: PropTypes.bool,
@@ -0,0 +1,157 @@
+import React from 'react';
+import PropTypes from 'prop-types';
+import { Tab, Tabs } from 'react-bootstrap';
+import PlotlyComponent from './PlotlyComponentFork';
+import Histogram from './Histogram';
+import PCAPanel from './PCAPanel';
+import { crossFilterCounts, decodeTableSummary } from '../utils/tableSummary';
+
+const STATS = ['count', 'missing', 'mean', 'std', 'min', 'p25', 'median', 'p75', 'max'];
+
+const formatStat = value => (typeof value === 'number' && !Number.isInteger(value) ? value.toPrecision(4) : value);
+
+/**
+ * Pure component to show the statistics of every column
+ */
+const StatsTable = ({ columns, stats }) => (
+  <table className="table table-sm table-striped">
+    <thead>
+      <tr>
+        <th />
+        {STATS.map(stat => <th key={stat}>{stat}</th>)}
+      </tr>
+    </thead>
+    <tbody>
+      {columns.map((column, position) => (
+        <tr key={column}>
+          <th>{column}</th>
+          {STATS.map(stat => <td key={stat}>{formatStat(stats[stat][position])}</td>)}
+        </tr>
+      ))}
+    </tbody>
+  </table>
+);
+
+StatsTable.propTypes = {
+  columns: PropTypes.arrayOf(PropTypes.string).isRequired,
+  stats: PropTypes.object.isRequired,
+};
+
+/**
+ * Pure component to show the rows projected onto the first two principal components
+ */
+const ProjectionPlot = ({ projections }) => {
+  const data = [
+    {
+      x: projections[0],
+      y: projections[1],
+      type: 'scattergl',
+      mode: 'markers',
+      marker: { size: 3, color: 'rgba(100,100,250,0.5)' },
+    },
+  ];
+  const layout = {
+    height: 500,
+    width: 500,
+    xaxis: { title: 'Principal Component 1' },
+    yaxis: { title: 'Principal Component 2' },
+  };
+  return <PlotlyComponent data={data} layout={layout} />;
+};
+
+ProjectionPlot.propTypes = {
+  projections: PropTypes.arrayOf(PropTypes.object).isRequired,
+};
+
+/**
+ * Explorer of a table summarized in Python (see pyreporting.reports.table_summary): statistics, histograms that can be
+ * cross-filtered by clicking a bin, and PCA. Works without the rows of the table.
+ */
+export default class TableSummary extends React.Component {
+  static propTypes = {
+    /** The `summary` property of TableExplorerWidget */
+    summary: PropTypes.object.isRequired,
+    title: PropTypes.string,
+  };
+
+  static defaultProps = {
+    title: '',
+  };
+
+  constructor(props) {
+    super(props);
+    this.summary = decodeTableSummary(props.summary);
+    this.state = {
+      // Column position -> selected bin
+      filters: {},
+    };
+  }
+
+  onBinClick = (column, bin) => {
+    this.setState((state) => {
+      const filters = { ...state.filters };
+      if (filters[column] === bin) {
+        delete filters[column];
+      } else {
+        filters[column] = bin;
+      }
+      return { filters };
+    });
+  };
+
+  renderHistograms = () => {
+    const { summary } = this;
+    const { filters } = this.state;
+    const canFilter = !!summary.bins;
+    const selectedCounts = canFilter && Object.keys(filters).length > 0 ? crossFilterCounts(summary, filters) : null;
+
+    return (
+      <div className="row">
+        {canFilter && <div className="col-lg-12">Click a bin to filter the other columns to its rows.</div>}
+        {summary.columns.map((column, position) => (
+          <div className="col-lg-4" key={column}>
+            <h5>{column}</h5>
+            <Histogram
+              edges={summary.histograms.edges[position]}
+              counts={summary.histograms.counts[position]}
+              selectedCounts={selectedCounts ? selectedCounts[position] : undefined}
+              onBinClick={canFilter ? bin => this.onBinClick(position, bin) : undefined}
+            />
+          </div>
+        ))}
+      </div>
+    );
+  };
+
+  render() {
+    const { title } = this.props;
+    const { summary } = this;
+    const { pca } = summary;
+
+    return (
+      <div>
+        <h3>{title} ({summary.row_count} rows)</h3>
+        <Tabs animation={false} id="table-summary-tabs">
+          <Tab eventKey={1} title="Statistics">
+            <StatsTable columns={summary.columns} stats={summary.stats} />
+          </Tab>
+          <Tab eventKey={2} title="Histograms">
+            {this.renderHistograms()}
+          </Tab>
+          <Tab eventKey={3} title="Principal Component Analysis">
+            {pca ? (
+              <div>
+                <PCAPanel
+                  explainedVariance={pca.explained_variance}
+                  eigenvectors={pca.eigenvectors}
+                  columns={pca.columns}
+                />
+                {pca.projections.length > 1 && <ProjectionPlot projections={pca.projections} />}
+              </div>
+            ) : <div>No principal components: the table needs two numeric columns and two complete rows.</div>}
+          </Tab>
+        </Tabs>
+      </div>
+    );
+  }
+}
@@ -0,0 +1,47 @@
+import { shallow } from 'enzyme';
+import React from 'react';
+import TableSummary from './TableSummary';
+
+describe('TableSummary.jsx', () => {
+  // Output of summarize_table(pd.DataFrame({'a': [1., 2., 3., np.nan], 'b': [4, 5, 6, 8]}), bins=2, pca=False)
+  const summary = {
+    row_count: 4,
+    columns: ['a', 'b'],
+    other_columns: [],
+    stats: {
+      count: [3, 4],
+      missing: [1, 0],
+      mean: [2.0, 5.75],
+      std: [1.0, 1.707825127659933],
+      min: [1.0, 4.0],
+      p25: [1.5, 4.75],
+      median: [2.0, 5.5],
+      p75: [2.5, 6.5],
+      max: [3.0, 8.0],
+    },
+    histograms: { edges: [[1.0, 2.0, 3.0], [4.0, 6.0, 8.0]], counts: [[1, 2], [2, 2]] },
+    bins: [{ dtype: 'uint8', length: 4, buffer: 'AAEB/w==' }, { dtype: 'uint8', length: 4, buffer: 'AAABAQ==' }],
+    missing_bin: 255,
+    pca: null,
+  };
+
+  it('renders without crashing', () => {
+    shallow(<TableSummary summary={summary} />);
+  });
+
+  it('renders one histogram per numeric column', () => {
+    const wrapper = shallow(<TableSummary summary={summary} />);
+    expect(wrapper.find('Histogram').length).toBe(2);
+  });
+
+  it('cross-filters the other histograms when a bin is clicked', () => {
+    const wrapper = shallow(<TableSummary summary={summary} />);
+    wrapper.find('Histogram').at(0).props().onBinClick(1);
+    expect(wrapper.state('filters')).toEqual({ 0: 1 });
+    expect(wrapper.find('Histogram').at(1).props().selectedCounts).toEqual([1, 1]);
+
+    // Clicking the same bin again clears the filter
+    wrapper.find('Histogram').at(0).props().onBinClick(1);
+    expect(wrapper.state('filters')).toEqual({});
+  });
+});
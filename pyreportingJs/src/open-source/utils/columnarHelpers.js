@@ -0,0 +1,218 @@
+/**
+ * Decoders for the columnar payload produced by `pyreporting.widgets.columnar.encode_data_frame`.
+ *
+ * Payload format:
+ * {
+ *   columns: ['30d_apply', '60d_apply'],
+ *   index_name: 'date',
+ *   index: { dtype: 'string', length: 2, values: ['2017-01-01', '2017-01-11'] },
+ *   data: [
+ *     { dtype: 'float64', length: 2, buffer: 'mpmZmZmZ8T/NzMzMzMz8Pw==' },
+ *     { dtype: 'float64', length: 2, buffer: 'ZmZmZmZmCkCamZmZmZkNQA==' },
+ *   ],
+ * }
+ */
+
+const TYPED_ARRAYS = {
+  int8: Int8Array,
+  int16: Int16Array,
+  int32: Int32Array,
+  uint8: Uint8Array,
+  uint16: Uint16Array,
+  uint32: Uint32Array,
+  float32: Float32Array,
+  float64: Float64Array,
+
+  // Stored as uint8 and float64 (epoch milliseconds) respectively
+  bool: Uint8Array,
+  datetime: Float64Array,
+};
+
+const base64ToArrayBuffer = (base64) => {
+  const binary = atob(base64);
+  const bytes = new Uint8Array(binary.length);
+  for (let i = 0; i < binary.length; i += 1) {
+    bytes[i] = binary.charCodeAt(i);
+  }
+  return bytes.buffer;
+};
+
+/**
+ * @param column {Object} - One encoded column
+ * @return {TypedArray|Array} - A TypedArray for numeric columns, an Array of strings otherwise
+ */
+export const decodeColumn = (column) => {
+  if (!column) {
+    return null;
+  }
+  if (column.dtype === 'string') {
+    return column.values;
+  }
+  const TypedArray = TYPED_ARRAYS[column.dtype];
+  if (!TypedArray) {
+    throw new Error(`Unsupported column dtype '${column.dtype}'`);
+  }
+  return new TypedArray(base64ToArrayBuffer(column.buffer), 0, column.length);
+};
+
+/**
+ * Decoded columns are kept as they are; the helpers below read cells from them instead of building rows, except where
+ * a component needs rows.
+ * @param payload {Object}
+ * @return {Object} - { columns, dtypes, indexName, index: TypedArray|Array, data: Array of TypedArray|Array, rowCount }
+ */
+export const decodeColumnarFrame = (payload) => {
+  const index = decodeColumn(payload.index);
+  const data = payload.data.map(decodeColumn);
+  let rowCount = 0;
+  if (index !== null) {
+    rowCount = index.length;
+  } else if (data.length > 0) {
+    rowCount = data[0].length;
+  }
+  return {
+    columns: payload.columns,
+    dtypes: payload.data.map(column => column.dtype),
+    indexName: payload.index_name,
+    index,
+    data,
+    rowCount,
+  };
+};
+
+const cellValue = (column, dtype, rowIndex) => {
+  const value = column[rowIndex];
+  if (dtype === 'bool') {
+    return value === 1;
+  }
+  if (dtype === 'datetime' && isNaN(value)) {
+    return null;
+  }
+  return value;
+};
+
+/**
+ * Row-major view of the payload for components that still take arrays of rows:
+ * [
+ *   ['date', 'header1', 'header2'],
+ *   ['2017-01-01', 11, 21],
+ * ]
+ * @param payload {Object}
+ * @param indexHeader {String|null} - Header of the index column; the index is left out if null
+ * @return {Array}
+ */
+export const columnarToRecordArrays = (payload, { indexHeader = null } = {}) => {
+  const {
+    columns, dtypes, index, data, rowCount,
+  } = decodeColumnarFrame(payload);
+  const includeIndex = indexHeader !== null && index !== null;
+
+  const records = new Array(rowCount + 1);
+  records[0] = includeIndex ? [indexHeader, ...columns] : [...columns];
+  for (let rowIndex = 0; rowIndex < rowCount; rowIndex += 1) {
+    const row = includeIndex ? [cellValue(index, payload.index.dtype, rowIndex)] : [];
+    for (let colIndex = 0; colIndex < data.length; colIndex += 1) {
+      row.push(cellValue(data[colIndex], dtypes[colIndex], rowIndex));
+    }
+    records[rowIndex + 1] = row;
+  }
+  return records;
+};
+
+/**
+ * Rows [start, end) of a decoded frame: [{'col1': 11, 'col2': 12}, {'col1': 21, 'col2': 22}]
+ * @param frame {Object} - Output of decodeColumnarFrame
+ * @param start {Number}
+ * @param end {Number}
+ * @return {Array}
+ */
+export const frameToRecordObjects = (frame, start = 0, end = frame.rowCount) => {
+  const { columns, dtypes, data } = frame;
+  const records = new Array(Math.max(0, end - start));
+  for (let rowIndex = start; rowIndex < end; rowIndex += 1) {
+    const record = {};
+    for (let colIndex = 0; colIndex < data.length; colIndex += 1) {
+      record[columns[colIndex]] = cellValue(data[colIndex], dtypes[colIndex], rowIndex);
+    }
+    records[rowIndex - start] = record;
+  }
+  return records;
+};
+
+/**
+ * [{'col1': 11, 'col2': 12}, {'col1': 21, 'col2': 22}]
+ * @param payload {Object}
+ * @return {Array}
+ */
+export const columnarToRecordObjects = payload => frameToRecordObjects(decodeColumnarFrame(payload));
+
+/**
+ * Data and columns for react-table that read every cell from the decoded columns, without an object per row: the rows
+ * are their positions, and every column has an accessor into its column.
+ * [0, 1], [{ Header: 'col1', id: 'col1', accessor: rowIndex => col1[rowIndex] }]
+ * @param payload {Object}
+ * @return {{data: Array, columns: Array}}
+ */
+export const columnarToTableProps = (payload) => {
+  const {
+    columns, dtypes, data, rowCount,
+  } = decodeColumnarFrame(payload);
+  const positions = new Array(rowCount);
+  for (let rowIndex = 0; rowIndex < rowCount; rowIndex += 1) {
+    positions[rowIndex] = rowIndex;
+  }
+  return {
+    data: positions,
+    columns: columns.map((name, colIndex) => ({
+      Header: name,
+      id: name,
+      accessor: rowIndex => cellValue(data[colIndex], dtypes[colIndex], rowIndex),
+    })),
+  };
+};
+
+/**
+ * One trace per column, all sharing the decoded index as their x-axis:
+ * [{ name: 'col1', x: index, y: Float64Array }]
+ * @param payload {Object}
+ * @return {Array}
+ */
+export const columnarToTraces = (payload) => {
+  const { columns, index, data } = decodeColumnarFrame(payload);
+  return columns.map((name, colIndex) => ({
+    name,
+    x: index,
+    y: data[colIndex],
+  }));
+};
+
+const gather = (values, positions) => {
+  const gathered = ArrayBuffer.isView(values) ? new values.constructor(positions.length) : new Array(positions.length);
+  for (let i = 0; i < positions.length; i += 1) {
+    gathered[i] = values[positions[i]];
+  }
+  return gathered;
+};
+
+/**
+ * Decoder for the payload produced by `pyreporting.widgets.columnar.encode_traces`:
+ * {
+ *   index_name: 'date',
+ *   x: { dtype: 'datetime', length: 3, buffer: '...' },
+ *   traces: [
+ *     { name: 'col1', y: { dtype: 'float64', length: 3, buffer: '...' }, x_positions: null },
+ *     { name: 'col2', y: { dtype: 'float32', length: 2, buffer: '...' }, x_positions: { dtype: 'int32', ... } },
+ *   ],
+ * }
+ * Traces without x_positions share the decoded x-axis itself; the others get the points of it at their positions.
+ * @param payload {Object}
+ * @return {Array} - [{ name: 'col1', x: TypedArray|Array, y: TypedArray|Array }]
+ */
+export const decodeTraces = (payload) => {
+  const x = decodeColumn(payload.x);
+  return payload.traces.map(trace => ({
+    name: trace.name,
+    x: trace.x_positions ? gather(x, decodeColumn(trace.x_positions)) : x,
+    y: decodeColumn(trace.y),
+  }));
+};
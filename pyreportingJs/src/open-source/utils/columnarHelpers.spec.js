@@ -0,0 +1,94 @@
+import {
+  decodeColumn,
+  columnarToRecordArrays,
+  columnarToRecordObjects,
+  columnarToTableProps,
+  columnarToTraces,
+  decodeTraces,
+} from './columnarHelpers';
+
+// Output of encode_data_frame() for:
+// pd.DataFrame({'30d_apply': [1.1, 1.8], '60d_apply': [3.3, 3.7]}, index=pd.Index(['2017-01-01', '2017-01-11'], name='date'))
+const payload = {
+  columns: ['30d_apply', '60d_apply'],
+  index_name: 'date',
+  index: { dtype: 'string', length: 2, values: ['2017-01-01', '2017-01-11'] },
+  data: [
+    { dtype: 'float64', length: 2, buffer: 'mpmZmZmZ8T/NzMzMzMz8Pw==' },
+    { dtype: 'float64', length: 2, buffer: 'ZmZmZmZmCkCamZmZmZkNQA==' },
+  ],
+};
+
+describe('columnarHelpers', () => {
+  it('decodes a float64 column into a typed array', () => {
+    const output = decodeColumn(payload.data[0]);
+    expect(output).toBeInstanceOf(Float64Array);
+    expect(Array.from(output)).toEqual([1.1, 1.8]);
+  });
+
+  it('decodes booleans and datetimes', () => {
+    expect(Array.from(decodeColumn({ dtype: 'bool', length: 2, buffer: 'AQA=' }))).toEqual([1, 0]);
+    const dates = decodeColumn({ dtype: 'datetime', length: 2, buffer: 'AACAbub1dkIAAAAAAAD4fw==' });
+    expect(dates[0]).toEqual(1577836800000); // 2020-01-01
+    expect(isNaN(dates[1])).toBe(true);
+  });
+
+  it('converts to record arrays with the index as the first column', () => {
+    const output = columnarToRecordArrays(payload, { indexHeader: 'date' });
+    expect(output).toEqual([
+      ['date', '30d_apply', '60d_apply'],
+      ['2017-01-01', 1.1, 3.3],
+      ['2017-01-11', 1.8, 3.7],
+    ]);
+  });
+
+  it('converts to record objects', () => {
+    const output = columnarToRecordObjects(payload);
+    expect(output).toEqual([
+      { '30d_apply': 1.1, '60d_apply': 3.3 },
+      { '30d_apply': 1.8, '60d_apply': 3.7 },
+    ]);
+  });
+
+  it('reads table cells from the decoded columns', () => {
+    const { data, columns } = columnarToTableProps(payload);
+    expect(data).toEqual([0, 1]);
+    expect(columns.map(column => column.id)).toEqual(['30d_apply', '60d_apply']);
+    expect(data.map(columns[1].accessor)).toEqual([3.3, 3.7]);
+  });
+
+  it('converts to traces sharing the x-axis', () => {
+    const [first, second] = columnarToTraces(payload);
+    expect(first.name).toEqual('30d_apply');
+    expect(first.x).toBe(second.x);
+    expect(Array.from(second.y)).toEqual([3.3, 3.7]);
+  });
+
+  it('decodes traces sharing the x-axis, and gathers the x values of downsampled ones', () => {
+    // encode_traces(pd.DataFrame({'a': [1.0, np.nan, 3.0], 'b': [4.0, 5.0, 6.0]},
+    //                            index=pd.Index([10, 20, 30], name='x')),
+    //               selections=[np.array([0, 2]), np.array([0, 1, 2])])
+    const traces = decodeTraces({
+      index_name: 'x',
+      x: { dtype: 'int32', length: 3, buffer: 'CgAAABQAAAAeAAAA' },
+      traces: [
+        {
+          name: 'a',
+          y: { dtype: 'float64', length: 2, buffer: 'AAAAAAAA8D8AAAAAAAAIQA==' },
+          x_positions: { dtype: 'int32', length: 2, buffer: 'AAAAAAIAAAA=' },
+        },
+        {
+          name: 'b',
+          y: { dtype: 'float64', length: 3, buffer: 'AAAAAAAAEEAAAAAAAAAUQAAAAAAAABhA' },
+          x_positions: null,
+        },
+      ],
+    });
+    const [first, second] = traces;
+    expect(first.x).toBeInstanceOf(Int32Array);
+    expect(Array.from(first.x)).toEqual([10, 30]);
+    expect(Array.from(first.y)).toEqual([1, 3]);
+    expect(Array.from(second.x)).toEqual([10, 20, 30]);
+    expect(Array.from(second.y)).toEqual([4, 5, 6]);
+  });
+});
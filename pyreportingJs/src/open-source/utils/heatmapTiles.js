@@ -0,0 +1,144 @@
+import { decodeColumn } from './columnarHelpers';
+
+/**
+ * Decoders and loader for the quantized heatmap payload produced by `pyreporting.reports.heatmap_tiles`.
+ *
+ * Payload format (levels are coarsest first; the levels written next to the report have a `tiles` url and no codes):
+ * {
+ *   columns: ['30d_apply', '60d_apply'],
+ *   index_name: 'date',
+ *   index: { dtype: 'string', length: 2, values: ['2017-01-01', '2017-01-11'] },
+ *   rows: 2,
+ *   cols: 2,
+ *   scale: { dtype: 'uint8', colors: 256, offset: 1.1, step: 0.01, missing: 0 },
+ *   levels: [
+ *     { level: 0, row_factor: 1, col_factor: 1, rows: 2, cols: 2, codes: { dtype: 'uint8', length: 4, buffer: '...' } },
+ *   ],
+ *   tiles: { key: 'Report_Heatmap_0', url: 'Files/Report_Heatmap_0_tiles/' },
+ * }
+ */
+
+// `${key}/${level}` -> { resolve, reject }
+const pendingLevels = new Map();
+
+const levelId = (key, level) => `${key}/${level}`;
+
+/**
+ * Called by every level script.
+ */
+export const receiveHeatmapLevel = (key, level, payload) => {
+  const id = levelId(key, level);
+  const pending = pendingLevels.get(id);
+  if (!pending) {
+    console.warn(`Received heatmap level ${id} that was not requested`);
+    return;
+  }
+  pendingLevels.delete(id);
+  pending.resolve(payload);
+};
+
+/**
+ * The level to draw on a canvas `width` pixels wide: the coarsest one with at least one row (date) per pixel, or the
+ * full resolution if none has.
+ * @param payload {Object}
+ * @param width {Number}
+ * @return {Object} - One of payload.levels
+ */
+export const selectHeatmapLevel = (payload, width) => {
+  const { levels } = payload;
+  return levels.find(level => level.rows >= width) || levels[levels.length - 1];
+};
+
+/**
+ * Row-major arrays of one level, with the values restored from the codes, for heatmapCSVArrayToHeatmapDataFrame:
+ * [
+ *   ['date', '30d_apply', '60d_apply'],
+ *   ['2017-01-01', 1.1, 3.3],
+ * ]
+ * Every row and column of a coarser level is labelled with the first date and window length it aggregates.
+ * @param payload {Object}
+ * @param level {Object} - A level with codes
+ * @return {Array}
+ */
+export const quantizedToRecordArrays = (payload, level) => {
+  const {
+    offset, step, missing,
+  } = payload.scale;
+  const index = decodeColumn(payload.index);
+  const codes = decodeColumn(level.codes);
+  const {
+    rows, cols, row_factor: rowFactor, col_factor: colFactor,
+  } = level;
+
+  const headers = ['date'];
+  for (let colIndex = 0; colIndex < cols; colIndex += 1) {
+    headers.push(payload.columns[colIndex * colFactor]);
+  }
+
+  const records = new Array(rows + 1);
+  records[0] = headers;
+  for (let rowIndex = 0; rowIndex < rows; rowIndex += 1) {
+    const row = [index[rowIndex * rowFactor]];
+    for (let colIndex = 0; colIndex < cols; colIndex += 1) {
+      const code = codes[(rowIndex * cols) + colIndex];
+      row.push(code === missing ? NaN : offset + ((code - 1) * step));
+    }
+    records[rowIndex + 1] = row;
+  }
+  return records;
+};
+
+export class HeatmapLevelLoader {
+  /**
+   * @param payload {Object} - The `quantized_data` property of the widget
+   */
+  constructor(payload) {
+    this.payload = payload;
+
+    // level number -> Promise of the level
+    this.cache = new Map();
+  }
+
+  /**
+   * @param levelNumber {Number}
+   * @return {Promise<Object>} - The level, with its codes
+   */
+  loadLevel = (levelNumber) => {
+    if (this.cache.has(levelNumber)) {
+      return this.cache.get(levelNumber);
+    }
+    const level = this.payload.levels.find(candidate => candidate.level === levelNumber);
+    if (!level) {
+      return Promise.reject(new Error(`Heatmap has no level ${levelNumber}`));
+    }
+    if (level.codes) {
+      return Promise.resolve(level);
+    }
+
+    const { key, url } = this.payload.tiles;
+    const id = levelId(key, levelNumber);
+    const promise = new Promise((resolve, reject) => {
+      pendingLevels.set(id, { resolve, reject });
+      const script = document.createElement('script');
+      script.src = `${url}level_${levelNumber}.js`;
+      script.onload = () => script.remove();
+      script.onerror = () => {
+        pendingLevels.delete(id);
+        script.remove();
+        this.cache.delete(levelNumber);
+        reject(new Error(`Could not load heatmap level ${script.src}`));
+      };
+      document.head.appendChild(script);
+    });
+    this.cache.set(levelNumber, promise);
+    return promise;
+  };
+
+  /**
+   * Record arrays of the level to draw on a canvas `width` pixels wide.
+   * @param width {Number}
+   * @return {Promise<Array>}
+   */
+  loadRecordArrays = width => this.loadLevel(selectHeatmapLevel(this.payload, width).level)
+    .then(level => quantizedToRecordArrays(this.payload, level));
+}
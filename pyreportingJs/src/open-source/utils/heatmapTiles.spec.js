@@ -0,0 +1,65 @@
+import {
+  HeatmapLevelLoader,
+  quantizedToRecordArrays,
+  selectHeatmapLevel,
+} from './heatmapTiles';
+
+// Output of encode_heatmap(df, colors=6, levels=True) for:
+// pd.DataFrame({'30d_apply': [1.0, 2.0, np.nan], '60d_apply': [3.0, 4.0, 5.0]},
+//              index=pd.Index(['2017-01-01', '2017-01-11', '2017-01-21'], name='date'))
+// with a coarse level of at most 2 cells
+const payload = {
+  columns: ['30d_apply', '60d_apply'],
+  index_name: 'date',
+  index: { dtype: 'string', length: 3, values: ['2017-01-01', '2017-01-11', '2017-01-21'] },
+  rows: 3,
+  cols: 2,
+  scale: {
+    dtype: 'uint8', colors: 6, offset: 1.0, step: 1.0, missing: 0,
+  },
+  levels: [
+    {
+      level: 2, row_factor: 4, col_factor: 1, rows: 1, cols: 2, codes: { dtype: 'uint8', length: 2, buffer: 'AQQ=' },
+    },
+    {
+      level: 1, row_factor: 2, col_factor: 1, rows: 2, cols: 2, codes: { dtype: 'uint8', length: 4, buffer: 'AQMABQ==' },
+    },
+    {
+      level: 0, row_factor: 1, col_factor: 1, rows: 3, cols: 2, codes: { dtype: 'uint8', length: 6, buffer: 'AQMCBAAF' },
+    },
+  ],
+};
+
+describe('heatmapTiles', () => {
+  it('restores the values of the full resolution, with NaN for missing values', () => {
+    const output = quantizedToRecordArrays(payload, payload.levels[2]);
+    expect(output).toEqual([
+      ['date', '30d_apply', '60d_apply'],
+      ['2017-01-01', 1, 3],
+      ['2017-01-11', 2, 4],
+      ['2017-01-21', NaN, 5],
+    ]);
+  });
+
+  it('labels the cells of a coarser level with the first date they aggregate', () => {
+    const output = quantizedToRecordArrays(payload, payload.levels[1]);
+    expect(output).toEqual([
+      ['date', '30d_apply', '60d_apply'],
+      ['2017-01-01', 1, 3],
+      ['2017-01-21', NaN, 5],
+    ]);
+  });
+
+  it('selects the coarsest level with a date per pixel', () => {
+    expect(selectHeatmapLevel(payload, 1).level).toEqual(2);
+    expect(selectHeatmapLevel(payload, 2).level).toEqual(1);
+    expect(selectHeatmapLevel(payload, 1000).level).toEqual(0);
+  });
+
+  it('resolves embedded levels without loading them', async () => {
+    const loader = new HeatmapLevelLoader(payload);
+    const level = await loader.loadLevel(1);
+    expect(level.rows).toEqual(2);
+    await expect(loader.loadLevel(5)).rejects.toThrow('Heatmap has no level 5');
+  });
+});
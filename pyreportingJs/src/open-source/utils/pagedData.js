@@ -0,0 +1,121 @@
+import { decodeColumnarFrame, frameToRecordObjects } from './columnarHelpers';
+
+/**
+ * Loads the pages written by `pyreporting.reports.paging.write_pages`.
+ *
+ * Every page is a small script calling `pyreporting.receivePage(key, order, pageNumber, payload)`, so pages can be
+ * loaded with a <script> tag even when the report is opened from file://. Only `maxCachedPages` decoded pages are kept
+ * per table, so browser memory is bounded by the window size rather than the table size. Pages are kept as decoded
+ * columns; record objects are only built for the rows of the requested window.
+ */
+
+const ORIGINAL_ORDER = 'rows';
+
+// `${key}/${order}/${pageNumber}` -> { resolve, reject }
+const pendingPages = new Map();
+
+const pageId = (key, order, pageNumber) => `${key}/${order}/${pageNumber}`;
+
+const pageFileName = (order, pageNumber) => `${order}_${String(pageNumber).padStart(5, '0')}.js`;
+
+/**
+ * Called by every page script.
+ */
+export const receivePage = (key, order, pageNumber, payload) => {
+  const id = pageId(key, order, pageNumber);
+  const pending = pendingPages.get(id);
+  if (!pending) {
+    console.warn(`Received page ${id} that was not requested`);
+    return;
+  }
+  pendingPages.delete(id);
+  pending.resolve(payload);
+};
+
+export class PagedDataLoader {
+  /**
+   * @param paging {Object} - The `paging` property of the widget
+   * @param maxCachedPages {Number}
+   */
+  constructor(paging, { maxCachedPages = 8 } = {}) {
+    this.paging = paging;
+    this.maxCachedPages = maxCachedPages;
+
+    // Insertion-ordered, used as an LRU of page id -> Promise of decoded frames
+    this.cache = new Map();
+  }
+
+  /**
+   * @param column {String|null}
+   * @return {Boolean} - If the whole table can be sorted by this column
+   */
+  canSortBy = column => !!column && column in this.paging.sort_orders;
+
+  loadPage = (order, pageNumber) => {
+    const { key, url } = this.paging;
+    const id = pageId(key, order, pageNumber);
+    if (this.cache.has(id)) {
+      const cached = this.cache.get(id);
+      this.cache.delete(id);
+      this.cache.set(id, cached);
+      return cached;
+    }
+
+    const promise = new Promise((resolve, reject) => {
+      pendingPages.set(id, { resolve, reject });
+      const script = document.createElement('script');
+      script.src = `${url}${pageFileName(order, pageNumber)}`;
+      script.onload = () => script.remove();
+      script.onerror = () => {
+        pendingPages.delete(id);
+        script.remove();
+        this.cache.delete(id);
+        reject(new Error(`Could not load page ${script.src}`));
+      };
+      document.head.appendChild(script);
+    }).then(decodeColumnarFrame);
+
+    this.cache.set(id, promise);
+    while (this.cache.size > this.maxCachedPages) {
+      this.cache.delete(this.cache.keys().next().value);
+    }
+    return promise;
+  };
+
+  /**
+   * Rows [start, end) of the table, optionally sorted by one of the sortable columns.
+   *
+   * @param start {Number}
+   * @param end {Number}
+   * @param sortColumn {String|null}
+   * @param descending {Boolean}
+   * @return {Promise<Array>} - Record objects
+   */
+  getRows = async (start, end, { sortColumn = null, descending = false } = {}) => {
+    const { page_size: pageSize, row_count: rowCount, sort_orders: sortOrders } = this.paging;
+    const sorted = this.canSortBy(sortColumn);
+    const order = sorted ? sortOrders[sortColumn] : ORIGINAL_ORDER;
+    const reverse = sorted && descending;
+
+    // Descending windows are read from the end of the ascending pages
+    let first = Math.max(0, Math.min(start, rowCount));
+    let last = Math.max(first, Math.min(end, rowCount));
+    if (reverse) {
+      [first, last] = [rowCount - last, rowCount - first];
+    }
+    if (last <= first) {
+      return [];
+    }
+
+    const pageNumbers = [];
+    for (let pageNumber = Math.floor(first / pageSize); pageNumber * pageSize < last; pageNumber += 1) {
+      pageNumbers.push(pageNumber);
+    }
+    const pages = await Promise.all(pageNumbers.map(pageNumber => this.loadPage(order, pageNumber)));
+    const rows = [].concat(...pages.map((frame, position) => {
+      const pageStart = pageNumbers[position] * pageSize;
+      return frameToRecordObjects(frame, Math.max(first - pageStart, 0), Math.min(last - pageStart, frame.rowCount));
+    }));
+    return reverse ? rows.reverse() : rows;
+  };
+}
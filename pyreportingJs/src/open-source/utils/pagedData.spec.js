@@ -0,0 +1,54 @@
+import { PagedDataLoader } from './pagedData';
+
+const paging = {
+  key: 'Report_Table_0',
+  url: 'Files/Report_Table_0_pages/',
+  page_size: 2,
+  row_count: 5,
+  page_count: 3,
+  sort_orders: { price: 'sort_0' },
+};
+
+// A decoded page, as decodeColumnarFrame() returns it
+const frame = prices => ({
+  columns: ['price'],
+  dtypes: ['int32'],
+  indexName: null,
+  index: null,
+  data: [Int32Array.from(prices)],
+  rowCount: prices.length,
+});
+
+// Ascending by 'price' the rows are 0..4 and in original order they are 4..0
+const makeLoader = () => {
+  const loader = new PagedDataLoader(paging);
+  loader.loadPage = (order, pageNumber) => {
+    const prices = [0, 1, 2, 3, 4];
+    const ordered = order === 'sort_0' ? prices : prices.reverse();
+    return Promise.resolve(frame(ordered.slice(pageNumber * 2, (pageNumber + 1) * 2)));
+  };
+  return loader;
+};
+
+describe('PagedDataLoader', () => {
+  it('reads windows that span pages', async () => {
+    const rows = await makeLoader().getRows(1, 4);
+    expect(rows.map(row => row.price)).toEqual([3, 2, 1]);
+  });
+
+  it('reads sorted windows', async () => {
+    const rows = await makeLoader().getRows(0, 2, { sortColumn: 'price' });
+    expect(rows.map(row => row.price)).toEqual([0, 1]);
+  });
+
+  it('reads descending windows from the end of the ascending pages', async () => {
+    const rows = await makeLoader().getRows(0, 3, { sortColumn: 'price', descending: true });
+    expect(rows.map(row => row.price)).toEqual([4, 3, 2]);
+  });
+
+  it('only sorts by precomputed columns', () => {
+    const loader = makeLoader();
+    expect(loader.canSortBy('price')).toBe(true);
+    expect(loader.canSortBy('volume')).toBe(false);
+  });
+});
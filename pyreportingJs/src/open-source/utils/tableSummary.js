@@ -0,0 +1,76 @@
+import { decodeColumn } from './columnarHelpers';
+
+/**
+ * Decoders for the table summary produced by `pyreporting.reports.table_summary.summarize_table`.
+ *
+ * Payload format:
+ * {
+ *   row_count: 4,
+ *   columns: ['a', 'b'],
+ *   other_columns: ['name'],
+ *   stats: { count: [3, 4], missing: [1, 0], mean: [2, 5.75], std: [...], min: [...], p25: [...], median: [...],
+ *            p75: [...], max: [...] },
+ *   histograms: { edges: [[1, 2, 3], [4, 6, 8]], counts: [[1, 2], [2, 2]] },
+ *   bins: [{ dtype: 'uint8', length: 4, buffer: 'AAEB/w==' }, ...],  // or null
+ *   missing_bin: 255,
+ *   pca: { columns, eigenvalues, explained_variance, eigenvectors, projections: [{ dtype: 'float32', ... }] },  // or null
+ * }
+ */
+
+/**
+ * @param payload {Object}
+ * @return {Object} - The payload with bins and pca.projections decoded into typed arrays
+ */
+export const decodeTableSummary = (payload) => {
+  const { bins, pca } = payload;
+  return {
+    ...payload,
+    bins: bins ? bins.map(decodeColumn) : null,
+    pca: pca ? { ...pca, projections: pca.projections.map(decodeColumn) } : null,
+  };
+};
+
+/**
+ * Histogram counts of every column over the rows selected by the filters of the other columns, like crossfilter
+ * groups: the filter of a column does not apply to its own histogram.
+ *
+ * @param summary {Object} - Output of decodeTableSummary, with bins
+ * @param filters {Object} - Column position -> selected bin
+ * @return {Array} - One Array of counts per column
+ */
+export const crossFilterCounts = (summary, filters) => {
+  const { bins, row_count: rowCount, histograms } = summary;
+  const filtered = Object.entries(filters).map(([column, bin]) => [parseInt(column, 10), bin]);
+  if (filtered.length === 0) {
+    return histograms.counts;
+  }
+
+  const counts = histograms.counts.map(columnCounts => new Array(columnCounts.length).fill(0));
+  const missingBin = summary.missing_bin;
+  for (let row = 0; row < rowCount; row += 1) {
+    // Count the filters the row fails; a row failing one filter still counts in the histogram of that column
+    let failures = 0;
+    let failedColumn = -1;
+    for (let i = 0; i < filtered.length && failures < 2; i += 1) {
+      const [column, bin] = filtered[i];
+      if (bins[column][row] !== bin) {
+        failures += 1;
+        failedColumn = column;
+      }
+    }
+    if (failures === 0) {
+      for (let column = 0; column < bins.length; column += 1) {
+        const bin = bins[column][row];
+        if (bin !== missingBin) {
+          counts[column][bin] += 1;
+        }
+      }
+    } else if (failures === 1) {
+      const bin = bins[failedColumn][row];
+      if (bin !== missingBin) {
+        counts[failedColumn][bin] += 1;
+      }
+    }
+  }
+  return counts;
+};
@@ -0,0 +1,46 @@
+import { crossFilterCounts, decodeTableSummary } from './tableSummary';
+
+// Output of summarize_table(pd.DataFrame({'a': [1., 2., 3., np.nan], 'b': [4, 5, 6, 8]}), bins=2, pca=False)
+const payload = {
+  row_count: 4,
+  columns: ['a', 'b'],
+  other_columns: [],
+  stats: {
+    count: [3, 4],
+    missing: [1, 0],
+    mean: [2.0, 5.75],
+    std: [1.0, 1.707825127659933],
+    min: [1.0, 4.0],
+    p25: [1.5, 4.75],
+    median: [2.0, 5.5],
+    p75: [2.5, 6.5],
+    max: [3.0, 8.0],
+  },
+  histograms: { edges: [[1.0, 2.0, 3.0], [4.0, 6.0, 8.0]], counts: [[1, 2], [2, 2]] },
+  bins: [{ dtype: 'uint8', length: 4, buffer: 'AAEB/w==' }, { dtype: 'uint8', length: 4, buffer: 'AAABAQ==' }],
+  missing_bin: 255,
+  pca: null,
+};
+
+describe('tableSummary', () => {
+  const summary = decodeTableSummary(payload);
+
+  it('decodes the bins of every row', () => {
+    expect(summary.bins[0]).toBeInstanceOf(Uint8Array);
+    expect(Array.from(summary.bins[0])).toEqual([0, 1, 1, 255]);
+    expect(Array.from(summary.bins[1])).toEqual([0, 0, 1, 1]);
+  });
+
+  it('returns the precomputed counts without filters', () => {
+    expect(crossFilterCounts(summary, {})).toEqual([[1, 2], [2, 2]]);
+  });
+
+  it('filters the histograms of the other columns', () => {
+    expect(crossFilterCounts(summary, { 0: 1 })).toEqual([[1, 2], [1, 1]]);
+    expect(crossFilterCounts(summary, { 1: 0 })).toEqual([[1, 1], [2, 2]]);
+  });
+
+  it('combines filters, except on the histogram of the filtered column itself', () => {
+    expect(crossFilterCounts(summary, { 0: 1, 1: 1 })).toEqual([[0, 1], [1, 1]]);
+  });
+});
@@ -0,0 +1,30 @@
+'''
+Tests of `pyreporting.reports.downsampling`.
+'''
+import numpy as np
+import pandas as pd
+import pytest
+
+from pyreporting.reports.downsampling import LTTB, MIN_MAX, downsample_chunks, downsample_data_frame
+
+INDEX = pd.date_range('2020-01-01', periods=1000, freq='min')
+
+
+@pytest.mark.parametrize('method', [LTTB, MIN_MAX])
+def test_downsample_numeric_columns(method):
+    df = pd.DataFrame({'a': np.sin(np.arange(1000) / 10), 'label': ['x'] * 1000}, index=INDEX)
+
+    downsampled = downsample_data_frame(df, max_points=100, method=method)
+
+    assert len(downsampled) <= 100
+    assert list(downsampled.columns) == ['a', 'label']
+    assert downsampled.index.is_monotonic_increasing
+    assert downsampled.index[0] == INDEX[0] and downsampled.index[-1] == INDEX[-1]
+
+
+@pytest.mark.parametrize('method', [LTTB, MIN_MAX])
+def test_without_numeric_columns_keeps_all_rows(method):
+    df = pd.DataFrame({'label': [f'row {row}' for row in range(1000)]}, index=INDEX)
+
+    assert downsample_data_frame(df, max_points=100, method=method) is df
+    pd.testing.assert_frame_equal(downsample_chunks([df.iloc[:500], df.iloc[500:]], max_points=100, method=method), df)
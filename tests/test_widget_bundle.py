@@ -0,0 +1,76 @@
+'''
+End to end tests of rendering with the prebuilt widget bundle, see `pyreporting.widgets.bundle`.
+'''
+import re
+import shutil
+
+import pandas as pd
+import pytest
+from bokeh.embed import standalone, util as embed_util
+from bokeh.util import compiler
+
+from pyreporting.reports import BokehReportRenderer, Report, ReportHeatmapItem, ReportInteractiveTableItem
+from pyreporting.widgets import HeatmapWidget, InteractiveTableWidget, bundle
+
+pytestmark = pytest.mark.skipif(shutil.which('node') is None, reason='Compiling the widgets needs Node.js')
+
+bokeh_bundle_all_models = compiler.bundle_all_models
+
+bokeh_nodejs_compile = compiler.nodejs_compile
+
+
+def make_report():
+    data_frame = pd.DataFrame({'a': [1., 2., 3.], 'b': [3., 2., 1.]}, index=['x', 'y', 'z'])
+    report = Report('Bundle')
+    report.add_item(ReportHeatmapItem(data_frame, 'Heatmap', 'A heatmap'))
+    report.add_item(ReportInteractiveTableItem(data_frame, 'Table', 'A table'))
+    return report
+
+
+def render(output_dir, cache_dir):
+    renderer = BokehReportRenderer(open_browser=False, prebuilt_widgets=True, widget_cache_dir=cache_dir)
+    return renderer.render(make_report(), output_dir=output_dir)
+
+
+def test_save_with_widget_bundle(tmp_path):
+    html_path = render(tmp_path / 'reports', tmp_path / 'cache')
+
+    html = html_path.read_text(encoding='utf-8')
+    bundle_urls = [url for url in re.findall(r'<script[^>]* src="([^"]*)"', html) if bundle.BUNDLE_BASE_NAME in url]
+    assert len(bundle_urls) == 1
+    asset_path = (html_path.parent / bundle_urls[0]).resolve()
+    assert asset_path.parent == (tmp_path / 'reports' / '_assets').resolve()
+
+    # The widgets are registered by the shared bundle instead of being inlined into the report
+    bundle_js = asset_path.read_text(encoding='utf-8')
+    for widget in (HeatmapWidget, InteractiveTableWidget):
+        module = compiler.CustomModel(widget).module
+        assert module in bundle_js
+        assert module not in html
+    assert asset_path.name in {path.name for path in (tmp_path / 'cache').glob('*.js')}
+
+    # Bokeh inlines custom models and compiles them without the cache again outside of the render
+    assert embed_util.bundle_all_models is bokeh_bundle_all_models
+    assert standalone.bundle_all_models is bokeh_bundle_all_models
+    assert compiler.bundle_all_models is bokeh_bundle_all_models
+    assert compiler.nodejs_compile is bokeh_nodejs_compile
+
+
+def test_rebuild_from_compile_cache(tmp_path, monkeypatch):
+    cache_dir = tmp_path / 'cache'
+    render(tmp_path / 'first', cache_dir)
+    first_bundle, = cache_dir.glob('*.js')
+    first_js = first_bundle.read_text(encoding='utf-8')
+    first_bundle.unlink()
+
+    def no_nodejs(code, lang='javascript', file=None):
+        raise AssertionError(f'{file} was compiled again')
+
+    # The bundle is rebuilt from the compiled implementations in the cache, without Node.js
+    monkeypatch.setattr(bundle, '_nodejs_compile', no_nodejs)
+    html_path = render(tmp_path / 'second', cache_dir)
+
+    assert first_bundle.read_text(encoding='utf-8') == first_js
+    assert (tmp_path / 'second' / '_assets' / first_bundle.name).exists()
+    assert first_bundle.name in html_path.read_text(encoding='utf-8')
+    assert compiler.nodejs_compile is bokeh_nodejs_compile